@@ -6,6 +6,7 @@
 import os
 import sys
 import logging
+import argparse
 from pathlib import Path
 
 # Ajouter le répertoire courant au path pour les imports
@@ -13,6 +14,100 @@ sys.path.append(str(Path(__file__).parent))
 
 from config import *
 from utils import *
+from artifact_store import ArtifactStore
+from pipeline import PipelineExecutor, Stage
+from dashboard import create_dashboard
+from zip_dataset import open_dataset
+from embedding import compute_embedding
+from features import load_feature_frame
+from monitoring import ProgressReporter, start_metrics_server
+
+def afficher_validation(validation_results):
+    """
+    Affiche les résultats de la validation de la structure du dataset.
+    
+    Args:
+        validation_results (dict): Résultats de validate_dataset_structure
+    """
+    print("\n🔍 VALIDATION DE LA STRUCTURE DU DATASET")
+    print("-" * 60)
+    
+    if validation_results['structure_valid']:
+        print("✅ Structure du dataset valide")
+    else:
+        print("❌ Problèmes détectés dans la structure:")
+        for issue in validation_results['issues']:
+            print(f"  - {issue}")
+    
+    if validation_results['warnings']:
+        print("\n⚠️ Avertissements:")
+        for warning in validation_results['warnings']:
+            print(f"  - {warning}")
+    
+    if validation_results['recommendations']:
+        print("\n💡 Recommandations:")
+        for rec in validation_results['recommendations']:
+            print(f"  - {rec}")
+
+def afficher_statistiques(stats):
+    """
+    Affiche les statistiques détaillées du dataset et les poids des classes.
+    
+    Args:
+        stats (dict): Statistiques de get_dataset_statistics
+    """
+    print("\n📊 STATISTIQUES DU DATASET")
+    print("-" * 60)
+    
+    for subset in SUBSETS:
+        if subset in stats:
+            print(f"\n📁 Ensemble {subset.upper()}:")
+            for class_name in CLASSES:
+                if class_name in stats[subset]:
+                    count = stats[subset][class_name]
+                    percentage = (count / stats[subset]['total'] * 100) if stats[subset]['total'] > 0 else 0
+                    print(f"  {class_name}: {count:,} images ({percentage:.1f}%)")
+            print(f"  Total: {stats[subset]['total']:,} images")
+    
+    print(f"\n📈 Total dataset: {stats['total_dataset']:,} images")
+    
+    # Calculer et afficher les poids des classes
+    class_weights = calculate_class_weights(stats)
+    print("\n⚖️ Poids calculés pour les classes:")
+    for i, class_name in enumerate(CLASSES):
+        print(f"  {class_name}: {class_weights[i]:.3f}")
+
+def afficher_proprietes(properties):
+    """
+    Affiche le résumé des propriétés des images analysées.
+    
+    Args:
+        properties (dict): Propriétés de analyze_image_properties
+    """
+    print("\n🖼️ ANALYSE DES PROPRIÉTÉS D'IMAGES")
+    print("-" * 60)
+    
+    if properties['dimensions']:
+        widths = [dim[0] for dim in properties['dimensions']]
+        heights = [dim[1] for dim in properties['dimensions']]
+        ratios = [w/h for w, h in properties['dimensions']]
+        file_sizes_mb = [size / (1024 * 1024) for size in properties['file_sizes']]
+        
+        print(f"Images analysées: {len(properties['dimensions']):,}")
+        print(f"Largeur moyenne: {np.mean(widths):.0f} px (min: {min(widths)}, max: {max(widths)})")
+        print(f"Hauteur moyenne: {np.mean(heights):.0f} px (min: {min(heights)}, max: {max(heights)})")
+        print(f"Ratio moyen (L/H): {np.mean(ratios):.2f} (std: {np.std(ratios):.2f})")
+        print(f"Taille moyenne: {np.mean(file_sizes_mb):.2f} MB (min: {min(file_sizes_mb):.2f}, max: {max(file_sizes_mb):.2f})")
+        print(f"Formats détectés: {', '.join(set(properties['formats']))}")
+        print(f"Modes couleur: {', '.join(set(properties['color_modes']))}")
+    
+    if 'sampling' in properties:
+        sampling = properties['sampling']
+        print(f"\n🎲 Échantillonnage {sampling['strategy']}: {sampling['sampled']:,}/{sampling['population']:,} images "
+              f"({sampling['fraction']:.1%}), IC {sampling['confidence']:.0%}, "
+              f"{'convergé' if sampling['converged'] else 'budget atteint'}")
+        for name, estimate in properties['estimates'].items():
+            print(f"  {name}: {estimate['mean']:.3f} ± {estimate['half_width']:.3f}")
 
 def analyser_dataset_avance():
     """
@@ -27,73 +122,21 @@ def analyser_dataset_avance():
     logger.info("Début de l'analyse avancée du dataset")
     
     try:
-        # Valider la structure du dataset
-        print("\n🔍 VALIDATION DE LA STRUCTURE DU DATASET")
-        print("-" * 60)
-        
-        validation_results = validate_dataset_structure(DATASET_PATH)
-        
-        if validation_results['structure_valid']:
-            print("✅ Structure du dataset valide")
-        else:
-            print("❌ Problèmes détectés dans la structure:")
-            for issue in validation_results['issues']:
-                print(f"  - {issue}")
-        
-        if validation_results['warnings']:
-            print("\n⚠️ Avertissements:")
-            for warning in validation_results['warnings']:
-                print(f"  - {warning}")
-        
-        if validation_results['recommendations']:
-            print("\n💡 Recommandations:")
-            for rec in validation_results['recommendations']:
-                print(f"  - {rec}")
+        # Dossier extrait ou archive ZIP (DATASET_ARCHIVE)
+        dataset_path = open_dataset()
         
-        # Obtenir les statistiques du dataset
-        print("\n📊 STATISTIQUES DU DATASET")
-        print("-" * 60)
-        
-        stats = get_dataset_statistics(DATASET_PATH)
-        
-        # Afficher les statistiques détaillées
-        for subset in SUBSETS:
-            if subset in stats:
-                print(f"\n📁 Ensemble {subset.upper()}:")
-                for class_name in CLASSES:
-                    if class_name in stats[subset]:
-                        count = stats[subset][class_name]
-                        percentage = (count / stats[subset]['total'] * 100) if stats[subset]['total'] > 0 else 0
-                        print(f"  {class_name}: {count:,} images ({percentage:.1f}%)")
-                print(f"  Total: {stats[subset]['total']:,} images")
-        
-        print(f"\n📈 Total dataset: {stats['total_dataset']:,} images")
+        # Valider la structure du dataset
+        validation_results = validate_dataset_structure(dataset_path)
+        afficher_validation(validation_results)
         
-        # Calculer et afficher les poids des classes
-        class_weights = calculate_class_weights(stats)
-        print("\n⚖️ Poids calculés pour les classes:")
-        for i, class_name in enumerate(CLASSES):
-            print(f"  {class_name}: {class_weights[i]:.3f}")
+        # Obtenir et afficher les statistiques du dataset
+        stats = get_dataset_statistics(dataset_path)
+        afficher_statistiques(stats)
         
         # Analyser les propriétés des images
-        print("\n🖼️ ANALYSE DES PROPRIÉTÉS D'IMAGES")
-        print("-" * 60)
-        
-        properties = analyze_image_properties(DATASET_PATH, sample_size=100)
-        
-        if properties['dimensions']:
-            widths = [dim[0] for dim in properties['dimensions']]
-            heights = [dim[1] for dim in properties['dimensions']]
-            ratios = [w/h for w, h in properties['dimensions']]
-            file_sizes_mb = [size / (1024 * 1024) for size in properties['file_sizes']]
-            
-            print(f"Images analysées: {len(properties['dimensions']):,}")
-            print(f"Largeur moyenne: {np.mean(widths):.0f} px (min: {min(widths)}, max: {max(widths)})")
-            print(f"Hauteur moyenne: {np.mean(heights):.0f} px (min: {min(heights)}, max: {max(heights)})")
-            print(f"Ratio moyen (L/H): {np.mean(ratios):.2f} (std: {np.std(ratios):.2f})")
-            print(f"Taille moyenne: {np.mean(file_sizes_mb):.2f} MB (min: {min(file_sizes_mb):.2f}, max: {max(file_sizes_mb):.2f})")
-            print(f"Formats détectés: {', '.join(set(properties['formats']))}")
-            print(f"Modes couleur: {', '.join(set(properties['color_modes']))}")
+        properties = analyze_image_properties(dataset_path, sample_size=100, strategy=SAMPLING_STRATEGY,
+                                              tolerance=SAMPLING_TOLERANCE, confidence=SAMPLING_CONFIDENCE)
+        afficher_proprietes(properties)
         
         return stats, properties, logger
         
@@ -117,7 +160,7 @@ def generer_visualisations_avancees(stats, properties, logger):
     
     try:
         # Créer les visualisations avancées
-        create_advanced_visualizations(stats, properties, OUTPUT_PATH)
+        create_advanced_visualizations(stats, properties, OUTPUT_PATH, features=load_feature_frame())
         
         # Sauvegarder le rapport d'analyse
         report_file = save_analysis_report(stats, properties, OUTPUT_PATH)
@@ -131,18 +174,21 @@ def generer_visualisations_avancees(stats, properties, logger):
         logger.error(f"Erreur lors de la génération des visualisations: {e}")
         raise
 
-def generer_recommandations_ml(stats, properties, logger):
+def formater_recommandations_ml(stats, properties):
     """
-    Génère des recommandations détaillées pour le machine learning.
+    Construit le texte des recommandations détaillées pour le machine learning.
     
     Args:
         stats (dict): Statistiques du dataset
         properties (dict): Propriétés des images
-        logger: Logger pour les messages
+        
+    Returns:
+        list: Lignes de texte à afficher
     """
-    print("\n" + "=" * 80)
-    print("RECOMMANDATIONS AVANCÉES POUR LE MACHINE LEARNING")
-    print("=" * 80)
+    lignes = []
+    lignes.append("\n" + "=" * 80)
+    lignes.append("RECOMMANDATIONS AVANCÉES POUR LE MACHINE LEARNING")
+    lignes.append("=" * 80)
     
     # Calculer les métriques globales
     total_normal = sum(stats[subset].get('NORMAL', 0) for subset in SUBSETS if subset in stats)
@@ -152,86 +198,208 @@ def generer_recommandations_ml(stats, properties, logger):
     # Analyse du déséquilibre des classes
     if total_pneumonia > total_normal:
         ratio = total_pneumonia / total_normal
-        print(f"\n🚨 DÉSÉQUILIBRE DES CLASSES CRITIQUE")
-        print(f"   Ratio PNEUMONIA:NORMAL = {ratio:.2f}:1")
-        print(f"   Impact: Risque élevé de biais vers la classe majoritaire")
+        lignes.append(f"\n🚨 DÉSÉQUILIBRE DES CLASSES CRITIQUE")
+        lignes.append(f"   Ratio PNEUMONIA:NORMAL = {ratio:.2f}:1")
+        lignes.append(f"   Impact: Risque élevé de biais vers la classe majoritaire")
         
-        print(f"\n🔧 Solutions recommandées:")
-        print(f"   1. Pondération des classes: class_weight={{{0}: {ratio:.2f}, {1}: 1.0}}")
-        print(f"   2. SMOTE pour sur-échantillonnage de la classe NORMAL")
-        print(f"   3. Augmentation de données ciblée sur NORMAL")
-        print(f"   4. Sous-échantillonnage intelligent de PNEUMONIA")
-        print(f"   5. Utilisation de Focal Loss pour gérer l'imbalance")
+        lignes.append(f"\n🔧 Solutions recommandées:")
+        lignes.append(f"   1. Pondération des classes: class_weight={{{0}: {ratio:.2f}, {1}: 1.0}}")
+        lignes.append(f"   2. SMOTE pour sur-échantillonnage de la classe NORMAL")
+        lignes.append(f"   3. Augmentation de données ciblée sur NORMAL")
+        lignes.append(f"   4. Sous-échantillonnage intelligent de PNEUMONIA")
+        lignes.append(f"   5. Utilisation de Focal Loss pour gérer l'imbalance")
     
     # Analyse de la taille du dataset
-    print(f"\n📊 ANALYSE DE LA TAILLE DU DATASET")
-    print(f"   Total: {total_images:,} images")
+    lignes.append(f"\n📊 ANALYSE DE LA TAILLE DU DATASET")
+    lignes.append(f"   Total: {total_images:,} images")
     
     if 'val' in stats and stats['val']['total'] < 100:
-        print(f"   ⚠️ Ensemble de validation très petit: {stats['val']['total']} images")
-        print(f"   Recommandation: Redistribuer en 70% train, 20% test, 10% val")
+        lignes.append(f"   ⚠️ Ensemble de validation très petit: {stats['val']['total']} images")
+        lignes.append(f"   Recommandation: Redistribuer en 70% train, 20% test, 10% val")
     
     # Recommandations sur les dimensions d'images
     if properties['dimensions']:
         widths = [dim[0] for dim in properties['dimensions']]
         heights = [dim[1] for dim in properties['dimensions']]
         
-        print(f"\n🖼️ PRÉPARATION DES IMAGES")
-        print(f"   Dimensions actuelles: {min(widths)}x{min(heights)} à {max(widths)}x{max(heights)}")
-        print(f"   Recommandation: Redimensionner à {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]} (standard)")
-        print(f"   Normalisation: Diviser par 255.0 ou standardisation Z-score")
+        lignes.append(f"\n🖼️ PRÉPARATION DES IMAGES")
+        lignes.append(f"   Dimensions actuelles: {min(widths)}x{min(heights)} à {max(widths)}x{max(heights)}")
+        lignes.append(f"   Recommandation: Redimensionner à {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]} (standard)")
+        lignes.append(f"   Normalisation: Diviser par 255.0 ou standardisation Z-score")
     
     # Recommandations d'architecture
-    print(f"\n🏗️ ARCHITECTURE DE MODÈLE RECOMMANDÉE")
-    print(f"   1. Transfer Learning avec ResNet50 ou EfficientNet")
-    print(f"   2. Fine-tuning progressif (gradual unfreezing)")
-    print(f"   3. Dropout (0.3-0.5) pour éviter l'overfitting")
-    print(f"   4. Batch Normalization après chaque couche convolutionnelle")
-    print(f"   5. Learning rate scheduling (ReduceLROnPlateau)")
+    lignes.append(f"\n🏗️ ARCHITECTURE DE MODÈLE RECOMMANDÉE")
+    lignes.append(f"   1. Transfer Learning avec ResNet50 ou EfficientNet")
+    lignes.append(f"   2. Fine-tuning progressif (gradual unfreezing)")
+    lignes.append(f"   3. Dropout (0.3-0.5) pour éviter l'overfitting")
+    lignes.append(f"   4. Batch Normalization après chaque couche convolutionnelle")
+    lignes.append(f"   5. Learning rate scheduling (ReduceLROnPlateau)")
     
     # Métriques d'évaluation
-    print(f"\n📈 MÉTRIQUES D'ÉVALUATION CRITIQUES")
-    print(f"   Primaires: Sensibilité (Recall) > 90% pour PNEUMONIA")
-    print(f"   Secondaires: Spécificité > 80%, F1-Score > 85%")
-    print(f"   Globales: AUC-ROC > 0.95, Précision équilibrée")
-    print(f"   Éviter: Accuracy simple (biaisée par l'imbalance)")
+    lignes.append(f"\n📈 MÉTRIQUES D'ÉVALUATION CRITIQUES")
+    lignes.append(f"   Primaires: Sensibilité (Recall) > 90% pour PNEUMONIA")
+    lignes.append(f"   Secondaires: Spécificité > 80%, F1-Score > 85%")
+    lignes.append(f"   Globales: AUC-ROC > 0.95, Précision équilibrée")
+    lignes.append(f"   Éviter: Accuracy simple (biaisée par l'imbalance)")
+    lignes.append(f"   Incertitude: juger chaque seuil sur la borne basse de l'IC {CV_CONFIDENCE_LEVEL:.0%} "
+                  f"(bootstrap par patient, {BOOTSTRAP_RESAMPLES:,} rééchantillonnages)")
     
     # Stratégie d'augmentation
-    print(f"\n🔄 STRATÉGIE D'AUGMENTATION DE DONNÉES")
-    print(f"   Pour NORMAL (classe minoritaire):")
-    print(f"   - Rotation: ±{AUGMENTATION_CONFIG['rotation_range']}°")
-    print(f"   - Translation: ±{AUGMENTATION_CONFIG['width_shift_range']*100}%")
-    print(f"   - Zoom: ±{AUGMENTATION_CONFIG['zoom_range']*100}%")
-    print(f"   - Flip horizontal: {AUGMENTATION_CONFIG['horizontal_flip']}")
-    print(f"   - Ajustements de contraste et luminosité")
+    lignes.append(f"\n🔄 STRATÉGIE D'AUGMENTATION DE DONNÉES")
+    lignes.append(f"   Pour NORMAL (classe minoritaire):")
+    lignes.append(f"   - Rotation: ±{AUGMENTATION_CONFIG['rotation_range']}°")
+    lignes.append(f"   - Translation: ±{AUGMENTATION_CONFIG['width_shift_range']*100}%")
+    lignes.append(f"   - Zoom: ±{AUGMENTATION_CONFIG['zoom_range']*100}%")
+    lignes.append(f"   - Flip horizontal: {AUGMENTATION_CONFIG['horizontal_flip']}")
+    lignes.append(f"   - Ajustements de contraste et luminosité")
+    
+    return lignes
+
+def generer_recommandations_ml(stats, properties, logger):
+    """
+    Génère des recommandations détaillées pour le machine learning.
     
+    Args:
+        stats (dict): Statistiques du dataset
+        properties (dict): Propriétés des images
+        logger: Logger pour les messages
+    """
+    print("\n".join(formater_recommandations_ml(stats, properties)))
     logger.info("Recommandations ML générées avec succès")
 
-def generer_rapport_complet():
+def construire_pipeline_analyse(dataset_path, sample_size=100, carte_acp=EMBEDDING_IN_ANALYSIS):
+    """
+    Déclare les étapes de l'analyse sous forme de DAG avec entrées explicites.
+    
+    L'empreinte du dataset (noms, tailles et dates des images) est recalculée
+    et le cache de descripteurs (features.py) relu à chaque exécution; les
+    autres étapes sont mises en cache sous une
+    empreinte de leurs entrées et des valeurs de configuration utilisées.
+    
+    Args:
+        dataset_path (Path | ZipPath): Racine du dataset (voir zip_dataset.open_dataset)
+        sample_size (int): Nombre d'images analysées par classe/subset
+        carte_acp (bool): Ajouter la carte ACP (décode deux fois toutes les images)
+        
+    Returns:
+        list: Étapes (pipeline.Stage)
+    """
+    dataset_config = {'classes': CLASSES, 'subsets': SUBSETS, 'extensions': sorted(IMAGE_EXTENSIONS)}
+    viz_file = OUTPUT_PATH / 'analyse_avancee_dataset.png'
+    report_file = OUTPUT_PATH / 'dataset_analysis_report.json'
+    dashboard_file = OUTPUT_PATH / 'dashboard_dataset.html'
+    embedding_file = OUTPUT_PATH / 'carte_acp_dataset.png'
+    
+    def visualisation(stats, properties, features):
+        create_advanced_visualizations(stats, properties, OUTPUT_PATH, features=features)
+        return viz_file
+    
+    def projection(fingerprint, config):
+        # Seules les deux composantes de la carte sont conservées dans le résultat de l'étape
+        embedding, index = compute_embedding(dataset_path)
+        return {'images': len(embedding), 'projection': np.array(embedding[:, :2]), 'index': index}
+    
+    def carte_projection(embedding, bins):
+        return create_embedding_density_plot(embedding['projection'], embedding['index'], OUTPUT_PATH, bins)
+    
+    stages = [
+        Stage('fingerprint', lambda: compute_dataset_fingerprint(dataset_path), cache=False),
+        Stage('validation', lambda fingerprint, config: validate_dataset_structure(dataset_path),
+              inputs=['fingerprint'], params={'config': dataset_config}),
+        Stage('stats', lambda fingerprint, config: get_dataset_statistics(dataset_path),
+              inputs=['fingerprint'], params={'config': dataset_config}),
+        Stage('properties',
+              lambda fingerprint, config, sample_size, sampling: analyze_image_properties(
+                  dataset_path, sample_size, **sampling),
+              inputs=['fingerprint'],
+              params={'config': dataset_config, 'sample_size': sample_size,
+                      'sampling': {'strategy': SAMPLING_STRATEGY, 'tolerance': SAMPLING_TOLERANCE,
+                                   'confidence': SAMPLING_CONFIDENCE, 'seed': RANDOM_SEED}}),
+        # Descripteurs déjà calculés par features.py (vide sinon: corrélation des dimensions)
+        Stage('features', lambda: load_feature_frame(), cache=False),
+        Stage('visualization', visualisation, inputs=['stats', 'properties', 'features'],
+              outputs=[viz_file], main_thread=True),
+        Stage('report', lambda stats, properties, project_info: save_analysis_report(stats, properties, OUTPUT_PATH),
+              inputs=['stats', 'properties'], params={'project_info': PROJECT_INFO}, outputs=[report_file]),
+        Stage('dashboard', lambda stats, properties: create_dashboard(stats, properties, OUTPUT_PATH),
+              inputs=['stats', 'properties'], outputs=[dashboard_file]),
+        Stage('recommendations', lambda stats, properties, config: formater_recommandations_ml(stats, properties),
+              inputs=['stats', 'properties'],
+              params={'config': {'image_size': IMAGE_SIZE, 'augmentation': AUGMENTATION_CONFIG,
+                                 'bootstrap': [BOOTSTRAP_RESAMPLES, CV_CONFIDENCE_LEVEL]}}),
+    ]
+    if carte_acp:
+        stages += [
+            Stage('embedding', projection, inputs=['fingerprint'],
+                  params={'config': {'image_size': EMBEDDING_IMAGE_SIZE, 'components': EMBEDDING_COMPONENTS}}),
+            Stage('embedding_map', carte_projection, inputs=['embedding'], params={'bins': EMBEDDING_DENSITY_BINS},
+                  outputs=[embedding_file], main_thread=True),
+        ]
+    return stages
+
+def generer_rapport_complet(carte_acp=EMBEDDING_IN_ANALYSIS):
     """
     Génère un rapport complet et professionnel d'analyse du dataset.
     
+    Les étapes inchangées depuis la dernière exécution sont reprises du cache
+    et les étapes indépendantes (visualisation, rapport JSON,
+    recommandations) s'exécutent en parallèle.
+    
+    Pendant l'analyse, les compteurs de progression sont exposés au format
+    Prometheus sur http://METRICS_HTTP_HOST:METRICS_HTTP_PORT/metrics et
+    résumés sur la console toutes les METRICS_PROGRESS_INTERVAL secondes.
+    
+    Args:
+        carte_acp (bool): Ajouter la carte ACP de toutes les images (embedding.py)
+        
     Returns:
         tuple: (stats, properties, logger) pour utilisation ultérieure
     """
+    reporter = None
     try:
-        # Analyse principale
-        stats, properties, logger = analyser_dataset_avance()
+        # Afficher l'en-tête du projet et configurer le logging
+        print_project_header()
+        logger = setup_logging()
+        logger.info("Début de l'analyse avancée du dataset")
+        
+        # Suivi de la progression (point de terminaison HTTP et ligne console)
+        start_metrics_server()
+        reporter = ProgressReporter().start()
         
-        # Générer les visualisations
-        viz_path = generer_visualisations_avancees(stats, properties, logger)
+        # Exécuter le pipeline d'analyse
+        executor = PipelineExecutor(construire_pipeline_analyse(open_dataset(), carte_acp=carte_acp), logger=logger)
+        results = executor.run()
+        reporter.stop()
+        stats, properties = results['stats'], results['properties']
         
-        # Générer les recommandations ML
-        generer_recommandations_ml(stats, properties, logger)
+        afficher_validation(results['validation'])
+        afficher_statistiques(stats)
+        afficher_proprietes(properties)
+        print("\n".join(results['recommendations']))
+        
+        # Versionner les sorties si une étape mise en cache a été rejouée (les étapes
+        # non mises en cache, relues à chaque exécution, ne comptent pas; les
+        # contenus identiques ne sont pas réécrits)
+        run_id = None
+        if any(status == 'executed' and executor.stages[name].cache for name, status in executor.status.items()):
+            run_id = ArtifactStore(logger=logger).snapshot([OUTPUT_PATH], label='analyse_dataset')
         
         # Résumé final
+        cached = [name for name, status in executor.status.items() if status == 'cached']
         print("\n" + "=" * 80)
         print("RÉSUMÉ DE L'ANALYSE")
         print("=" * 80)
         print(f"✅ Dataset analysé: {stats['total_dataset']:,} images")
-        print(f"✅ Visualisations générées: {viz_path}")
-        print(f"✅ Rapport JSON sauvegardé: {OUTPUT_PATH / 'dataset_analysis_report.json'}")
+        print(f"✅ Visualisations générées: {results['visualization']}")
+        print(f"✅ Rapport JSON sauvegardé: {results['report']}")
+        print(f"✅ Tableau de bord interactif: {results['dashboard']}")
+        if 'embedding_map' in results:
+            print(f"✅ Carte ACP de {results['embedding']['images']:,} images: {results['embedding_map']}")
         print(f"✅ Logs détaillés disponibles dans: {LOGS_PATH}")
+        if run_id:
+            print(f"✅ Artefacts versionnés (run {run_id}) dans: {ARTIFACTS_PATH}")
+        if cached:
+            print(f"♻️ Étapes reprises du cache: {', '.join(cached)}")
         
         logger.info("Analyse complète terminée avec succès")
         return stats, properties, logger
@@ -241,17 +409,25 @@ def generer_rapport_complet():
         if 'logger' in locals():
             logger.error(f"Erreur fatale: {e}")
         raise
+    finally:
+        if reporter is not None:
+            reporter.stop()
 
 if __name__ == "__main__":
     """
     Point d'entrée principal pour l'analyse du dataset.
     Exécute une analyse complète et professionnelle.
     """
+    parser = argparse.ArgumentParser(description="Analyse avancée du dataset Chest X-Ray")
+    parser.add_argument('--carte-acp', action='store_true', default=EMBEDDING_IN_ANALYSIS,
+                        help="Ajouter la carte ACP de toutes les images (deux passes de décodage)")
+    args = parser.parse_args()
+    
     try:
         print("🚀 Démarrage de l'analyse avancée du dataset Chest X-Ray...")
         
         # Exécuter l'analyse complète
-        stats, properties, logger = generer_rapport_complet()
+        stats, properties, logger = generer_rapport_complet(carte_acp=args.carte_acp)
         
         print("\n🎉 Analyse terminée avec succès!")
         print(f"📁 Consultez les résultats dans: {OUTPUT_PATH}")
@@ -0,0 +1,292 @@
+# Stockage des artefacts adressé par contenu - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import json
+import stat
+import shutil
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+
+FICLONE = 0x40049409  # ioctl Linux de clonage (reflink) sur btrfs/XFS
+EXCLUDED_SUFFIXES = {'.tmp'}
+EXCLUDED_NAMES = {'.gitkeep'}
+
+def _read_chunk(file_path, offset, size):
+    if hasattr(os, 'pread'):
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            return os.pread(fd, size, offset)
+        finally:
+            os.close(fd)
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        return f.read(size)
+
+def _hash_chunk(file_path, offset, size):
+    return hashlib.sha256(_read_chunk(file_path, offset, size)).digest()
+
+def hash_files(files, workers=None, chunk_size=ARTIFACT_CHUNK_SIZE):
+    """
+    Calcule l'empreinte de contenu de plusieurs fichiers en parallèle.
+
+    Chaque fichier est découpé en blocs hachés indépendamment (hashlib libère
+    le GIL); l'empreinte d'un fichier multi-blocs est le SHA-256 de la
+    concaténation des empreintes de ses blocs.
+
+    Args:
+        files (list): Chemins des fichiers
+        workers (int, optional): Nombre de threads (défaut: nombre de CPU)
+        chunk_size (int): Taille des blocs en octets
+
+    Returns:
+        dict: {chemin: (empreinte hexadécimale, taille)}
+    """
+    tasks = []
+    sizes = {}
+    for file_path in files:
+        size = file_path.stat().st_size
+        sizes[file_path] = size
+        offsets = range(0, max(size, 1), chunk_size)
+        tasks.extend((file_path, offset, chunk_size) for offset in offsets)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        chunk_digests = list(executor.map(lambda task: _hash_chunk(*task), tasks))
+
+    results = {}
+    position = 0
+    for file_path in files:
+        n_chunks = len(range(0, max(sizes[file_path], 1), chunk_size))
+        digests = chunk_digests[position:position + n_chunks]
+        position += n_chunks
+        if n_chunks == 1:
+            digest = digests[0].hex()
+        else:
+            digest = hashlib.sha256(b'tree:' + b''.join(digests)).hexdigest()
+        results[file_path] = (digest, sizes[file_path])
+    return results
+
+def _reflink(source, target):
+    if fcntl is None:
+        raise OSError("reflink non supporté sur cette plateforme")
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+class ArtifactStore:
+    """
+    Stockage local adressé par contenu pour les modèles, caches et rapports.
+
+    Les fichiers sont stockés une seule fois sous objects/<2 car.>/<empreinte>
+    (en lecture seule); index.json associe chaque exécution (run) aux
+    fichiers qu'elle a produits et à leurs empreintes. Les fichiers sous
+    `excluded` (par défaut le cache des étapes) ne sont jamais enregistrés.
+    """
+
+    def __init__(self, root=ARTIFACTS_PATH, project_root=PROJECT_ROOT, excluded=ARTIFACT_EXCLUDED_PATHS,
+                 logger=None):
+        self.root = Path(root)
+        self.project_root = Path(project_root)
+        self.excluded = [Path(path).resolve() for path in excluded]
+        self.objects_path = self.root / 'objects'
+        self.index_file = self.root / 'index.json'
+        self.logger = logger or logging.getLogger(__name__)
+
+    def _object_path(self, digest):
+        return self.objects_path / digest[:2] / digest
+
+    def load_index(self):
+        if not self.index_file.exists():
+            return {'runs': {}}
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_index(self, index):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def _is_excluded(self, file_path):
+        resolved = file_path.resolve()
+        return any(resolved.is_relative_to(excluded) for excluded in self.excluded)
+
+    def _relative_path(self, file_path):
+        resolved = file_path.resolve()
+        project_root = self.project_root.resolve()
+        if not resolved.is_relative_to(project_root):
+            raise ValueError(f"{file_path} est hors du projet ({project_root}): "
+                             f"seuls les fichiers du projet peuvent être enregistrés")
+        return resolved.relative_to(project_root).as_posix()
+
+    def _collect_files(self, paths):
+        files = []
+        for path in paths:
+            path = Path(path)
+            candidates = [path] if path.is_file() else sorted(p for p in path.rglob('*') if p.is_file())
+            files.extend(p for p in candidates
+                         if p.suffix not in EXCLUDED_SUFFIXES and p.name not in EXCLUDED_NAMES
+                         and not self._is_excluded(p))
+        return files
+
+    def snapshot(self, paths=(OUTPUT_PATH, MODELS_PATH), label=None, workers=None):
+        """
+        Enregistre l'état actuel des fichiers produits comme une nouvelle exécution.
+
+        Seuls les contenus absents du stockage sont copiés; un contenu identique
+        n'est jamais réécrit.
+
+        Args:
+            paths (iterable): Fichiers ou dossiers à enregistrer (dans le projet)
+            label (str, optional): Libellé de l'exécution
+            workers (int, optional): Threads de hachage
+
+        Returns:
+            str: Identifiant de l'exécution
+        """
+        files = self._collect_files(paths)
+        # Vérifier les chemins avant toute copie dans le stockage
+        relative_paths = {file_path: self._relative_path(file_path) for file_path in files}
+        digests = hash_files(files, workers)
+
+        new_objects, new_bytes = 0, 0
+        entries = {}
+        for file_path, (digest, size) in digests.items():
+            object_path = self._object_path(digest)
+            if not object_path.exists():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = object_path.with_name(object_path.name + '.tmp')
+                shutil.copyfile(file_path, tmp_path)
+                os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                os.replace(tmp_path, object_path)
+                new_objects += 1
+                new_bytes += size
+            entries[relative_paths[file_path]] = {
+                'digest': digest,
+                'size': size
+            }
+
+        run_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        index = self.load_index()
+        index['runs'][run_id] = {
+            'created': datetime.now().isoformat(),
+            'label': label,
+            'files': entries
+        }
+        self._save_index(index)
+
+        self.logger.info(f"Artefacts enregistrés (run {run_id}): {len(entries)} fichiers, "
+                         f"{new_objects} nouveaux objets ({new_bytes / (1024 * 1024):.1f} MB)")
+        return run_id
+
+    def _materialize(self, object_path, target, mode):
+        if mode in ('auto', 'reflink'):
+            try:
+                _reflink(object_path, target)
+                return 'reflink'
+            except OSError:
+                if target.exists():
+                    target.unlink()
+                if mode == 'reflink':
+                    raise
+        if mode == 'hardlink':
+            os.link(object_path, target)
+            return 'hardlink'
+        shutil.copyfile(object_path, target)
+        return 'copy'
+
+    def checkout(self, run_id, mode=ARTIFACT_CHECKOUT_MODE, workers=None):
+        """
+        Restaure les fichiers d'une exécution antérieure dans le projet.
+
+        Les fichiers déjà identiques sont laissés en place. Le mode
+        'hardlink' partage l'inode de l'objet stocké: il est refusé pour les
+        dossiers que le pipeline réécrit en place
+        (ARTIFACT_HARDLINK_EXCLUDED_PATHS), où une réécriture échouerait
+        (objet en lecture seule) ou altérerait l'objet de toutes les
+        exécutions qui le référencent.
+
+        Args:
+            run_id (str): Identifiant de l'exécution
+            mode (str): 'auto', 'reflink', 'hardlink' ou 'copy'
+            workers (int, optional): Threads de hachage
+
+        Returns:
+            dict: Nombre de fichiers par méthode ('unchanged', 'reflink', 'hardlink', 'copy')
+        """
+        run = self.load_index()['runs'][run_id]
+        targets = {self.project_root / rel_path: entry for rel_path, entry in run['files'].items()}
+        if mode == 'hardlink':
+            excluded = [Path(path).resolve() for path in ARTIFACT_HARDLINK_EXCLUDED_PATHS]
+            linked = [t for t in targets if any(t.resolve().is_relative_to(path) for path in excluded)]
+            if linked:
+                raise ValueError(f"Mode 'hardlink' refusé pour {len(linked)} fichier(s) réécrits par le pipeline "
+                                 f"(ex.: {linked[0]}); utiliser 'auto', 'reflink' ou 'copy'")
+        existing = [t for t, entry in targets.items() if t.exists() and t.stat().st_size == entry['size']]
+        current = hash_files(existing, workers)
+
+        summary = {}
+        for target, entry in targets.items():
+            if target in current and current[target][0] == entry['digest']:
+                method = 'unchanged'
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if target.exists():
+                    target.unlink()
+                method = self._materialize(self._object_path(entry['digest']), target, mode)
+            summary[method] = summary.get(method, 0) + 1
+
+        self.logger.info(f"Run {run_id} restauré: {summary}")
+        return summary
+
+    def runs_for_blob(self, digest):
+        """
+        Liste les exécutions ayant produit un contenu donné.
+        """
+        return [run_id for run_id, run in self.load_index()['runs'].items()
+                if any(entry['digest'] == digest for entry in run['files'].values())]
+
+if __name__ == "__main__":
+    from utils import setup_logging
+
+    parser = argparse.ArgumentParser(description="Stockage des artefacts adressé par contenu")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    snapshot_parser = subparsers.add_parser('snapshot', help="Enregistrer outputs/ et models/")
+    snapshot_parser.add_argument('paths', nargs='*', type=Path, default=[OUTPUT_PATH, MODELS_PATH])
+    snapshot_parser.add_argument('--label', default=None)
+    snapshot_parser.add_argument('--exclude', nargs='*', type=Path, default=ARTIFACT_EXCLUDED_PATHS,
+                                 help="Dossiers à ne pas enregistrer (défaut: cache des étapes)")
+    subparsers.add_parser('list', help="Lister les exécutions enregistrées")
+    checkout_parser = subparsers.add_parser('checkout', help="Restaurer une exécution")
+    checkout_parser.add_argument('run_id')
+    checkout_parser.add_argument('--mode', choices=['auto', 'reflink', 'hardlink', 'copy'],
+                                 default=ARTIFACT_CHECKOUT_MODE)
+    args = parser.parse_args()
+
+    setup_logging()
+    store = ArtifactStore(excluded=getattr(args, 'exclude', ARTIFACT_EXCLUDED_PATHS))
+
+    if args.command == 'snapshot':
+        print(f"✅ Run enregistré: {store.snapshot(args.paths, args.label)}")
+    elif args.command == 'list':
+        for run_id, run in store.load_index()['runs'].items():
+            total_mb = sum(entry['size'] for entry in run['files'].values()) / (1024 * 1024)
+            print(f"  {run_id}  {run['label'] or '-':<20} {len(run['files']):>5} fichiers  {total_mb:8.1f} MB")
+    else:
+        print(f"✅ Restauré: {store.checkout(args.run_id, args.mode)}")
@@ -0,0 +1,239 @@
+# Intervalles de confiance bootstrap vectorisés - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+
+BOOTSTRAP_METRICS = ['recall', 'specificity', 'precision', 'f1_score', 'balanced_accuracy', 'accuracy', 'auc']
+
+_WORKER_DATA = None
+
+def prepare_bootstrap_data(y_true, y_score, y_pred=None, threshold=0.5, groups=None):
+    """
+    Précalcule tout ce qui ne dépend pas du rééchantillonnage.
+
+    Les prédictions sont réordonnées une fois: positifs puis négatifs,
+    chacun trié par score. Le rang de chaque positif parmi les négatifs
+    (searchsorted, ex aequo compris) est fixe; l'AUC d'un rééchantillon se
+    réduit alors à une somme cumulée des poids négatifs lue à ces rangs,
+    sans nouveau tri. Les tirages portent directement sur cet ordre.
+
+    Args:
+        y_true (array-like): Étiquettes 0/1
+        y_score (array-like): Scores continus de la classe positive
+        y_pred (array-like, optional): Prédictions 0/1 (défaut: y_score >= threshold)
+        threshold (float): Seuil de décision si y_pred est absent
+        groups (array-like, optional): Identifiant de grappe (patient) de chaque prédiction
+
+    Returns:
+        dict: Tableaux précalculés
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    y_pred = (y_score >= threshold) if y_pred is None else np.asarray(y_pred).astype(bool)
+
+    order = np.lexsort((y_score, ~y_true))
+    n_positive = int(y_true.sum())
+    scores = y_score[order]
+    negative_scores = scores[n_positive:]
+    rank_low = np.searchsorted(negative_scores, scores[:n_positive], side='left')
+    rank_high = np.searchsorted(negative_scores, scores[:n_positive], side='right')
+
+    data = {
+        'n': len(y_true),
+        'n_positive': n_positive,
+        'predicted': y_pred[order].astype(np.int32),
+        'rank_low': rank_low,
+        'rank_high': rank_high if (rank_high != rank_low).any() else None,
+        'clusters': None,
+        'n_clusters': None
+    }
+    if groups is not None:
+        _, clusters = np.unique(np.asarray(groups)[order], return_inverse=True)
+        data['clusters'] = clusters
+        data['n_clusters'] = int(clusters.max()) + 1
+    return data
+
+def metrics_from_counts(counts, data):
+    """
+    Calcule les métriques de B rééchantillonnages à partir de leur matrice de comptes.
+
+    Les comptes int32 (ceux de _resample_counts) sont traités sans
+    conversion; seules les sommes finales sont accumulées en int64.
+
+    Args:
+        counts (np.ndarray): Multiplicité de chaque prédiction (dans l'ordre de
+            prepare_bootstrap_data), forme (B, n), entiers
+        data (dict): Sortie de prepare_bootstrap_data
+
+    Returns:
+        np.ndarray: Métriques (B, len(BOOTSTRAP_METRICS)), NaN si indéfinies
+    """
+    n_positive = data['n_positive']
+    positive, negative = counts[:, :n_positive], counts[:, n_positive:]
+    n_pos, n_neg = positive.sum(axis=1, dtype=np.int64), negative.sum(axis=1, dtype=np.int64)
+    predicted = data['predicted'].astype(counts.dtype, copy=False)
+    tp = positive @ predicted[:n_positive]
+    fp = negative @ predicted[n_positive:]
+    fn, tn = n_pos - tp, n_neg - fp
+
+    # AUC de Mann-Whitney pondérée: poids négatifs de score inférieur à chaque
+    # positif (somme cumulée lue au rang fixe), ex aequo comptés pour moitié
+    negative_cumsum = np.zeros((len(counts), negative.shape[1] + 1), dtype=counts.dtype)
+    np.cumsum(negative, axis=1, out=negative_cumsum[:, 1:])
+    below = negative_cumsum[:, data['rank_low']]
+    if data['rank_high'] is None:
+        auc_numerator = np.einsum('ij,ij->i', positive, below, dtype=np.int64).astype(np.float64)
+    else:
+        below += negative_cumsum[:, data['rank_high']]
+        auc_numerator = 0.5 * np.einsum('ij,ij->i', positive, below, dtype=np.int64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recall = tp / n_pos
+        specificity = tn / n_neg
+        precision = tp / (tp + fp)
+        f1 = 2 * tp / (2 * tp + fp + fn)
+        balanced_accuracy = (recall + specificity) / 2
+        accuracy = (tp + tn) / (n_pos + n_neg)
+        auc = auc_numerator / (n_pos.astype(np.float64) * n_neg)
+
+    return np.stack([recall, specificity, precision, f1, balanced_accuracy, accuracy, auc], axis=1)
+
+def _resample_counts(rng, n_resamples, size):
+    # Comptes int32 d'indices tirés avec remise, un bincount par rééchantillonnage:
+    # l'histogramme d'une ligne tient en cache, contrairement à celui du sous-lot entier
+    counts = np.empty((n_resamples, size), dtype=np.int32)
+    for row in counts:
+        row[:] = np.bincount(rng.integers(0, size, size=size), minlength=size)
+    return counts
+
+def _bootstrap_block(data, n_resamples, seed_sequence, chunk_cells=BOOTSTRAP_CHUNK_CELLS):
+    """
+    Calcule un bloc de rééchantillonnages, par sous-lots bornés en mémoire.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    clustered = data['clusters'] is not None
+    size = data['n_clusters'] if clustered else data['n']
+    chunk = max(1, chunk_cells // max(data['n'], 1))
+
+    results = []
+    for start in range(0, n_resamples, chunk):
+        counts = _resample_counts(rng, min(chunk, n_resamples - start), size)
+        if clustered:
+            # Un patient tiré k fois apporte k fois chacune de ses images
+            counts = counts[:, data['clusters']]
+        results.append(metrics_from_counts(counts, data))
+    return np.concatenate(results)
+
+def _init_bootstrap_worker(data):
+    """
+    Reçoit les tableaux précalculés une seule fois par processus.
+    """
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+def _run_block(n_resamples, seed_sequence):
+    return _bootstrap_block(_WORKER_DATA, n_resamples, seed_sequence)
+
+def bootstrap_metrics(y_true, y_score, y_pred=None, threshold=0.5, groups=None, n_resamples=BOOTSTRAP_RESAMPLES,
+                      confidence=CV_CONFIDENCE_LEVEL, workers=None, seed=RANDOM_SEED):
+    """
+    Intervalles de confiance bootstrap (percentiles) des métriques d'évaluation.
+
+    Les rééchantillonnages sont découpés en blocs de BOOTSTRAP_BLOCK_SIZE
+    dont la graine dérive de `seed` et de l'indice du bloc: le résultat ne
+    dépend pas du nombre de processus. Les gros calculs sont répartis sur
+    un pool de processus.
+
+    Avec groups, le bootstrap tire des patients (grappes) avec remise et
+    conserve toutes leurs images, ce qui respecte la corrélation entre
+    images d'un même patient.
+
+    Args:
+        y_true (array-like): Étiquettes 0/1
+        y_score (array-like): Scores continus de la classe positive
+        y_pred (array-like, optional): Prédictions 0/1 (défaut: y_score >= threshold)
+        threshold (float): Seuil de décision si y_pred est absent
+        groups (array-like, optional): Identifiant patient de chaque prédiction
+        n_resamples (int): Nombre de rééchantillonnages
+        confidence (float): Niveau de confiance
+        workers (int, optional): Processus (défaut: nombre de CPU; 1: calcul local)
+        seed (int): Graine aléatoire
+
+    Returns:
+        dict: {'n_resamples', 'confidence', 'cluster', 'metrics': {nom: {'value', 'std', 'ci_low', 'ci_high'}}}
+    """
+    data = prepare_bootstrap_data(y_true, y_score, y_pred, threshold, groups)
+    point = metrics_from_counts(np.ones((1, data['n']), dtype=np.int64), data)[0]
+
+    blocks = [min(BOOTSTRAP_BLOCK_SIZE, n_resamples - start) for start in range(0, n_resamples, BOOTSTRAP_BLOCK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    workers = min(workers or os.cpu_count() or 1, len(blocks))
+
+    if workers <= 1 or n_resamples * data['n'] < BOOTSTRAP_CHUNK_CELLS:
+        samples = [_bootstrap_block(data, size, seed_sequence) for size, seed_sequence in zip(blocks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_bootstrap_worker,
+                                 initargs=(data,)) as executor:
+            samples = list(executor.map(_run_block, blocks, seeds))
+    samples = np.concatenate(samples) if samples else np.empty((0, len(BOOTSTRAP_METRICS)))
+
+    alpha = (1 - confidence) / 2
+    metrics = {}
+    for j, name in enumerate(BOOTSTRAP_METRICS):
+        values = samples[:, j][np.isfinite(samples[:, j])]
+        if not np.isfinite(point[j]) or not len(values):
+            metrics[name] = {'value': None, 'std': None, 'ci_low': None, 'ci_high': None}
+            continue
+        ci_low, ci_high = np.quantile(values, [alpha, 1 - alpha])
+        metrics[name] = {'value': float(point[j]), 'std': float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+                         'ci_low': float(ci_low), 'ci_high': float(ci_high)}
+
+    return {
+        'n_resamples': n_resamples,
+        'confidence': confidence,
+        'cluster': groups is not None,
+        'n_clusters': data['n_clusters'],
+        'metrics': metrics
+    }
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+
+    parser = argparse.ArgumentParser(description="Bootstrap vectorisé: test de performance sur prédictions simulées")
+    parser.add_argument('--predictions', type=int, default=100_000)
+    parser.add_argument('--resamples', type=int, default=BOOTSTRAP_RESAMPLES)
+    parser.add_argument('--patients', type=int, default=0, help="Nombre de patients (0: bootstrap simple)")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print_project_header()
+    logger = setup_logging()
+
+    rng = np.random.default_rng(RANDOM_SEED)
+    y_true = rng.random(args.predictions) < 0.6
+    y_score = rng.normal(y_true * 1.5, 1.0)
+    groups = rng.integers(0, args.patients, args.predictions) if args.patients else None
+
+    start = time.perf_counter()
+    result = bootstrap_metrics(y_true, y_score, threshold=0.75, groups=groups,
+                               n_resamples=args.resamples, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n🎯 BOOTSTRAP ({args.resamples:,} rééchantillonnages x {args.predictions:,} prédictions"
+          f"{', par patient' if groups is not None else ''}): {elapsed:.1f} s")
+    for name, summary in result['metrics'].items():
+        if summary['value'] is not None:
+            print(f"  {name}: {summary['value']:.4f} [{summary['ci_low']:.4f}, {summary['ci_high']:.4f}]")
@@ -0,0 +1,212 @@
+# Lots groupés par ratio d'aspect - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from data_loader import list_image_samples, iter_batch_plan
+from monitoring import IMAGES_EXPECTED
+
+def read_image_size(img_file):
+    """
+    Lit les dimensions (largeur, hauteur) dans l'en-tête de l'image.
+    """
+    with img_file.open('rb') as f, Image.open(f) as img:
+        return img.size
+
+def scan_image_dimensions(samples, workers=None):
+    """
+    Lit les dimensions de toutes les images (en-têtes seulement) dans un pool de threads.
+
+    Args:
+        samples (list): Tuples (chemin, subset, label) de list_image_samples
+        workers (int, optional): Nombre de threads (défaut: nombre de CPU)
+
+    Returns:
+        np.ndarray: Dimensions (n, 2) en int64, (0, 0) pour les images illisibles
+    """
+    def safe_size(img_file):
+        try:
+            return read_image_size(img_file)
+        except Exception as e:
+            logging.warning(f"Erreur lors de la lecture de {img_file}: {e}")
+            return (0, 0)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        sizes = list(executor.map(safe_size, [img_file for img_file, _, _ in samples]))
+    return np.asarray(sizes, dtype=np.int64).reshape(-1, 2)
+
+def _bucket_shape(ratio, image_size, multiple):
+    # Même surface que image_size, au ratio du groupe, arrondie au multiple
+    area = image_size[0] * image_size[1]
+    width = max(multiple, int(round(np.sqrt(area * ratio) / multiple)) * multiple)
+    height = max(multiple, int(round(np.sqrt(area / ratio) / multiple)) * multiple)
+    return width, height
+
+def compute_aspect_buckets(dimensions, n_buckets=BUCKET_COUNT, image_size=IMAGE_SIZE, multiple=BUCKET_SIZE_MULTIPLE):
+    """
+    Regroupe les images en quelques groupes de ratio L/H d'effectifs égaux.
+
+    Chaque groupe reçoit la forme de sortie de même surface que image_size
+    au ratio médian de ses images; les groupes voisins qui aboutissent à la
+    même forme sont fusionnés.
+
+    Args:
+        dimensions (array-like): Dimensions (largeur, hauteur) des images
+        n_buckets (int): Nombre maximal de groupes
+        image_size (tuple): Taille carrée de référence (fixe la surface)
+        multiple (int): Arrondi de la largeur et de la hauteur
+
+    Returns:
+        dict: {'edges': bornes de ratio (n + 1), 'shapes': [(largeur, hauteur)], 'counts': [int]}
+    """
+    dimensions = np.asarray(dimensions, dtype=np.float64).reshape(-1, 2)
+    valid = (dimensions > 0).all(axis=1)
+    log_ratios = np.log(dimensions[valid, 0] / dimensions[valid, 1])
+    if not len(log_ratios):
+        return {'edges': [0.0, np.inf], 'shapes': [tuple(image_size)], 'counts': [0]}
+
+    inner = np.unique(np.quantile(log_ratios, np.linspace(0, 1, n_buckets + 1)[1:-1]))
+    log_edges = np.concatenate([[-np.inf], inner, [np.inf]])
+
+    edges, shapes, counts = [0.0], [], []
+    for low, high in zip(log_edges[:-1], log_edges[1:]):
+        members = log_ratios[(log_ratios >= low) & (log_ratios < high)]
+        if not len(members):
+            continue
+        shape = _bucket_shape(float(np.exp(np.median(members))), image_size, multiple)
+        if shapes and shapes[-1] == shape:
+            counts[-1] += len(members)
+            edges[-1] = float(np.exp(high))
+        else:
+            shapes.append(shape)
+            counts.append(len(members))
+            edges.append(float(np.exp(high)))
+    return {'edges': edges, 'shapes': shapes, 'counts': counts}
+
+def assign_buckets(dimensions, buckets):
+    """
+    Retourne l'indice du groupe de chaque image (selon son ratio L/H).
+    """
+    dimensions = np.asarray(dimensions, dtype=np.float64).reshape(-1, 2)
+    ratios = dimensions[:, 0] / np.maximum(dimensions[:, 1], 1)
+    inner_edges = np.asarray(buckets['edges'][1:-1])
+    return np.searchsorted(inner_edges, ratios, side='right')
+
+def bucketing_savings(dimensions, buckets, image_size=IMAGE_SIZE):
+    """
+    Compare les groupes de ratio au redimensionnement carré vers image_size.
+
+    Deux références: l'image écrasée à image_size (aucun remplissage mais
+    déformation) et l'image insérée sans déformation dans image_size avec
+    bandes de remplissage (letterbox). Les groupes n'ont aucun remplissage.
+
+    Args:
+        dimensions (array-like): Dimensions (largeur, hauteur) des images
+        buckets (dict): Groupes de compute_aspect_buckets
+        image_size (tuple): Taille de référence (largeur, hauteur)
+
+    Returns:
+        dict: Pixels calculés, fraction de remplissage évitée et déformation moyenne
+    """
+    dimensions = np.asarray(dimensions, dtype=np.float64).reshape(-1, 2)
+    dimensions = dimensions[(dimensions > 0).all(axis=1)]
+    if not len(dimensions):
+        return {}
+    ratios = dimensions[:, 0] / dimensions[:, 1]
+    shapes = np.asarray(buckets['shapes'], dtype=np.float64)[assign_buckets(dimensions, buckets)]
+    square_ratio = image_size[0] / image_size[1]
+
+    square_pixels = len(dimensions) * image_size[0] * image_size[1]
+    bucket_pixels = float((shapes[:, 0] * shapes[:, 1]).sum())
+    letterbox_padding = float(np.mean(1 - np.minimum(ratios / square_ratio, square_ratio / ratios)))
+    bucket_ratios = shapes[:, 0] / shapes[:, 1]
+
+    return {
+        'images': int(len(dimensions)),
+        'square_pixels': int(square_pixels),
+        'bucket_pixels': int(bucket_pixels),
+        'pixel_savings': 1 - bucket_pixels / square_pixels,
+        'letterbox_padding_fraction': letterbox_padding,
+        'letterbox_padding_pixels': int(letterbox_padding * square_pixels),
+        'bucket_padding_fraction': 0.0,
+        'square_distortion': float(np.expm1(np.mean(np.abs(np.log(ratios / square_ratio))))),
+        'bucket_distortion': float(np.expm1(np.mean(np.abs(np.log(ratios / bucket_ratios)))))
+    }
+
+def iter_bucketed_batches(samples, dimensions, buckets, batch_size=BATCH_SIZE, shuffle=False, seed=None,
+                          workers=LOADER_WORKERS, prefetch=LOADER_PREFETCH, decoder=LOADER_DECODER,
+                          cache=IMAGE_CACHE_ENABLED):
+    """
+    Parcourt les échantillons par lots homogènes en ratio d'aspect.
+
+    Chaque lot ne contient que des images d'un même groupe, redimensionnées
+    à la forme du groupe sans remplissage. Avec shuffle, l'ordre des images
+    dans chaque groupe et l'ordre des lots sont mélangés.
+
+    Args:
+        samples (list): Tuples (chemin, subset, label) de list_image_samples
+        dimensions (np.ndarray): Dimensions des images (scan_image_dimensions)
+        buckets (dict): Groupes de compute_aspect_buckets
+        batch_size (int): Nombre maximal d'images par lot
+        shuffle (bool): Mélanger images et lots
+        seed (int, optional): Graine du mélange
+        workers, prefetch, decoder, cache: Voir data_loader.iter_batch_plan
+
+    Yields:
+        tuple: (X uint8 de forme (n, hauteur, largeur), y int64, fichiers)
+    """
+    rng = np.random.default_rng(seed)
+    assignments = assign_buckets(dimensions, buckets)
+    valid = (np.asarray(dimensions).reshape(-1, 2) > 0).all(axis=1)
+
+    plan = []
+    for bucket, shape in enumerate(buckets['shapes']):
+        indices = np.flatnonzero((assignments == bucket) & valid)
+        if shuffle:
+            rng.shuffle(indices)
+        plan.extend((indices[start:start + batch_size], tuple(shape))
+                    for start in range(0, len(indices), batch_size))
+    if shuffle:
+        plan = [plan[i] for i in rng.permutation(len(plan))]
+    IMAGES_EXPECTED.labels('decode').inc(sum(len(indices) for indices, _ in plan))
+    return iter_batch_plan(samples, plan, workers, prefetch, decoder, cache)
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+    from zip_dataset import open_dataset
+
+    parser = argparse.ArgumentParser(description="Groupes de ratio d'aspect et gains face au redimensionnement carré")
+    parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                        help="Dossier du dataset, archive .zip ou URL s3://")
+    parser.add_argument('--buckets', type=int, default=BUCKET_COUNT)
+    args = parser.parse_args()
+
+    print_project_header()
+    setup_logging()
+
+    samples = list_image_samples(open_dataset(args.dataset))
+    dimensions = scan_image_dimensions(samples)
+    buckets = compute_aspect_buckets(dimensions, args.buckets)
+    savings = bucketing_savings(dimensions, buckets)
+
+    print(f"\n📐 GROUPES DE RATIO L/H ({len(samples):,} images, référence {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]})")
+    for low, high, shape, count in zip(buckets['edges'][:-1], buckets['edges'][1:], buckets['shapes'], buckets['counts']):
+        print(f"  ratio [{low:.2f}, {high:.2f}[ -> {shape[0]}x{shape[1]}: {count:,} images")
+    print(f"\n  Pixels calculés: {savings['bucket_pixels']:,} contre {savings['square_pixels']:,} "
+          f"({savings['pixel_savings']:+.1%} économisés)")
+    print(f"  Remplissage évité (letterbox carré): {savings['letterbox_padding_fraction']:.1%} des pixels "
+          f"({savings['letterbox_padding_pixels']:,})")
+    print(f"  Déformation moyenne: {savings['square_distortion']:.1%} (carré écrasé) -> "
+          f"{savings['bucket_distortion']:.1%} (groupes)")
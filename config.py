@@ -4,14 +4,20 @@
 # Localisation: Trois-Rivières, Canada
 
 import os
+import json
+import socket
+import warnings
 from pathlib import Path
 
 # Configuration des chemins
 PROJECT_ROOT = Path(__file__).parent
 DATASET_PATH = PROJECT_ROOT / "chest_xray DataSet" / "__MACOSX" / "chest_xray"
+DATASET_ARCHIVE = None  # Archive .zip (zip_dataset.py) ou URL s3://bucket/préfixe (s3_dataset.py); prioritaire sur DATASET_PATH si définie
 OUTPUT_PATH = PROJECT_ROOT / "outputs"
 MODELS_PATH = PROJECT_ROOT / "models"
 LOGS_PATH = PROJECT_ROOT / "logs"
+CACHE_PATH = OUTPUT_PATH / "cache"
+ARTIFACTS_PATH = PROJECT_ROOT / "artifacts"  # Stockage adressé par contenu (artifact_store.py)
 
 # Créer les dossiers s'ils n'existent pas
 for path in [OUTPUT_PATH, MODELS_PATH, LOGS_PATH]:
@@ -20,17 +26,95 @@ for path in [OUTPUT_PATH, MODELS_PATH, LOGS_PATH]:
 # Configuration du dataset
 CLASSES = ['NORMAL', 'PNEUMONIA']
 SUBSETS = ['train', 'test', 'val']
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
 
 # Configuration des images
 IMAGE_SIZE = (224, 224)  # Taille standard pour les modèles pré-entraînés
 BATCH_SIZE = 32
 COLOR_MODE = 'rgb'
 
+# Configuration du chargement des images (data_loader.py), ajustable par loader_autotune.py
+LOADER_WORKERS = 1  # Threads de décodage (1: chargement synchrone)
+LOADER_PREFETCH = 0  # Lots décodés à l'avance en plus de ceux en cours
+LOADER_DECODERS = ['pil', 'pil_draft', 'cv2_reduced']  # 'pil_draft' et 'cv2_reduced': échelle JPEG réduite
+LOADER_DECODER = 'pil_draft'  # Un des LOADER_DECODERS
+
+# Configuration du cache des images décodées (image_cache.py)
+IMAGE_CACHE_ENABLED = False  # Défaut de data_loader; activé explicitement par les passes répétées
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Budget mémoire (LRU)
+IMAGE_CACHE_DISK_DIR = None  # Second niveau sur disque, ex.: CACHE_PATH / "decoded"
+
+# Configuration du stockage objet S3 (s3_dataset.py)
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # Service compatible (MinIO...); None pour AWS
+S3_MAX_POOL_CONNECTIONS = 32  # Connexions HTTP simultanées max. par client
+S3_LIST_WORKERS = 8  # Préfixes listés en parallèle
+S3_RANGE_SIZE = 16 * 1024  # Première lecture par plage (en-tête JPEG)
+S3_MAX_RANGE_SIZE = 4 * 1024 * 1024  # Taille max. d'une lecture par plage
+
+# Configuration des lots par ratio d'aspect (bucketing.py)
+BUCKET_COUNT = 4  # Nombre de groupes de ratio L/H
+BUCKET_SIZE_MULTIPLE = 32  # Largeur et hauteur des groupes arrondies à ce multiple
+
+# Configuration du prétraitement (preprocessing.py)
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (8, 8)
+NORMALIZATION = 'zscore'  # 'zscore' (par image) ou 'scale' (division par 255)
+
 # Configuration du modèle
 LEARNING_RATE = 0.001
 EPOCHS = 50
 PATIENCE = 10  # Pour early stopping
 VALIDATION_SPLIT = 0.2
+RANDOM_SEED = 42
+
+# Configuration du modèle de référence (CPU, apprentissage incrémental)
+BASELINE_IMAGE_SIZE = (64, 64)  # Images réduites pour le modèle linéaire
+BASELINE_BATCH_SIZE = 256
+
+# Configuration des descripteurs d'images (features.py)
+FEATURE_IMAGE_SIZE = (256, 256)
+FEATURE_HISTOGRAM_BINS = 16
+FEATURE_ORIENTATION_BINS = 9
+
+# Configuration de la carte ACP du dataset (embedding.py)
+EMBEDDING_IMAGE_SIZE = (64, 64)  # Images réduites avant l'ACP
+EMBEDDING_COMPONENTS = 16  # Composantes conservées (les deux premières forment la carte)
+EMBEDDING_BATCH_SIZE = 256  # Images par lot (mémoire bornée par lot, pas par dataset)
+EMBEDDING_DENSITY_BINS = 80  # Cases par axe de la carte de densité
+EMBEDDING_IN_ANALYSIS = False  # Ajouter la carte à analyse_dataset.py (deux passes sur toutes les images)
+
+# Configuration de la surveillance de dérive (drift_monitor.py)
+DRIFT_SKETCH_K = 200  # Précision des sketches de quantiles (mémoire ~3k valeurs)
+DRIFT_PSI_THRESHOLD = 0.2
+DRIFT_KS_THRESHOLD = 0.1
+
+# Configuration de la validation croisée (cross_validation.py)
+CV_FOLDS = 5
+CV_CONFIDENCE_LEVEL = 0.95
+
+# Configuration des intervalles bootstrap (bootstrap.py)
+BOOTSTRAP_RESAMPLES = 10000
+BOOTSTRAP_BLOCK_SIZE = 500  # Rééchantillonnages par tâche (graine propre à chaque bloc)
+BOOTSTRAP_CHUNK_CELLS = 4_000_000  # Taille max. (rééchantillonnages x prédictions) d'une matrice de comptes
+
+# Configuration de l'échantillonnage des propriétés d'images
+SAMPLING_STRATEGY = 'first'  # 'first' (premiers fichiers, historique), 'random' ou 'stratified' (IC + arrêt anticipé)
+SAMPLING_TOLERANCE = 0.02  # Demi-largeur relative visée des intervalles de confiance
+SAMPLING_CONFIDENCE = 0.95
+
+# Configuration du tableau de bord (dashboard.py)
+DASHBOARD_DIMENSION_BINS = 60
+DASHBOARD_FILE_SIZE_BINS = 50
+DASHBOARD_DIMENSION_RANGE = (0, 4096)  # Bornes fixes des histogrammes (px); valeurs hors bornes dans les classes extrêmes
+DASHBOARD_FILE_SIZE_RANGE_MB = (0.0, 4.0)
+DASHBOARD_RATIO_RANGE = (0.0, 4.0)
+DASHBOARD_QUANTILE_BINS = 2048  # Classes fines servant à estimer les quantiles
+DASHBOARD_CHUNK_SIZE = 65536  # Images agrégées par bloc
+
+# Configuration du suivi de progression (monitoring.py)
+METRICS_HTTP_HOST = '127.0.0.1'
+METRICS_HTTP_PORT = int(os.environ.get('METRICS_HTTP_PORT', 9108))  # 0: port libre choisi par le système
+METRICS_PROGRESS_INTERVAL = 5.0  # Secondes entre deux lignes de progression
 
 # Configuration de l'augmentation de données
 AUGMENTATION_CONFIG = {
@@ -48,6 +132,16 @@ METRICS = ['accuracy', 'precision', 'recall', 'f1_score', 'auc']
 # Configuration de logging
 LOG_LEVEL = 'INFO'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotation du fichier de log à 10 MB
+LOG_BACKUP_COUNT = 5
+LOG_RATE_LIMIT = 10  # Avertissements max. par source de log et par fenêtre
+LOG_RATE_WINDOW = 60.0  # Durée de la fenêtre (secondes)
+
+# Configuration du stockage des artefacts
+ARTIFACT_CHUNK_SIZE = 8 * 1024 * 1024  # Taille des blocs hachés en parallèle
+ARTIFACT_CHECKOUT_MODE = 'auto'  # 'auto' (reflink puis copie), 'reflink', 'hardlink' ou 'copy'
+ARTIFACT_HARDLINK_EXCLUDED_PATHS = [OUTPUT_PATH, MODELS_PATH]  # Réécrits en place: jamais liés aux objets
+ARTIFACT_EXCLUDED_PATHS = [CACHE_PATH]  # Dossiers jamais enregistrés (caches régénérables)
 
 # Configuration pour le déséquilibre des classes
 CLASS_WEIGHTS = {
@@ -64,4 +158,44 @@ PROJECT_INFO = {
     'date': '2023-09-01',
     'version': '1.0.0',
     'description': 'Système de détection automatique de pneumonie sur radiographies thoraciques'
-}
\ No newline at end of file
+}
+
+# Profil de chargement propre à la machine (écrit par loader_autotune.py), prioritaire sur les valeurs ci-dessus
+LOADER_PROFILE_KEYS = ['BATCH_SIZE', 'LOADER_WORKERS', 'LOADER_PREFETCH', 'LOADER_DECODER']
+LOADER_PROFILE_FILE = PROJECT_ROOT / "profiles" / f"loader_{socket.gethostname() or 'default'}.json"
+
+def _valid_profile_value(key, value):
+    if key == 'LOADER_DECODER':
+        return value in LOADER_DECODERS
+    minimum = 0 if key == 'LOADER_PREFETCH' else 1
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+def load_loader_profile(profile_file=LOADER_PROFILE_FILE):
+    """
+    Lit les réglages d'un profil de chargement.
+
+    Un profil illisible est ignoré en entier, une valeur invalide (ex.:
+    décodeur inconnu) est ignorée seule; dans les deux cas un avertissement
+    est émis et la valeur par défaut est conservée.
+
+    Args:
+        profile_file (Path): Fichier JSON écrit par loader_autotune.py
+
+    Returns:
+        dict: Réglages valides parmi LOADER_PROFILE_KEYS
+    """
+    try:
+        with open(profile_file, 'r', encoding='utf-8') as f:
+            settings = json.load(f)['settings']
+        settings = {key: value for key, value in settings.items() if key in LOADER_PROFILE_KEYS}
+    except (OSError, json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+        warnings.warn(f"Profil de chargement ignoré ({profile_file}): {e!r}; valeurs par défaut conservées")
+        return {}
+
+    invalid = {key: value for key, value in settings.items() if not _valid_profile_value(key, value)}
+    if invalid:
+        warnings.warn(f"Profil de chargement ({profile_file}): valeurs invalides ignorées {invalid}")
+    return {key: value for key, value in settings.items() if key not in invalid}
+
+if LOADER_PROFILE_FILE.exists():
+    globals().update(load_loader_profile(LOADER_PROFILE_FILE))
@@ -0,0 +1,238 @@
+# Validation croisée stratifiée par patient - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from scipy import stats as scipy_stats
+from sklearn.model_selection import StratifiedGroupKFold
+from threadpoolctl import threadpool_limits
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from data_loader import list_image_samples
+from logging_pipeline import configure_worker_logging, get_log_queue
+
+MANIFEST_FILE = OUTPUT_PATH / 'cv_folds_manifest.json'
+REPORT_FILE = OUTPUT_PATH / 'cross_validation_report.json'
+
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+_THREAD_LIMITER = None
+
+# person1_bacteria_1.jpeg, IM-0115-0001.jpeg, NORMAL2-IM-1427-0001.jpeg
+PATIENT_PATTERNS = [
+    re.compile(r'^(person\d+)_'),
+    re.compile(r'^((?:NORMAL\d*-)?IM-\d+)-'),
+]
+
+def extract_patient_id(file_name):
+    """
+    Déduit l'identifiant patient à partir du nom de fichier Kaggle.
+
+    Args:
+        file_name (str): Nom du fichier image
+
+    Returns:
+        str: Identifiant patient (le nom sans extension si non reconnu)
+    """
+    for pattern in PATIENT_PATTERNS:
+        match = pattern.match(file_name)
+        if match:
+            return match.group(1)
+    return Path(file_name).stem
+
+def build_fold_manifest(dataset_path=DATASET_PATH, n_folds=CV_FOLDS, manifest_file=MANIFEST_FILE):
+    """
+    Regroupe train/test/val et répartit les images en k plis stratifiés par classe
+    et groupés par patient (un patient n'apparaît jamais dans deux plis).
+
+    Les identifiants patients sont préfixés par la classe, les numéros
+    'personN' n'étant pas partagés entre NORMAL et PNEUMONIA.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        n_folds (int): Nombre de plis
+        manifest_file (Path): Fichier JSON du manifeste
+
+    Returns:
+        dict: Manifeste {'n_folds', 'entries': [{'path', 'subset', 'label', 'patient', 'fold'}]}
+    """
+    samples = list_image_samples(dataset_path)
+    labels = np.array([label for _, _, label in samples])
+    groups = np.array([f"{CLASSES[label]}/{extract_patient_id(img_file.name)}"
+                       for img_file, _, label in samples])
+
+    folds = np.empty(len(samples), dtype=np.int64)
+    splitter = StratifiedGroupKFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_SEED)
+    for fold, (_, test_index) in enumerate(splitter.split(np.zeros(len(samples)), labels, groups)):
+        folds[test_index] = fold
+
+    manifest = {
+        'n_folds': n_folds,
+        'random_seed': RANDOM_SEED,
+        'entries': [
+            {
+                'path': img_file.relative_to(dataset_path).as_posix(),
+                'subset': subset,
+                'label': int(label),
+                'patient': group,
+                'fold': int(fold)
+            }
+            for (img_file, subset, label), group, fold in zip(samples, groups, folds)
+        ]
+    }
+
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    return manifest
+
+def _init_fold_worker(threads, log_queue):
+    """
+    Initialise un processus du pool en bornant ses threads BLAS/OpenMP,
+    pour éviter que k plis x n threads ne dépassent le nombre de cœurs,
+    et en redirigeant ses logs vers la file du processus principal.
+    """
+    configure_worker_logging(log_queue)
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    global _THREAD_LIMITER
+    _THREAD_LIMITER = threadpool_limits(limits=threads)
+
+def _run_fold(dataset_path, entries, fold, epochs, patience, model_name, threads):
+    """
+    Entraîne et évalue le modèle de référence sur un pli (exécuté dans un processus du pool).
+
+    Les threads de décodage sont bornés comme les threads BLAS, et le cache
+    d'images décodées est désactivé: sinon chaque pli ajouterait jusqu'à
+    IMAGE_CACHE_MAX_BYTES à la mémoire totale.
+    """
+    from train_baseline import train_baseline
+
+    def to_samples(selected):
+        return [(dataset_path / e['path'], e['subset'], e['label']) for e in selected]
+
+    train_samples = to_samples(e for e in entries if e['fold'] != fold)
+    eval_samples = to_samples(e for e in entries if e['fold'] == fold)
+    results = train_baseline(dataset_path, model_name, epochs, patience,
+                             train_samples=train_samples, eval_samples=eval_samples,
+                             checkpoint_dir=None, bootstrap_resamples=0,
+                             loader_workers=min(LOADER_WORKERS, threads), cache=False)
+    return {
+        'fold': fold,
+        'n_train': len(train_samples),
+        'n_eval': len(eval_samples),
+        'best_epoch': results['best_epoch'],
+        'metrics': results['test_metrics']
+    }
+
+def confidence_interval(values, confidence=CV_CONFIDENCE_LEVEL):
+    """
+    Intervalle de confiance de Student sur la moyenne des plis.
+
+    Returns:
+        dict: {'mean', 'std', 'ci_low', 'ci_high'}
+    """
+    values = np.asarray([v for v in values if v is not None], dtype=np.float64)
+    if len(values) == 0:
+        return {'mean': None, 'std': None, 'ci_low': None, 'ci_high': None}
+    mean = float(values.mean())
+    if len(values) < 2:
+        return {'mean': mean, 'std': 0.0, 'ci_low': mean, 'ci_high': mean}
+    std = float(values.std(ddof=1))
+    half_width = scipy_stats.t.ppf((1 + confidence) / 2, len(values) - 1) * std / np.sqrt(len(values))
+    return {'mean': mean, 'std': std, 'ci_low': mean - half_width, 'ci_high': mean + half_width}
+
+def run_cross_validation(dataset_path=DATASET_PATH, n_folds=CV_FOLDS, workers=None, threads_per_worker=None,
+                         model_name='sgd', epochs=EPOCHS, patience=PATIENCE, logger=None):
+    """
+    Exécute les k plis en parallèle et agrège les métriques avec intervalles de confiance.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        n_folds (int): Nombre de plis
+        workers (int, optional): Plis exécutés simultanément (défaut: min(k, nombre de CPU))
+        threads_per_worker (int, optional): Threads par processus (défaut: CPU / workers)
+        model_name (str): Modèle de référence (voir train_baseline.BASELINE_MODELS)
+        epochs (int): Nombre maximal d'époques par pli
+        patience (int): Patience de l'early stopping
+        logger: Logger pour les messages
+
+    Returns:
+        dict: Rapport de validation croisée (sauvegardé dans REPORT_FILE)
+    """
+    logger = logger or logging.getLogger(__name__)
+    cpu_count = os.cpu_count() or 1
+    workers = workers or min(n_folds, cpu_count)
+    threads_per_worker = threads_per_worker or max(1, cpu_count // workers)
+
+    manifest = build_fold_manifest(dataset_path, n_folds)
+    logger.info(f"Manifeste des plis: {MANIFEST_FILE} ({len(manifest['entries'])} images)")
+    logger.info(f"Validation croisée: {n_folds} plis, {workers} processus x {threads_per_worker} thread(s)")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_fold_worker,
+                             initargs=(threads_per_worker, get_log_queue())) as executor:
+        futures = [
+            executor.submit(_run_fold, dataset_path, manifest['entries'], fold, epochs, patience, model_name,
+                            threads_per_worker)
+            for fold in range(n_folds)
+        ]
+        fold_results = [future.result() for future in futures]
+
+    metric_names = [name for name in fold_results[0]['metrics'] if name != 'n_images']
+    report = {
+        'metadata': {
+            'author': PROJECT_INFO['author'],
+            'analysis_date': datetime.now().isoformat(),
+            'project_version': PROJECT_INFO['version'],
+            'model': model_name,
+            'n_folds': n_folds,
+            'confidence_level': CV_CONFIDENCE_LEVEL,
+            'manifest': MANIFEST_FILE.name
+        },
+        'folds': fold_results,
+        'summary': {
+            name: confidence_interval([r['metrics'].get(name) for r in fold_results])
+            for name in metric_names
+        }
+    }
+
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logger.info(f"Rapport de validation croisée sauvegardé: {REPORT_FILE}")
+    return report
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+
+    parser = argparse.ArgumentParser(description="Validation croisée stratifiée par patient")
+    parser.add_argument('--folds', type=int, default=CV_FOLDS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads-per-worker', type=int, default=None)
+    parser.add_argument('--model', default='sgd')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--patience', type=int, default=PATIENCE)
+    parser.add_argument('--dataset', type=Path, default=DATASET_PATH)
+    args = parser.parse_args()
+
+    print_project_header()
+    logger = setup_logging()
+
+    report = run_cross_validation(args.dataset, args.folds, args.workers, args.threads_per_worker,
+                                  args.model, args.epochs, args.patience, logger)
+
+    print(f"\n📊 VALIDATION CROISÉE ({args.folds} plis, IC {CV_CONFIDENCE_LEVEL:.0%})")
+    for name, summary in report['summary'].items():
+        if summary['mean'] is not None:
+            print(f"  {name}: {summary['mean']:.4f} [{summary['ci_low']:.4f}, {summary['ci_high']:.4f}]")
+    print(f"📁 Rapport: {REPORT_FILE}")
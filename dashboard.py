@@ -0,0 +1,298 @@
+# Tableau de bord interactif pré-agrégé - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import sys
+import logging
+import argparse
+import numpy as np
+import plotly.graph_objects as go
+from pathlib import Path
+from plotly.subplots import make_subplots
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+
+SUMMARY_QUANTILES = [0.0, 0.05, 0.25, 0.5, 0.75, 0.95, 1.0]
+ALL_GROUP = 'Tous'
+
+QUANTILE_PROPERTIES = {
+    'Largeur (px)': DASHBOARD_DIMENSION_RANGE,
+    'Hauteur (px)': DASHBOARD_DIMENSION_RANGE,
+    'Ratio L/H': DASHBOARD_RATIO_RANGE,
+    'Taille (MB)': DASHBOARD_FILE_SIZE_RANGE_MB,
+}
+
+def _histogram(values, edges):
+    # Les valeurs hors bornes sont comptées dans les classes extrêmes
+    return np.histogram(np.clip(values, edges[0], edges[-1]), bins=edges)[0]
+
+def _histogram_quantiles(counts, edges, low, high, quantiles):
+    """
+    Estime des quantiles par interpolation linéaire dans un histogramme.
+
+    Les quantiles 0 et 1 sont le minimum et le maximum exacts; les autres
+    sont bornés par les classes extrêmes si les valeurs dépassent les bornes.
+    """
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    cumulative = np.cumsum(counts)
+    targets = quantiles * cumulative[-1]
+    index = np.minimum(np.searchsorted(cumulative, targets, side='left'), len(counts) - 1)
+    before = np.where(index > 0, cumulative[index - 1], 0)
+    fraction = (targets - before) / np.maximum(counts[index], 1)
+    values = edges[index] + np.clip(fraction, 0.0, 1.0) * (edges[index + 1] - edges[index])
+    values = np.clip(values, low, high)
+    values[quantiles == 0.0] = low
+    values[quantiles == 1.0] = high
+    return values
+
+class GroupAggregate:
+    """
+    Histogrammes à classes fixes d'un groupe d'images, cumulés bloc par bloc.
+
+    Args:
+        width_edges (np.ndarray): Bornes des largeurs (histogramme 2-D)
+        height_edges (np.ndarray): Bornes des hauteurs (histogramme 2-D)
+        size_edges (np.ndarray): Bornes des tailles de fichiers (MB)
+        quantile_edges (dict): Bornes fines par propriété de QUANTILE_PROPERTIES
+    """
+
+    def __init__(self, width_edges, height_edges, size_edges, quantile_edges):
+        self.width_edges = width_edges
+        self.height_edges = height_edges
+        self.size_edges = size_edges
+        self.quantile_edges = quantile_edges
+        self.count = 0
+        self.dimension_hist = np.zeros((len(height_edges) - 1, len(width_edges) - 1), dtype=np.int64)
+        self.size_hist = np.zeros(len(size_edges) - 1, dtype=np.int64)
+        self.quantile_hists = {name: np.zeros(len(edges) - 1, dtype=np.int64)
+                               for name, edges in quantile_edges.items()}
+        self.low = {name: np.inf for name in quantile_edges}
+        self.high = {name: -np.inf for name in quantile_edges}
+
+    def update(self, widths, heights, sizes_mb):
+        if not len(widths):
+            return
+        self.count += len(widths)
+        self.dimension_hist += np.histogram2d(
+            np.clip(widths, self.width_edges[0], self.width_edges[-1]),
+            np.clip(heights, self.height_edges[0], self.height_edges[-1]),
+            bins=[self.width_edges, self.height_edges]
+        )[0].T.astype(np.int64)
+        self.size_hist += _histogram(sizes_mb, self.size_edges)
+
+        values = dict(zip(QUANTILE_PROPERTIES, [widths, heights, widths / np.maximum(heights, 1), sizes_mb]))
+        for name, edges in self.quantile_edges.items():
+            self.quantile_hists[name] += _histogram(values[name], edges)
+            self.low[name] = min(self.low[name], values[name].min())
+            self.high[name] = max(self.high[name], values[name].max())
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'dimension_hist': self.dimension_hist,
+            'size_hist': self.size_hist,
+            'quantiles': {
+                name: _histogram_quantiles(counts, self.quantile_edges[name], self.low[name],
+                                           self.high[name], SUMMARY_QUANTILES)
+                for name, counts in self.quantile_hists.items()
+            }
+        }
+
+def iter_property_chunks(properties, chunk_size=DASHBOARD_CHUNK_SIZE):
+    """
+    Découpe les propriétés de analyze_image_properties en blocs de tableaux.
+
+    Yields:
+        dict: 'dimensions' (n, 2), 'file_sizes' (n,) et, si disponibles, 'subsets' et 'classes'
+    """
+    n = len(properties['dimensions'])
+    labelled = len(properties.get('subsets', [])) == n and len(properties.get('classes', [])) == n
+    for start in range(0, n, chunk_size):
+        chunk = {
+            'dimensions': np.asarray(properties['dimensions'][start:start + chunk_size],
+                                     dtype=np.float64).reshape(-1, 2),
+            'file_sizes': np.asarray(properties['file_sizes'][start:start + chunk_size], dtype=np.float64),
+        }
+        if labelled:
+            chunk['subsets'] = np.asarray(properties['subsets'][start:start + chunk_size])
+            chunk['classes'] = np.asarray(properties['classes'][start:start + chunk_size])
+        yield chunk
+
+def aggregate_property_chunks(chunks, dimension_bins=DASHBOARD_DIMENSION_BINS,
+                              file_size_bins=DASHBOARD_FILE_SIZE_BINS):
+    """
+    Agrège des blocs de propriétés en histogrammes à classes fixes par groupe.
+
+    Chaque bloc est réduit par np.histogram et les comptes sont additionnés:
+    la mémoire ne dépend que du nombre de classes et de groupes (global, par
+    ensemble et par ensemble/classe), jamais du nombre d'images. Les bornes
+    sont fixées par la configuration (DASHBOARD_*_RANGE) et les quantiles
+    sont estimés sur des histogrammes fins (DASHBOARD_QUANTILE_BINS).
+
+    Args:
+        chunks (iterable): Blocs au format de iter_property_chunks
+        dimension_bins (int): Nombre de classes par axe de l'histogramme 2-D
+        file_size_bins (int): Nombre de classes de l'histogramme des tailles
+
+    Returns:
+        dict: {'width_edges', 'height_edges', 'size_edges', 'groups': {nom: agrégats}}
+    """
+    width_edges = np.linspace(*DASHBOARD_DIMENSION_RANGE, dimension_bins + 1)
+    height_edges = np.linspace(*DASHBOARD_DIMENSION_RANGE, dimension_bins + 1)
+    size_edges = np.linspace(*DASHBOARD_FILE_SIZE_RANGE_MB, file_size_bins + 1)
+    quantile_edges = {name: np.linspace(*value_range, DASHBOARD_QUANTILE_BINS + 1)
+                      for name, value_range in QUANTILE_PROPERTIES.items()}
+
+    groups = {}
+    for chunk in chunks:
+        widths, heights = chunk['dimensions'][:, 0], chunk['dimensions'][:, 1]
+        sizes_mb = chunk['file_sizes'][:len(widths)] / (1024 * 1024)
+
+        masks = {ALL_GROUP: slice(None)}
+        if 'subsets' in chunk:
+            for subset in SUBSETS:
+                masks[subset] = chunk['subsets'] == subset
+                for class_name in CLASSES:
+                    masks[f"{subset}/{class_name}"] = masks[subset] & (chunk['classes'] == class_name)
+
+        for name, mask in masks.items():
+            if name not in groups:
+                groups[name] = GroupAggregate(width_edges, height_edges, size_edges, quantile_edges)
+            groups[name].update(widths[mask], heights[mask], sizes_mb[mask])
+
+    # Ordre d'affichage: global, puis ensembles et ensembles/classes non vides
+    return {
+        'width_edges': width_edges,
+        'height_edges': height_edges,
+        'size_edges': size_edges,
+        'groups': {name: group.summary() for name, group in groups.items() if group.count}
+    }
+
+def aggregate_properties(properties, dimension_bins=DASHBOARD_DIMENSION_BINS, file_size_bins=DASHBOARD_FILE_SIZE_BINS,
+                         chunk_size=DASHBOARD_CHUNK_SIZE):
+    """
+    Pré-agrège les propriétés d'images en histogrammes et quantiles par groupe.
+
+    Args:
+        properties (dict): Propriétés de analyze_image_properties
+        dimension_bins (int): Nombre de classes par axe de l'histogramme 2-D
+        file_size_bins (int): Nombre de classes de l'histogramme des tailles
+        chunk_size (int): Images agrégées par bloc
+
+    Returns:
+        dict: Voir aggregate_property_chunks
+    """
+    return aggregate_property_chunks(iter_property_chunks(properties, chunk_size), dimension_bins, file_size_bins)
+
+def create_dashboard(stats, properties, output_path, include_plotlyjs='cdn'):
+    """
+    Génère un tableau de bord HTML ne contenant que des agrégats.
+
+    Un menu déroulant permet de passer d'un groupe à l'autre (global, par
+    ensemble, par ensemble/classe) sans recharger de données.
+
+    Args:
+        stats (dict): Statistiques du dataset
+        properties (dict): Propriétés des images
+        output_path (Path): Dossier de sortie
+        include_plotlyjs (str|bool): 'cdn' (page légère) ou True (page autonome hors ligne)
+
+    Returns:
+        Path: Fichier HTML généré
+    """
+    aggregates = aggregate_properties(properties)
+    groups = aggregates['groups']
+
+    fig = make_subplots(
+        rows=2, cols=2,
+        specs=[[{'type': 'heatmap'}, {'type': 'bar'}], [{'type': 'bar'}, {'type': 'table'}]],
+        subplot_titles=('Distribution des Dimensions', 'Distribution des Tailles de Fichiers',
+                        'Distribution des Classes par Ensemble', 'Quantiles')
+    )
+
+    # Répartition des classes (indépendante du groupe sélectionné)
+    for class_name in CLASSES:
+        fig.add_trace(go.Bar(
+            x=[subset for subset in SUBSETS if subset in stats],
+            y=[stats[subset].get(class_name, 0) for subset in SUBSETS if subset in stats],
+            name=class_name
+        ), row=2, col=1)
+    n_static = len(CLASSES)
+
+    width_centers = 0.5 * (aggregates['width_edges'][:-1] + aggregates['width_edges'][1:])
+    height_centers = 0.5 * (aggregates['height_edges'][:-1] + aggregates['height_edges'][1:])
+    size_centers = 0.5 * (aggregates['size_edges'][:-1] + aggregates['size_edges'][1:])
+    quantile_header = ['Propriété'] + [f"q{int(q * 100)}" for q in SUMMARY_QUANTILES]
+
+    for i, (name, group) in enumerate(groups.items()):
+        visible = i == 0
+        fig.add_trace(go.Heatmap(
+            x=width_centers, y=height_centers, z=group['dimension_hist'],
+            colorscale='Viridis', showscale=False, visible=visible,
+            hovertemplate='Largeur %{x:.0f} px<br>Hauteur %{y:.0f} px<br>%{z} images<extra></extra>'
+        ), row=1, col=1)
+        fig.add_trace(go.Bar(
+            x=size_centers, y=group['size_hist'], marker_color='skyblue', showlegend=False, visible=visible
+        ), row=1, col=2)
+        fig.add_trace(go.Table(
+            header={'values': quantile_header},
+            cells={'values': [list(group['quantiles'])] + [
+                [f"{values[j]:.2f}" for values in group['quantiles'].values()]
+                for j in range(len(SUMMARY_QUANTILES))
+            ]},
+            visible=visible
+        ), row=2, col=2)
+
+    traces_per_group = 3
+    buttons = []
+    for i, (name, group) in enumerate(groups.items()):
+        visibility = [True] * n_static + [False] * (traces_per_group * len(groups))
+        for k in range(traces_per_group):
+            visibility[n_static + traces_per_group * i + k] = True
+        buttons.append({
+            'label': f"{name} ({group['count']:,})",
+            'method': 'update',
+            'args': [{'visible': visibility}]
+        })
+
+    fig.update_layout(
+        title=f"{PROJECT_INFO['name']} - Tableau de Bord du Dataset",
+        updatemenus=[{'buttons': buttons, 'x': 1.0, 'xanchor': 'right', 'y': 1.12, 'yanchor': 'top'}],
+        barmode='group',
+        height=900
+    )
+    fig.update_xaxes(title_text='Largeur (pixels)', row=1, col=1)
+    fig.update_yaxes(title_text='Hauteur (pixels)', row=1, col=1)
+    fig.update_xaxes(title_text='Taille du Fichier (MB)', row=1, col=2)
+    fig.update_yaxes(title_text='Fréquence', row=1, col=2)
+    fig.update_yaxes(title_text='Nombre d\'Images', row=2, col=1)
+
+    dashboard_file = Path(output_path) / 'dashboard_dataset.html'
+    fig.write_html(dashboard_file, include_plotlyjs=include_plotlyjs, full_html=True)
+    logging.info(f"Tableau de bord sauvegardé: {dashboard_file}")
+    return dashboard_file
+
+if __name__ == "__main__":
+    from utils import (analyze_image_properties, get_dataset_statistics,
+                       print_project_header, setup_logging)
+    from zip_dataset import open_dataset
+
+    parser = argparse.ArgumentParser(description="Tableau de bord HTML pré-agrégé")
+    parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                        help="Dossier du dataset, archive .zip ou URL s3://")
+    parser.add_argument('--sample-size', type=int, default=100)
+    parser.add_argument('--offline', action='store_true', help="Inclure plotly.js dans la page")
+    args = parser.parse_args()
+
+    print_project_header()
+    setup_logging()
+
+    dataset_path = open_dataset(args.dataset)
+    stats = get_dataset_statistics(dataset_path)
+    properties = analyze_image_properties(dataset_path, sample_size=args.sample_size)
+    dashboard_file = create_dashboard(stats, properties, OUTPUT_PATH,
+                                      include_plotlyjs=True if args.offline else 'cdn')
+    print(f"\n✅ Tableau de bord: {dashboard_file} ({dashboard_file.stat().st_size / 1024:.0f} KB)")
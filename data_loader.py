@@ -0,0 +1,177 @@
+# Chargement en flux des images pour le projet Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+
+import time
+import logging
+import itertools
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from config import *
+from monitoring import BATCH_SECONDS, IMAGES_EXPECTED, IMAGE_ERRORS, progress_counter
+
+def list_image_samples(dataset_path, subsets=None):
+    """
+    Liste les images du dataset avec leur ensemble et leur étiquette.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        subsets (list, optional): Ensembles à parcourir (défaut: SUBSETS)
+
+    Returns:
+        list: Tuples (chemin, subset, label) triés par chemin
+    """
+    samples = []
+    for subset in (subsets or SUBSETS):
+        for label, class_name in enumerate(CLASSES):
+            class_path = dataset_path / subset / class_name
+            if not class_path.exists():
+                continue
+
+            for img_file in sorted(class_path.iterdir()):
+                if img_file.suffix.lower() in IMAGE_EXTENSIONS:
+                    samples.append((img_file, subset, label))
+
+    return samples
+
+def load_image_array(img_file, image_size=BASELINE_IMAGE_SIZE, decoder=LOADER_DECODER, cache=IMAGE_CACHE_ENABLED):
+    """
+    Décode une image en niveaux de gris et la réduit à la taille demandée.
+
+    Avec cache, le résultat est servi par le cache d'images décodées du
+    processus (image_cache.get_image_cache) et retourné en lecture seule:
+    les passes suivantes et les cellules de notebook réexécutées ne
+    redécodent plus les images déjà vues.
+
+    Avec 'pil_draft', le mode draft de PIL laisse le décodeur JPEG sauter
+    directement à une échelle réduite (1/2, 1/4, 1/8), ce qui évite de
+    décoder la pleine résolution pour la jeter aussitôt. 'cv2_reduced' fait
+    de même avec le décodeur d'OpenCV; 'pil' décode en pleine résolution.
+
+    Args:
+        img_file (Path): Chemin vers l'image
+        image_size (tuple): Taille de sortie (largeur, hauteur)
+        decoder (str): 'pil', 'pil_draft' ou 'cv2_reduced'
+        cache (bool): Passer par le cache d'images décodées
+
+    Returns:
+        np.ndarray: Image uint8 de forme (hauteur, largeur)
+    """
+    if cache:
+        from image_cache import get_image_cache
+        return get_image_cache().get_or_decode(img_file, image_size, decoder,
+                                               lambda: _decode_image(img_file, image_size, decoder))
+    return _decode_image(img_file, image_size, decoder)
+
+def _decode_image(img_file, image_size, decoder):
+    if decoder == 'cv2_reduced':
+        import cv2
+        from preprocessing import decode_grayscale
+        image = decode_grayscale(img_file, image_size)
+        if image.shape[::-1] != tuple(image_size):
+            image = cv2.resize(image, tuple(image_size), interpolation=cv2.INTER_AREA)
+        return image
+    if decoder not in ('pil', 'pil_draft'):
+        raise ValueError(f"Décodeur inconnu: {decoder}")
+
+    with img_file.open('rb') as f, Image.open(f) as img:
+        if decoder == 'pil_draft':
+            img.draft('L', image_size)
+        img = img.convert('L')
+        if img.size != tuple(image_size):
+            img = img.resize(image_size, Image.BILINEAR)
+        return np.asarray(img, dtype=np.uint8)
+
+def _load_batch(samples, indices, image_size, decoder, cache=IMAGE_CACHE_ENABLED):
+    width, height = image_size
+    X = np.empty((len(indices), height, width), dtype=np.uint8)
+    y = np.empty(len(indices), dtype=np.int64)
+    files = []
+    progress = progress_counter('decode')
+    start = time.perf_counter()
+
+    n = 0
+    for i in indices:
+        img_file, _, label = samples[i]
+        progress.inc()
+        try:
+            X[n] = load_image_array(img_file, image_size, decoder, cache)
+        except Exception as e:
+            IMAGE_ERRORS.labels('decode').inc()
+            logging.warning(f"Erreur lors du chargement de {img_file}: {e}")
+            continue
+        y[n] = label
+        files.append(img_file)
+        n += 1
+    BATCH_SECONDS.labels('decode').observe(time.perf_counter() - start)
+    return X[:n], y[:n], files
+
+def iter_image_batches(samples, batch_size=BASELINE_BATCH_SIZE, image_size=BASELINE_IMAGE_SIZE,
+                       shuffle=False, seed=None, workers=LOADER_WORKERS, prefetch=LOADER_PREFETCH,
+                       decoder=LOADER_DECODER, cache=IMAGE_CACHE_ENABLED):
+    """
+    Parcourt les échantillons par lots sans jamais charger tout le dataset.
+
+    Avec plusieurs workers (ou prefetch > 0), les lots sont décodés dans un
+    pool de threads (PIL et OpenCV libèrent le GIL pendant le décodage):
+    au plus workers + prefetch lots sont en cours ou prêts à l'avance, et
+    l'ordre des lots est conservé. Les images illisibles sont journalisées
+    puis ignorées.
+
+    Args:
+        samples (list): Tuples (chemin, subset, label) de list_image_samples
+        batch_size (int): Nombre d'images par lot
+        image_size (tuple): Taille de sortie (largeur, hauteur)
+        shuffle (bool): Mélanger l'ordre de parcours
+        seed (int, optional): Graine du mélange
+        workers (int): Threads de décodage (1: chargement synchrone)
+        prefetch (int): Lots supplémentaires décodés à l'avance
+        decoder (str): Décodeur (voir load_image_array)
+        cache (bool): Passer par le cache d'images décodées
+
+    Yields:
+        tuple: (X uint8 de forme (n, hauteur, largeur), y int64, fichiers)
+    """
+    order = np.arange(len(samples))
+    if shuffle:
+        np.random.default_rng(seed).shuffle(order)
+    IMAGES_EXPECTED.labels('decode').inc(len(order))
+    plan = ((order[start:start + batch_size], image_size) for start in range(0, len(order), batch_size))
+    return iter_batch_plan(samples, plan, workers, prefetch, decoder, cache)
+
+def iter_batch_plan(samples, plan, workers=LOADER_WORKERS, prefetch=LOADER_PREFETCH, decoder=LOADER_DECODER,
+                    cache=IMAGE_CACHE_ENABLED):
+    """
+    Charge des lots décrits par un plan (indices, taille de sortie), dans l'ordre du plan.
+
+    Args:
+        samples (list): Tuples (chemin, subset, label)
+        plan (iterable): Couples (indices des échantillons, (largeur, hauteur))
+        workers (int): Threads de décodage (1: chargement synchrone)
+        prefetch (int): Lots supplémentaires décodés à l'avance
+        decoder (str): Décodeur (voir load_image_array)
+        cache (bool): Passer par le cache d'images décodées
+
+    Yields:
+        tuple: (X uint8 de forme (n, hauteur, largeur), y int64, fichiers)
+    """
+    plan = iter(plan)
+    if workers <= 1 and prefetch <= 0:
+        for indices, image_size in plan:
+            X, y, files = _load_batch(samples, indices, image_size, decoder, cache)
+            if len(y):
+                yield X, y, files
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = deque()
+        for indices, image_size in itertools.islice(plan, max(1, workers) + prefetch):
+            pending.append(executor.submit(_load_batch, samples, indices, image_size, decoder, cache))
+        while pending:
+            X, y, files = pending.popleft().result()
+            for indices, image_size in itertools.islice(plan, 1):
+                pending.append(executor.submit(_load_batch, samples, indices, image_size, decoder, cache))
+            if len(y):
+                yield X, y, files
@@ -0,0 +1,394 @@
+# Surveillance de la dérive des images en production - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import math
+import json
+import random
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from utils import extract_image_properties
+from logging_pipeline import configure_worker_logging, get_log_queue
+
+NUMERIC_PROPERTIES = ['width', 'height', 'aspect_ratio', 'file_size_kb', 'intensity_mean', 'intensity_std']
+CATEGORICAL_PROPERTIES = ['format', 'color_mode']
+
+REFERENCE_FILE = OUTPUT_PATH / 'drift_reference.json'
+
+class QuantileSketch:
+    """
+    Sketch de quantiles fusionnable de type KLL à mémoire bornée.
+
+    Chaque niveau h conserve des valeurs de poids 2^h; lorsqu'un niveau
+    dépasse sa capacité, il est trié et une valeur sur deux est promue au
+    niveau supérieur. La mémoire reste de l'ordre de 3k valeurs quel que
+    soit le nombre d'observations.
+    """
+
+    def __init__(self, k=DRIFT_SKETCH_K, seed=None):
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        for level in range(len(self.levels)):
+            if len(self.levels[level]) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            items = sorted(self.levels[level])
+            # Un élément impair reste au niveau courant
+            leftover = [items.pop()] if len(items) % 2 else []
+            offset = self._rng.randint(0, 1)
+            self.levels[level + 1].extend(items[offset::2])
+            self.levels[level] = leftover
+
+    def update(self, value):
+        """
+        Ajoute une observation au sketch.
+        """
+        value = float(value)
+        self.levels[0].append(value)
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other):
+        """
+        Fusionne un autre sketch dans celui-ci.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while any(len(items) >= self._capacity(level) for level, items in enumerate(self.levels)):
+            self._compress()
+        return self
+
+    def _weighted_items(self):
+        values = np.concatenate([np.asarray(items, dtype=np.float64) for items in self.levels])
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def cdf(self, x):
+        """
+        Estime la fonction de répartition P(X <= x) (x scalaire ou tableau).
+        """
+        values, cumulative = self._weighted_items()
+        if len(values) == 0:
+            return np.zeros_like(np.asarray(x, dtype=np.float64))
+        positions = np.searchsorted(values, x, side='right')
+        cumulative = np.concatenate([[0.0], cumulative])
+        return cumulative[positions] / cumulative[-1]
+
+    def quantile(self, q):
+        """
+        Estime le quantile q (scalaire ou tableau dans [0, 1]).
+        """
+        values, cumulative = self._weighted_items()
+        if len(values) == 0:
+            return np.full_like(np.asarray(q, dtype=np.float64), np.nan)
+        positions = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1], side='left')
+        return values[np.minimum(positions, len(values) - 1)]
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'min': self.min, 'max': self.max, 'levels': self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data['k'])
+        sketch.count = data['count']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        sketch.levels = [list(items) for items in data['levels']]
+        return sketch
+
+class PropertyProfile:
+    """
+    Résumé à mémoire constante des propriétés d'un ensemble d'images.
+
+    Les propriétés numériques sont résumées par des sketches de quantiles,
+    les propriétés catégorielles par des histogrammes de comptage fixes.
+    """
+
+    def __init__(self):
+        self.sketches = {name: QuantileSketch() for name in NUMERIC_PROPERTIES}
+        self.categories = {name: Counter() for name in CATEGORICAL_PROPERTIES}
+        self.count = 0
+        self.errors = 0
+
+    def update(self, image_properties):
+        width, height = image_properties['dimensions']
+        values = {
+            'width': width,
+            'height': height,
+            'aspect_ratio': width / height,
+            'file_size_kb': image_properties['file_size'] / 1024,
+            'intensity_mean': image_properties['intensity_mean'],
+            'intensity_std': image_properties['intensity_std'],
+        }
+        for name, value in values.items():
+            self.sketches[name].update(value)
+        self.categories['format'][image_properties['format']] += 1
+        self.categories['color_mode'][image_properties['color_mode']] += 1
+        self.count += 1
+
+    def merge(self, other):
+        for name in NUMERIC_PROPERTIES:
+            self.sketches[name].merge(other.sketches[name])
+        for name in CATEGORICAL_PROPERTIES:
+            self.categories[name].update(other.categories[name])
+        self.count += other.count
+        self.errors += other.errors
+        return self
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'sketches': {name: sketch.to_dict() for name, sketch in self.sketches.items()},
+            'categories': {name: dict(counts) for name, counts in self.categories.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls()
+        profile.count = data['count']
+        profile.errors = data.get('errors', 0)
+        profile.sketches = {name: QuantileSketch.from_dict(d) for name, d in data['sketches'].items()}
+        profile.categories = {name: Counter(d) for name, d in data['categories'].items()}
+        return profile
+
+def _profile_files(files):
+    """
+    Construit le profil d'un bloc de fichiers (exécuté dans un processus du pool).
+    """
+    profile = PropertyProfile()
+    for img_file in files:
+        try:
+            profile.update(extract_image_properties(img_file, with_intensity=True))
+        except Exception as e:
+            logging.warning(f"Erreur lors de l'analyse de {img_file}: {e}")
+            profile.errors += 1
+    return profile
+
+def build_profile(files, workers=None, chunk_size=256):
+    """
+    Résume une liste d'images en parallèle; les profils partiels sont fusionnés.
+
+    Args:
+        files (list): Chemins des images (Path, ZipPath ou S3Path, transmis tels quels au pool)
+        workers (int, optional): Nombre de processus (défaut: nombre de CPU)
+        chunk_size (int): Nombre d'images par tâche
+
+    Returns:
+        PropertyProfile: Profil fusionné
+    """
+    files = list(files)
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    profile = PropertyProfile()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=configure_worker_logging,
+                             initargs=(get_log_queue(),)) as executor:
+        for partial in executor.map(_profile_files, chunks):
+            profile.merge(partial)
+    return profile
+
+def list_dataset_images(dataset_path, subsets=None):
+    """
+    Liste les images des ensembles demandés (défaut: 'train').
+    """
+    files = []
+    for subset in (subsets or ['train']):
+        for class_name in CLASSES:
+            class_path = dataset_path / subset / class_name
+            if class_path.exists():
+                files.extend(f for f in sorted(class_path.iterdir())
+                             if f.suffix.lower() in IMAGE_EXTENSIONS)
+    return files
+
+def list_images_recursive(root):
+    """
+    Liste récursivement les images sous un dossier (Path, ZipPath ou S3Path).
+    """
+    files = []
+    for child in sorted(root.iterdir()):
+        if child.is_dir():
+            files.extend(list_images_recursive(child))
+        elif child.suffix.lower() in IMAGE_EXTENSIONS:
+            files.append(child)
+    return files
+
+def ks_statistic(reference, current):
+    """
+    Statistique de Kolmogorov-Smirnov estimée à partir de deux sketches.
+    """
+    if reference.count == 0 or current.count == 0:
+        return 0.0
+    points = np.union1d(reference._weighted_items()[0], current._weighted_items()[0])
+    return float(np.max(np.abs(reference.cdf(points) - current.cdf(points))))
+
+def _psi(expected, actual, eps=1e-4):
+    expected = np.clip(np.asarray(expected, dtype=np.float64), eps, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), eps, None)
+    expected /= expected.sum()
+    actual /= actual.sum()
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def psi_numeric(reference, current, n_bins=10):
+    """
+    Population Stability Index sur les déciles de la référence.
+    """
+    if reference.count == 0 or current.count == 0:
+        return 0.0
+    edges = np.unique(reference.quantile(np.linspace(0, 1, n_bins + 1)[1:-1]))
+    ref_cdf = np.concatenate([[0.0], reference.cdf(edges), [1.0]])
+    cur_cdf = np.concatenate([[0.0], current.cdf(edges), [1.0]])
+    return _psi(np.diff(ref_cdf), np.diff(cur_cdf))
+
+def psi_categorical(reference_counts, current_counts):
+    """
+    Population Stability Index sur des histogrammes de catégories.
+    """
+    if not sum(reference_counts.values()) or not sum(current_counts.values()):
+        return 0.0
+    keys = sorted(set(reference_counts) | set(current_counts), key=str)
+    return _psi([reference_counts.get(k, 0) for k in keys], [current_counts.get(k, 0) for k in keys])
+
+class DriftMonitor:
+    """
+    Compare un flux d'images entrantes au profil de référence de l'entraînement.
+
+    Le profil courant est mis à jour incrémentalement; evaluate() calcule les
+    scores de dérive par propriété et émet une alerte (logging.warning) pour
+    chaque seuil dépassé.
+    """
+
+    def __init__(self, reference, psi_threshold=DRIFT_PSI_THRESHOLD, ks_threshold=DRIFT_KS_THRESHOLD,
+                 logger=None):
+        self.reference = reference
+        self.current = PropertyProfile()
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.logger = logger or logging.getLogger(__name__)
+
+    def observe(self, files, workers=None):
+        """
+        Ajoute un lot d'images entrantes au profil courant.
+        """
+        self.current.merge(build_profile(files, workers))
+
+    def reset(self):
+        """
+        Démarre une nouvelle fenêtre de surveillance.
+        """
+        self.current = PropertyProfile()
+
+    def drift_scores(self):
+        """
+        Returns:
+            dict: Scores {propriété: {'psi': ..., 'ks': ...}}
+        """
+        scores = {}
+        for name in NUMERIC_PROPERTIES:
+            reference, current = self.reference.sketches[name], self.current.sketches[name]
+            scores[name] = {'psi': psi_numeric(reference, current), 'ks': ks_statistic(reference, current)}
+        for name in CATEGORICAL_PROPERTIES:
+            scores[name] = {'psi': psi_categorical(self.reference.categories[name], self.current.categories[name])}
+        return scores
+
+    def evaluate(self):
+        """
+        Calcule les scores et émet les alertes.
+
+        Returns:
+            tuple: (scores, liste des alertes)
+        """
+        scores = self.drift_scores()
+        alerts = []
+        for name, score in scores.items():
+            if score['psi'] > self.psi_threshold:
+                alerts.append(f"Dérive détectée sur {name}: PSI={score['psi']:.3f} (seuil {self.psi_threshold})")
+            if score.get('ks', 0.0) > self.ks_threshold:
+                alerts.append(f"Dérive détectée sur {name}: KS={score['ks']:.3f} (seuil {self.ks_threshold})")
+        for alert in alerts:
+            self.logger.warning(alert)
+        return scores, alerts
+
+def save_reference(profile, reference_file=REFERENCE_FILE):
+    with open(reference_file, 'w', encoding='utf-8') as f:
+        json.dump(profile.to_dict(), f, ensure_ascii=False)
+    return reference_file
+
+def load_reference(reference_file=REFERENCE_FILE):
+    with open(reference_file, 'r', encoding='utf-8') as f:
+        return PropertyProfile.from_dict(json.load(f))
+
+if __name__ == "__main__":
+    import time
+    from utils import print_project_header, setup_logging
+
+    parser = argparse.ArgumentParser(description="Surveillance de la dérive des images")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    ref_parser = subparsers.add_parser('reference', help="Construire le profil de référence")
+    ref_parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                            help="Dossier du dataset, archive .zip ou URL s3://")
+    ref_parser.add_argument('--subsets', nargs='+', default=['train'])
+    check_parser = subparsers.add_parser('check', help="Comparer un dossier d'images à la référence")
+    check_parser.add_argument('directory', help="Dossier d'images, archive .zip ou URL s3://")
+    for sub in (ref_parser, check_parser):
+        sub.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print_project_header()
+    logger = setup_logging()
+    from zip_dataset import ZipPath, open_dataset, open_zip_dataset
+
+    start = time.perf_counter()
+    if args.command == 'reference':
+        files = list_dataset_images(open_dataset(args.dataset), args.subsets)
+        profile = build_profile(files, args.workers)
+        reference_file = save_reference(profile)
+        print(f"\n✅ Profil de référence: {profile.count:,} images -> {reference_file}")
+    else:
+        if args.directory.startswith('s3://'):
+            from s3_dataset import S3Path, open_s3_dataset
+            directory = S3Path(open_s3_dataset(args.directory), '')
+        elif args.directory.lower().endswith('.zip'):
+            directory = ZipPath(open_zip_dataset(args.directory), '')
+        else:
+            directory = Path(args.directory)
+        files = list_images_recursive(directory)
+        monitor = DriftMonitor(load_reference(), logger=logger)
+        monitor.observe(files, args.workers)
+        scores, alerts = monitor.evaluate()
+        print(f"\n📊 SCORES DE DÉRIVE ({monitor.current.count:,} images)")
+        for name, score in scores.items():
+            print(f"  {name}: " + ", ".join(f"{k.upper()}={v:.3f}" for k, v in score.items()))
+        print(f"\n{'🚨' if alerts else '✅'} {len(alerts)} alerte(s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"⚡ {len(files) / elapsed * 60:,.0f} images/minute")
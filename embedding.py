@@ -0,0 +1,156 @@
+# Carte 2-D du dataset par ACP incrémentale hors mémoire - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import json
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+from sklearn.decomposition import IncrementalPCA
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from data_loader import list_image_samples, iter_image_batches
+from utils import compute_file_fingerprint
+
+EMBEDDING_CACHE_DIR = CACHE_PATH / "embedding"
+
+def _load_index(cache_dir):
+    index_file = cache_dir / "embedding_index.json"
+    if not (index_file.exists() and (cache_dir / "embedding.npy").exists()):
+        return None
+    with open(index_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_embedding(cache_dir=EMBEDDING_CACHE_DIR):
+    """
+    Ouvre la projection en lecture seule (memmap).
+
+    Args:
+        cache_dir (Path): Dossier du cache
+
+    Returns:
+        tuple: (matrice memmap float32 (n, composantes), index) ou (None, None)
+    """
+    index = _load_index(Path(cache_dir))
+    if index is None:
+        return None, None
+    return np.load(Path(cache_dir) / "embedding.npy", mmap_mode='r'), index
+
+def compute_embedding(dataset_path=DATASET_PATH, cache_dir=EMBEDDING_CACHE_DIR, n_components=EMBEDDING_COMPONENTS,
+                      image_size=EMBEDDING_IMAGE_SIZE, batch_size=EMBEDDING_BATCH_SIZE, logger=None):
+    """
+    Projette toutes les images du dataset sur leurs composantes principales.
+
+    Deux passes en flux sur les images réduites à image_size: la première
+    ajuste une IncrementalPCA lot par lot (partial_fit), la seconde écrit la
+    projection de chaque lot dans un memmap float32. La mémoire dépend de
+    batch_size et de image_size, pas du nombre d'images: le cache d'images
+    décodées n'est pas utilisé (les deux passes lisent dans le même ordre,
+    un LRU plus petit que le dataset serait vidé avant toute réutilisation).
+
+    La base de l'ACP dépendant de toutes les images, toute modification du
+    dataset relance le calcul complet; sinon la projection existante est
+    rouverte. Les images illisibles ont une ligne de NaN.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        cache_dir (Path): Dossier du cache
+        n_components (int): Nombre de composantes conservées
+        image_size (tuple): Taille de réduction des images (largeur, hauteur)
+        batch_size (int): Images par lot (au moins n_components)
+        logger: Logger pour les messages
+
+    Returns:
+        tuple: (matrice memmap float32 (n, n_components), index)
+    """
+    logger = logger or logging.getLogger(__name__)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    if batch_size < n_components:
+        raise ValueError(f"batch_size ({batch_size}) doit être au moins égal à n_components ({n_components})")
+
+    samples = list_image_samples(dataset_path)
+    entries = []
+    for img_file, subset, label in samples:
+        size, mtime_ns = compute_file_fingerprint(img_file)
+        entries.append({
+            'path': img_file.relative_to(dataset_path).as_posix(),
+            'subset': subset,
+            'label': label,
+            'size': size,
+            'mtime_ns': mtime_ns
+        })
+
+    index = _load_index(cache_dir)
+    if (index is not None and index['entries'] == entries and index['n_components'] == n_components
+            and index['image_size'] == list(image_size)):
+        logger.info(f"Projection à jour ({len(entries)} images)")
+        return load_embedding(cache_dir)
+
+    # Passe 1: ajustement incrémental (un lot final trop petit pour partial_fit est ignoré)
+    ipca = IncrementalPCA(n_components=n_components)
+    n_fitted = 0
+    for X, _, _ in iter_image_batches(samples, batch_size, image_size, cache=False):
+        if len(X) < n_components:
+            continue
+        ipca.partial_fit(X.reshape(len(X), -1).astype(np.float32) / 255.0)
+        n_fitted += len(X)
+    if not n_fitted:
+        raise ValueError(f"Pas assez d'images lisibles pour {n_components} composantes")
+    logger.info(f"ACP incrémentale ajustée sur {n_fitted} images "
+                f"(variance expliquée: {ipca.explained_variance_ratio_.sum():.1%})")
+
+    # Passe 2: projection lot par lot dans le memmap
+    rows = {str(img_file): row for row, (img_file, _, _) in enumerate(samples)}
+    tmp_file = cache_dir / "embedding.npy.tmp"
+    matrix = np.lib.format.open_memmap(tmp_file, mode='w+', dtype=np.float32,
+                                       shape=(len(samples), n_components))
+    matrix[:] = np.nan
+    for X, _, files in iter_image_batches(samples, batch_size, image_size, cache=False):
+        projection = ipca.transform(X.reshape(len(X), -1).astype(np.float32) / 255.0)
+        matrix[[rows[str(img_file)] for img_file in files]] = projection
+
+    matrix.flush()
+    del matrix
+    os.replace(tmp_file, cache_dir / "embedding.npy")
+    with open(cache_dir / "embedding_index.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'image_size': list(image_size),
+            'n_components': n_components,
+            'explained_variance_ratio': ipca.explained_variance_ratio_.tolist(),
+            'entries': entries
+        }, f)
+
+    logger.info(f"Projection écrite: {cache_dir / 'embedding.npy'}")
+    return load_embedding(cache_dir)
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging, create_embedding_density_plot
+    from zip_dataset import open_dataset
+
+    parser = argparse.ArgumentParser(description="Carte 2-D du dataset par ACP incrémentale")
+    parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                        help="Dossier du dataset, archive .zip ou URL s3://")
+    parser.add_argument('--components', type=int, default=EMBEDDING_COMPONENTS)
+    parser.add_argument('--batch-size', type=int, default=EMBEDDING_BATCH_SIZE)
+    args = parser.parse_args()
+
+    print_project_header()
+    logger = setup_logging()
+
+    embedding, index = compute_embedding(open_dataset(args.dataset), n_components=args.components,
+                                         batch_size=args.batch_size, logger=logger)
+    plot_file = create_embedding_density_plot(embedding, index, OUTPUT_PATH)
+
+    ratios = index['explained_variance_ratio']
+    print(f"\n🗺️ CARTE ACP ({embedding.shape[0]:,} images, {embedding.shape[1]} composantes, "
+          f"{index['image_size'][0]}x{index['image_size'][1]} px)")
+    print(f"  Variance expliquée: PC1 {ratios[0]:.1%}, PC2 {ratios[1]:.1%}, total {sum(ratios):.1%}")
+    print(f"  Images illisibles: {int(np.isnan(embedding[:, 0]).sum()):,}")
+    print(f"  Carte de densité: {plot_file}")
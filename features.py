@@ -0,0 +1,279 @@
+# Descripteurs d'images vectorisés avec cache persistant - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import json
+import logging
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from data_loader import list_image_samples, load_image_array
+from utils import compute_file_fingerprint
+from logging_pipeline import configure_worker_logging, get_log_queue
+from monitoring import IMAGES_EXPECTED, IMAGE_ERRORS, progress_counter
+
+FEATURE_CACHE_DIR = CACHE_PATH / "features"
+
+# Zones pulmonaires approximatives (fractions de la hauteur / largeur de l'image)
+LUNG_ROWS = (0.20, 0.80)
+LEFT_LUNG_COLS = (0.10, 0.45)
+RIGHT_LUNG_COLS = (0.55, 0.90)
+
+FEATURE_NAMES = (
+    [f'hist_{i:02d}' for i in range(FEATURE_HISTOGRAM_BINS)]
+    + ['intensity_mean', 'intensity_std', 'gradient_energy']
+    + [f'orientation_{i}' for i in range(FEATURE_ORIENTATION_BINS)]
+    + ['lung_left_mean', 'lung_left_std', 'lung_right_mean', 'lung_right_std',
+       'lung_texture', 'lung_asymmetry', 'lung_contrast']
+)
+
+# Descripteurs scalaires utilisés pour le panneau de corrélation
+FEATURE_SUMMARY_COLUMNS = [
+    'intensity_mean', 'intensity_std', 'gradient_energy',
+    'lung_texture', 'lung_asymmetry', 'lung_contrast'
+]
+
+def _batched_histogram(indices, weights, n_bins):
+    """
+    Histogrammes par image d'un lot en un seul appel à np.bincount.
+    """
+    n = indices.shape[0]
+    offsets = (np.arange(n) * n_bins).reshape((n,) + (1,) * (indices.ndim - 1))
+    counts = np.bincount((indices + offsets).ravel(),
+                         weights=None if weights is None else weights.ravel(),
+                         minlength=n * n_bins)
+    return counts.reshape(n, n_bins)
+
+def compute_feature_batch(X):
+    """
+    Calcule les descripteurs d'un lot d'images en NumPy vectorisé.
+
+    Args:
+        X (np.ndarray): Lot uint8 de forme (n, hauteur, largeur)
+
+    Returns:
+        np.ndarray: Matrice float32 (n, len(FEATURE_NAMES))
+    """
+    n, h, w = X.shape
+    Xf = X.astype(np.float32)
+
+    # Histogramme d'intensité normalisé
+    bins = (X.astype(np.int64) * FEATURE_HISTOGRAM_BINS) >> 8
+    hist = _batched_histogram(bins, None, FEATURE_HISTOGRAM_BINS) / (h * w)
+
+    mean = Xf.mean(axis=(1, 2))
+    std = Xf.std(axis=(1, 2))
+
+    # Gradients et histogramme d'orientations pondéré par la magnitude (type HOG)
+    gy, gx = np.gradient(Xf, axis=(1, 2))
+    magnitude_sq = gx * gx + gy * gy
+    energy = magnitude_sq.mean(axis=(1, 2))
+    magnitude = np.sqrt(magnitude_sq)
+    angle = np.arctan2(gy, gx) % np.pi
+    orientation_bins = np.minimum((angle * (FEATURE_ORIENTATION_BINS / np.pi)).astype(np.int64),
+                                  FEATURE_ORIENTATION_BINS - 1)
+    orientation = _batched_histogram(orientation_bins, magnitude, FEATURE_ORIENTATION_BINS)
+    orientation /= np.maximum(orientation.sum(axis=1, keepdims=True), 1e-12)
+
+    # Statistiques de texture des champs pulmonaires
+    r0, r1 = int(LUNG_ROWS[0] * h), int(LUNG_ROWS[1] * h)
+    left = (slice(None), slice(r0, r1), slice(int(LEFT_LUNG_COLS[0] * w), int(LEFT_LUNG_COLS[1] * w)))
+    right = (slice(None), slice(r0, r1), slice(int(RIGHT_LUNG_COLS[0] * w), int(RIGHT_LUNG_COLS[1] * w)))
+    center = (slice(None), slice(r0, r1), slice(int(LEFT_LUNG_COLS[1] * w), int(RIGHT_LUNG_COLS[0] * w)))
+
+    left_mean, left_std = Xf[left].mean(axis=(1, 2)), Xf[left].std(axis=(1, 2))
+    right_mean, right_std = Xf[right].mean(axis=(1, 2)), Xf[right].std(axis=(1, 2))
+    texture = 0.5 * (magnitude[left].mean(axis=(1, 2)) + magnitude[right].mean(axis=(1, 2)))
+    asymmetry = np.abs(left_mean - right_mean)
+    contrast = Xf[center].mean(axis=(1, 2)) - 0.5 * (left_mean + right_mean)
+
+    return np.column_stack([
+        hist, mean, std, energy, orientation,
+        left_mean, left_std, right_mean, right_std, texture, asymmetry, contrast
+    ]).astype(np.float32)
+
+def _compute_chunk(files, image_size, decoder):
+    """
+    Décode et décrit un bloc de fichiers (exécuté dans un processus du pool).
+
+    Les images illisibles produisent une ligne de NaN. Les descripteurs ont
+    leur propre cache: les images décodées ne sont pas conservées.
+    """
+    width, height = image_size
+    X = np.zeros((len(files), height, width), dtype=np.uint8)
+    valid = np.ones(len(files), dtype=bool)
+    for i, img_file in enumerate(files):
+        try:
+            X[i] = load_image_array(img_file, image_size, decoder, cache=False)
+        except Exception as e:
+            logging.warning(f"Erreur lors du chargement de {img_file}: {e}")
+            valid[i] = False
+
+    features = compute_feature_batch(X)
+    features[~valid] = np.nan
+    return features
+
+def _load_index(cache_dir, decoder=LOADER_DECODER):
+    index_file = cache_dir / "features_index.json"
+    matrix_file = cache_dir / "features.npy"
+    if not (index_file.exists() and matrix_file.exists()):
+        return None
+    with open(index_file, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    # Les décodeurs réduits ne produisent pas exactement les mêmes pixels
+    if (index.get('feature_names') != FEATURE_NAMES or index.get('image_size') != list(FEATURE_IMAGE_SIZE)
+            or index.get('decoder') != decoder):
+        return None
+    return index
+
+def load_feature_cache(cache_dir=FEATURE_CACHE_DIR, decoder=LOADER_DECODER):
+    """
+    Ouvre le cache de descripteurs en lecture seule (memmap).
+
+    Args:
+        cache_dir (Path): Dossier du cache
+        decoder (str): Décodeur attendu (un cache d'un autre décodeur est ignoré)
+
+    Returns:
+        tuple: (matrice memmap float32, liste des entrées) ou (None, [])
+    """
+    index = _load_index(Path(cache_dir), decoder)
+    if index is None:
+        return None, []
+    matrix = np.load(Path(cache_dir) / "features.npy", mmap_mode='r')
+    return matrix, index['entries']
+
+def compute_features(dataset_path=DATASET_PATH, cache_dir=FEATURE_CACHE_DIR, workers=None,
+                     chunk_size=64, decoder=LOADER_DECODER, logger=None):
+    """
+    Calcule les descripteurs de toutes les images en réutilisant le cache.
+
+    Chaque ligne du cache est associée à l'empreinte (chemin relatif, taille,
+    date de modification) de son image; seules les images nouvelles ou
+    modifiées sont décodées, dans un pool de processus.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        cache_dir (Path): Dossier du cache
+        workers (int, optional): Nombre de processus (défaut: nombre de CPU)
+        chunk_size (int): Nombre d'images par tâche du pool
+        decoder (str): 'pil', 'pil_draft' ou 'cv2_reduced' (un changement invalide le cache)
+        logger: Logger pour les messages
+
+    Returns:
+        tuple: (matrice memmap float32, liste des entrées)
+    """
+    logger = logger or logging.getLogger(__name__)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    samples = list_image_samples(dataset_path)
+    entries = []
+    for img_file, subset, label in samples:
+        size, mtime_ns = compute_file_fingerprint(img_file)
+        entries.append({
+            'path': img_file.relative_to(dataset_path).as_posix(),
+            'subset': subset,
+            'label': label,
+            'size': size,
+            'mtime_ns': mtime_ns
+        })
+
+    index = _load_index(cache_dir, decoder)
+    old_entries = index['entries'] if index else []
+    old_rows = {(e['path'], e['size'], e['mtime_ns']): row for row, e in enumerate(old_entries)}
+
+    reused_new, reused_old, missing = [], [], []
+    for row, entry in enumerate(entries):
+        old_row = old_rows.get((entry['path'], entry['size'], entry['mtime_ns']))
+        if old_row is None:
+            missing.append(row)
+        else:
+            reused_new.append(row)
+            reused_old.append(old_row)
+
+    if not missing and reused_old == list(range(len(old_entries))) and len(entries) == len(old_entries):
+        logger.info(f"Cache de descripteurs à jour ({len(entries)} images)")
+        return load_feature_cache(cache_dir, decoder)
+
+    logger.info(f"Descripteurs: {len(reused_new)} réutilisés, {len(missing)} à calculer")
+
+    tmp_file = cache_dir / "features.npy.tmp"
+    matrix = np.lib.format.open_memmap(tmp_file, mode='w+', dtype=np.float32,
+                                       shape=(len(entries), len(FEATURE_NAMES)))
+    if reused_new:
+        old_matrix = np.load(cache_dir / "features.npy", mmap_mode='r')
+        matrix[reused_new] = old_matrix[reused_old]
+        del old_matrix
+
+    # Les compteurs des processus du pool ne remontent pas au registre:
+    # la progression est comptée ici, à la fin de chaque bloc
+    IMAGES_EXPECTED.labels('features').inc(len(missing))
+    progress = progress_counter('features')
+    errors = IMAGE_ERRORS.labels('features')
+
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=configure_worker_logging,
+                             initargs=(get_log_queue(),)) as executor:
+        futures = {
+            executor.submit(_compute_chunk, [samples[row][0] for row in chunk], FEATURE_IMAGE_SIZE, decoder): chunk
+            for chunk in chunks
+        }
+        for future in as_completed(futures):
+            chunk = futures[future]
+            features = future.result()
+            matrix[chunk] = features
+            progress.inc(len(chunk))
+            errors.inc(int(np.isnan(features).all(axis=1).sum()))
+
+    matrix.flush()
+    del matrix
+    os.replace(tmp_file, cache_dir / "features.npy")
+    with open(cache_dir / "features_index.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'feature_names': FEATURE_NAMES,
+            'image_size': list(FEATURE_IMAGE_SIZE),
+            'decoder': decoder,
+            'entries': entries
+        }, f)
+
+    logger.info(f"Cache de descripteurs mis à jour: {cache_dir}")
+    return load_feature_cache(cache_dir, decoder)
+
+def load_feature_frame(cache_dir=FEATURE_CACHE_DIR):
+    """
+    Charge le cache de descripteurs sous forme de DataFrame.
+
+    Args:
+        cache_dir (Path): Dossier du cache
+
+    Returns:
+        pd.DataFrame: Descripteurs avec les colonnes 'path', 'subset' et 'class'
+    """
+    matrix, entries = load_feature_cache(cache_dir)
+    if matrix is None:
+        return pd.DataFrame(columns=FEATURE_NAMES + ['path', 'subset', 'class'])
+
+    df = pd.DataFrame(np.asarray(matrix), columns=FEATURE_NAMES)
+    df['path'] = [e['path'] for e in entries]
+    df['subset'] = [e['subset'] for e in entries]
+    df['class'] = [CLASSES[e['label']] for e in entries]
+    return df
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+
+    print_project_header()
+    logger = setup_logging()
+
+    matrix, entries = compute_features(DATASET_PATH, logger=logger)
+    print(f"\n✅ Descripteurs disponibles: {matrix.shape[0]:,} images x {matrix.shape[1]} descripteurs")
+    print(f"📁 Cache: {FEATURE_CACHE_DIR}")
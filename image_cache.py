@@ -0,0 +1,222 @@
+# Cache LRU des images décodées - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import numpy as np
+from pathlib import Path
+from collections import OrderedDict
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from monitoring import REGISTRY
+
+CACHE_LOOKUPS = REGISTRY.counter('cxr_image_cache_lookups_total', "Consultations du cache d'images décodées",
+                                 ('result',))
+CACHE_BYTES = REGISTRY.gauge('cxr_image_cache_bytes', "Octets occupés par le cache d'images décodées")
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+class DecodedImageCache:
+    """
+    Cache LRU d'images décodées, borné en octets et non en nombre d'entrées.
+
+    La clé est (chemin, taille du fichier, date de modification, taille de
+    sortie, mode de décodage): une image modifiée sur disque n'est jamais
+    servie depuis le cache. Les tableaux servis sont en lecture seule, pour
+    qu'un appelant ne puisse pas altérer l'entrée partagée.
+
+    Le décodage a lieu hors du verrou: deux threads qui manquent la même
+    image au même moment la décodent chacun, le second résultat remplaçant
+    le premier. Avec disk_dir, chaque image décodée est aussi écrite en
+    .npy (second niveau, partagé entre processus et exécutions) et relue
+    avant tout nouveau décodage.
+
+    Args:
+        max_bytes (int): Budget mémoire du premier niveau
+        disk_dir (Path, optional): Dossier du second niveau (None: désactivé)
+    """
+
+    def __init__(self, max_bytes=IMAGE_CACHE_MAX_BYTES, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(img_file, image_size, mode):
+        from utils import compute_file_fingerprint
+        size, mtime_ns = compute_file_fingerprint(img_file)
+        return (str(img_file), size, mtime_ns, tuple(image_size), mode)
+
+    def _disk_file(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.disk_dir / digest[:2] / f"{digest[2:34]}.npy"
+
+    def get(self, key):
+        """
+        Retourne l'image en cache (mémoire puis disque) ou None.
+        """
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if image is not None:
+            CACHE_LOOKUPS.labels('hit').inc()
+            return image
+
+        if self.disk_dir is not None:
+            disk_file = self._disk_file(key)
+            try:
+                image = np.load(disk_file)
+            except (OSError, ValueError):
+                image = None
+            if image is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                CACHE_LOOKUPS.labels('disk_hit').inc()
+                return self._store(key, image)
+
+        with self._lock:
+            self.misses += 1
+        CACHE_LOOKUPS.labels('miss').inc()
+        return None
+
+    def put(self, key, image):
+        """
+        Ajoute une image décodée (et l'écrit sur disque si le second niveau est actif).
+
+        Returns:
+            np.ndarray: L'image en lecture seule, telle que conservée en cache
+        """
+        image = self._store(key, image)
+        if self.disk_dir is not None:
+            disk_file = self._disk_file(key)
+            try:
+                disk_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = disk_file.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+                with open(tmp_file, 'wb') as f:
+                    np.save(f, image)
+                os.replace(tmp_file, disk_file)
+            except OSError as e:
+                logging.warning(f"Cache disque des images indisponible ({disk_file}): {e}")
+        return image
+
+    def _store(self, key, image):
+        image = np.ascontiguousarray(image)
+        image.setflags(write=False)
+        if image.nbytes > self.max_bytes:
+            return image
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.nbytes
+            self._entries[key] = image
+            self.bytes += image.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+            CACHE_BYTES.set(self.bytes)
+        return image
+
+    def get_or_decode(self, img_file, image_size, mode, decode):
+        """
+        Retourne l'image décodée depuis le cache, ou la décode et la met en cache.
+
+        Args:
+            img_file (Path): Chemin vers l'image (Path, ZipPath ou S3Path)
+            image_size (tuple): Taille de sortie (largeur, hauteur)
+            mode (str): Mode de décodage (fait partie de la clé)
+            decode (callable): Fonction sans argument qui décode l'image
+
+        Returns:
+            np.ndarray: Image en lecture seule
+        """
+        key = self.make_key(img_file, image_size, mode)
+        image = self.get(key)
+        if image is None:
+            image = self.put(key, decode())
+        return image
+
+    def clear(self):
+        """
+        Vide le premier niveau (le second niveau sur disque est conservé).
+        """
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            CACHE_BYTES.set(0)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Entrées, octets, succès (mémoire, disque), échecs, évictions et taux de succès
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+def get_image_cache():
+    """
+    Cache partagé par tout le processus, configuré par IMAGE_CACHE_MAX_BYTES
+    et IMAGE_CACHE_DISK_DIR.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DecodedImageCache(IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_DISK_DIR)
+        return _default_cache
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+    from zip_dataset import open_dataset
+    from data_loader import list_image_samples, iter_image_batches
+
+    parser = argparse.ArgumentParser(description="Passes répétées sur le dataset avec le cache d'images décodées")
+    parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                        help="Dossier du dataset, archive .zip ou URL s3://")
+    parser.add_argument('--passes', type=int, default=3)
+    parser.add_argument('--images', type=int, default=None, help="Limiter le nombre d'images")
+    args = parser.parse_args()
+
+    print_project_header()
+    setup_logging()
+
+    samples = list_image_samples(open_dataset(args.dataset))[:args.images]
+    # Le cache utilisé par data_loader est celui du module importé, pas de __main__
+    from image_cache import get_image_cache as get_shared_cache
+    cache = get_shared_cache()
+    print(f"\n🗃️ CACHE D'IMAGES DÉCODÉES ({len(samples):,} images, budget {cache.max_bytes / 2**20:.0f} MB)")
+    for n in range(1, args.passes + 1):
+        start = time.perf_counter()
+        n_images = sum(len(y) for _, y, _ in iter_image_batches(samples, cache=True))
+        elapsed = time.perf_counter() - start
+        stats = cache.stats()
+        print(f"  Passe {n}: {n_images / elapsed:,.0f} images/s, {stats['entries']:,} entrées "
+              f"({stats['bytes'] / 2**20:.1f} MB), succès {stats['hit_rate']:.0%}, évictions {stats['evictions']:,}")
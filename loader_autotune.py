@@ -0,0 +1,167 @@
+# Réglage automatique du chargement des images par machine - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from data_loader import list_image_samples, iter_image_batches
+
+LOADER_BATCH_SIZES = [16, 32, 64, 128]
+LOADER_PREFETCH_DEPTHS = [0, 1, 2, 4]
+
+def candidate_workers(cpu_count=None):
+    """
+    Nombres de threads essayés: puissances de 2 jusqu'au nombre de CPU, plus ce nombre.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    workers = {cpu_count}
+    n = 1
+    while n < cpu_count:
+        workers.add(n)
+        n *= 2
+    return sorted(workers)
+
+def run_trial(samples, settings, image_size, repeats=2):
+    """
+    Mesure le débit de iter_image_batches pour un jeu de réglages.
+
+    Args:
+        samples (list): Échantillons (chemin, subset, label)
+        settings (dict): Valeurs de LOADER_PROFILE_KEYS
+        image_size (tuple): Taille de sortie (largeur, hauteur)
+        repeats (int): Nombre de passes (le meilleur débit est retenu)
+
+    Returns:
+        float: Débit en images/s
+    """
+    # Sans le cache d'images décodées: les essais mesurent le décodage
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        n_images = 0
+        for _, y, _ in iter_image_batches(samples, settings['BATCH_SIZE'], image_size,
+                                          workers=settings['LOADER_WORKERS'],
+                                          prefetch=settings['LOADER_PREFETCH'],
+                                          decoder=settings['LOADER_DECODER'], cache=False):
+            n_images += len(y)
+        best = max(best, n_images / (time.perf_counter() - start))
+    return best
+
+def autotune_loader(dataset_path=DATASET_PATH, n_images=256, image_size=IMAGE_SIZE, repeats=2,
+                    seed=RANDOM_SEED, logger=None):
+    """
+    Cherche les réglages de chargement les plus rapides sur cette machine.
+
+    La recherche est coordonnée: décodeur, puis nombre de threads, taille
+    de lot et profondeur de préchargement, chaque paramètre étant fixé à sa
+    meilleure valeur avant de passer au suivant. Les fichiers de
+    l'échantillon sont lus une fois avant les essais pour que ceux-ci
+    mesurent le décodage et non le premier accès disque.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset (dossier ou ZipPath)
+        n_images (int): Nombre d'images tirées pour les essais
+        image_size (tuple): Taille de sortie (largeur, hauteur)
+        repeats (int): Passes par essai
+        seed (int): Graine du tirage des images
+        logger: Logger pour les messages
+
+    Returns:
+        dict: Profil (réglages retenus, débit et liste des essais)
+    """
+    logger = logger or logging.getLogger(__name__)
+    samples = list_image_samples(dataset_path)
+    if not samples:
+        raise FileNotFoundError(f"Aucune image trouvée dans {dataset_path}")
+    samples = random.Random(seed).sample(samples, min(n_images, len(samples)))
+    for img_file, _, _ in samples:
+        img_file.read_bytes()
+
+    settings = {'BATCH_SIZE': BATCH_SIZE, 'LOADER_WORKERS': 1, 'LOADER_PREFETCH': 0,
+                'LOADER_DECODER': 'pil_draft'}
+    search_space = [
+        ('LOADER_DECODER', LOADER_DECODERS),
+        ('LOADER_WORKERS', candidate_workers()),
+        ('BATCH_SIZE', LOADER_BATCH_SIZES),
+        ('LOADER_PREFETCH', LOADER_PREFETCH_DEPTHS),
+    ]
+
+    trials = []
+    measured = {}
+    for key, values in search_space:
+        best_value, best_rate = settings[key], -1.0
+        for value in values:
+            candidate = {**settings, key: value}
+            signature = json.dumps(candidate, sort_keys=True)
+            if signature not in measured:
+                measured[signature] = run_trial(samples, candidate, image_size, repeats)
+                trials.append({**candidate, 'images_per_sec': measured[signature]})
+                logger.info(f"Essai {candidate}: {measured[signature]:.1f} images/s")
+            if measured[signature] > best_rate:
+                best_value, best_rate = value, measured[signature]
+        settings[key] = best_value
+
+    return {
+        'host': socket.gethostname(),
+        'cpu_count': os.cpu_count(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'image_size': list(image_size),
+        'n_images': len(samples),
+        'settings': settings,
+        'images_per_sec': measured[json.dumps(settings, sort_keys=True)],
+        'trials': trials
+    }
+
+def save_loader_profile(profile, profile_file=LOADER_PROFILE_FILE):
+    """
+    Écrit le profil; config.py l'applique à chaque import sur cette machine.
+    """
+    profile_file = Path(profile_file)
+    profile_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(profile_file, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    return profile_file
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+    from zip_dataset import open_dataset
+
+    parser = argparse.ArgumentParser(description="Réglage automatique du chargement des images")
+    parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                        help="Dossier du dataset, archive .zip ou URL s3://")
+    parser.add_argument('--images', type=int, default=256, help="Nombre d'images par essai")
+    parser.add_argument('--image-size', type=int, nargs=2, default=list(IMAGE_SIZE), metavar=('W', 'H'))
+    parser.add_argument('--repeats', type=int, default=2)
+    parser.add_argument('--dry-run', action='store_true', help="Afficher sans écrire le profil")
+    args = parser.parse_args()
+
+    print_project_header()
+    logger = setup_logging()
+
+    profile = autotune_loader(open_dataset(args.dataset), args.images, tuple(args.image_size),
+                              args.repeats, logger=logger)
+
+    print(f"\n⏱️ ESSAIS ({profile['n_images']} images, {args.image_size[0]}x{args.image_size[1]}, "
+          f"{profile['cpu_count']} CPU)")
+    print(f"  {'décodeur':<12} {'threads':>7} {'lot':>5} {'préch.':>6} {'images/s':>10}")
+    for trial in profile['trials']:
+        print(f"  {trial['LOADER_DECODER']:<12} {trial['LOADER_WORKERS']:>7} {trial['BATCH_SIZE']:>5} "
+              f"{trial['LOADER_PREFETCH']:>6} {trial['images_per_sec']:>10.1f}")
+    print(f"\n✅ Meilleurs réglages: {profile['settings']} ({profile['images_per_sec']:.1f} images/s)")
+
+    if not args.dry_run:
+        profile_file = save_loader_profile(profile)
+        print(f"💾 Profil de {profile['host']}: {profile_file} (prioritaire sur config.py)")
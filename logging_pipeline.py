@@ -0,0 +1,198 @@
+# Journalisation asynchrone multi-processus - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+
+import re
+import json
+import time
+import atexit
+import logging
+import threading
+import multiprocessing
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import *
+
+_log_queue = None
+_listener = None
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formate chaque enregistrement en une ligne JSON.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.processName,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        return json.dumps(entry, ensure_ascii=False)
+
+# Parties variables d'un message (chemins, nombres) ignorées pour regrouper les répétitions
+_VARIABLE_PARTS = re.compile(r"\S*[/\\]\S*|\d+(?:\.\d+)?")
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limite les avertissements répétés (ex.: un avertissement par image illisible).
+
+    Seuls les enregistrements WARNING sont limités; les autres niveaux
+    (progression INFO, erreurs) passent toujours. Une source est le couple
+    (fichier, modèle du message): le modèle %-style s'il y a des arguments,
+    sinon le message dont les chemins et les nombres sont masqués. Des
+    alertes distinctes émises par la même ligne restent donc distinctes.
+
+    Au plus `limit` avertissements sont émis par source et par fenêtre de
+    `window` secondes. À l'expiration de la fenêtre, un enregistrement
+    « N message(s) supprimé(s) » est émis pour chaque source limitée, puis
+    ses compteurs sont remis à zéro (et à l'arrêt du pipeline, via flush).
+
+    Args:
+        limit (int): Avertissements max. par source et par fenêtre
+        window (float): Durée de la fenêtre (secondes)
+        emit (callable, optional): Reçoit les enregistrements de résumé
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, window=LOG_RATE_WINDOW, emit=None):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.emit = emit
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def source_key(record):
+        template = str(record.msg) if record.args else _VARIABLE_PARTS.sub('…', record.getMessage())
+        return (record.pathname, template)
+
+    def _summary(self, key, suppressed):
+        record = logging.LogRecord('logging_pipeline', logging.WARNING, key[0], 0,
+                                   f"{suppressed} message(s) supprimé(s) en {self.window:g} s: {key[1]}",
+                                   None, None)
+        record.suppressed = suppressed
+        return record
+
+    def _roll(self, now, force=False):
+        # Retire les fenêtres expirées et retourne les résumés à émettre
+        summaries = []
+        with self._lock:
+            for key, (start, _, suppressed) in list(self._sources.items()):
+                if force or now - start >= self.window:
+                    del self._sources[key]
+                    if suppressed:
+                        summaries.append(self._summary(key, suppressed))
+        return summaries
+
+    def _emit_summaries(self, summaries):
+        if self.emit is not None:
+            for summary in summaries:
+                self.emit(summary)
+
+    def flush(self):
+        """
+        Émet les résumés en attente, quelle que soit l'ancienneté de leur fenêtre.
+        """
+        self._emit_summaries(self._roll(time.monotonic(), force=True))
+
+    def filter(self, record):
+        now = time.monotonic()
+        self._emit_summaries(self._roll(now))
+        if record.levelno != logging.WARNING:
+            return True
+
+        key = self.source_key(record)
+        with self._lock:
+            start, count, suppressed = self._sources.get(key, (now, 0, 0))
+            if count < self.limit:
+                self._sources[key] = (start, count + 1, suppressed)
+                return True
+            self._sources[key] = (start, count, suppressed + 1)
+            return False
+
+def _rate_limited_queue_handler(queue):
+    # Filtre posé sur le handler (et non sur le logger racine) pour couvrir
+    # aussi les enregistrements propagés par les loggers enfants
+    handler = QueueHandler(queue)
+    # Les résumés contournent le filtre (emit et non handle)
+    handler.addFilter(RateLimitFilter(emit=handler.emit))
+    return handler
+
+def get_log_queue():
+    """
+    Retourne la file partagée par les processus, ou None si le pipeline n'est pas démarré.
+    """
+    return _log_queue
+
+def configure_worker_logging(queue):
+    """
+    Initialise la journalisation d'un processus du pool: les enregistrements
+    sont envoyés dans la file et écrits par l'unique listener du processus
+    principal. Sans file (pipeline non démarré), ne fait rien.
+
+    Args:
+        queue: File retournée par get_log_queue()
+    """
+    if queue is None:
+        return
+    root = logging.getLogger()
+    root.handlers = [_rate_limited_queue_handler(queue)]
+    root.setLevel(getattr(logging, LOG_LEVEL))
+
+def stop_logging():
+    """
+    Vide la file et arrête le listener.
+    """
+    global _listener, _log_queue
+    if _listener is not None:
+        for handler in logging.getLogger().handlers:
+            for log_filter in handler.filters:
+                if isinstance(log_filter, RateLimitFilter):
+                    log_filter.flush()
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _log_queue = None
+
+def start_logging(log_file):
+    """
+    Démarre le pipeline: QueueHandler sur le logger racine, et un
+    QueueListener qui écrit les lignes JSON (avec rotation par taille) et
+    la sortie console dans un thread dédié.
+
+    Args:
+        log_file (Path): Fichier de log JSON-lines
+
+    Returns:
+        QueueListener: Listener démarré
+    """
+    global _listener, _log_queue
+    stop_logging()
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES,
+                                       backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    file_handler.setFormatter(JsonLinesFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _log_queue = multiprocessing.Queue(-1)
+    _listener = QueueListener(_log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_rate_limited_queue_handler(_log_queue))
+    root.setLevel(getattr(logging, LOG_LEVEL))
+    return _listener
+
+atexit.register(stop_logging)
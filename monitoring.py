@@ -0,0 +1,399 @@
+# Métriques de progression et de débit (format Prometheus) - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import sys
+import time
+import bisect
+import logging
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{str(value)}"' for name, value in pairs) + '}'
+
+class _Metric:
+    """
+    Base commune: une série par combinaison de valeurs d'étiquettes.
+
+    labels(...) retourne une série liée, à conserver hors des boucles
+    chaudes: chaque mise à jour se réduit alors à un verrou et une addition.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: étiquettes attendues {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            if key not in self._series:
+                self._series[key] = self._new_series()
+            return self._series[key]
+
+    def series(self):
+        with self._lock:
+            return dict(self._series)
+
+    def _new_series(self):
+        raise NotImplementedError
+
+class _Value:
+    """
+    Valeur d'une série de compteur ou de jauge.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+class _SingleWriterValue(_Value):
+    """
+    Série écrite par un seul thread: l'incrément se passe de verrou
+    (environ 4 fois moins coûteux), la lecture depuis un autre thread
+    voit toujours une valeur complète.
+    """
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class Counter(_Metric):
+    """
+    Compteur monotone (images traitées, erreurs, octets lus...).
+
+    Avec single_writer, chaque série ne doit être incrémentée que par un
+    thread (par exemple grâce à une étiquette 'worker' égale au nom du
+    thread); c'est le cas des compteurs de progression des boucles chaudes.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), single_writer=False):
+        super().__init__(name, documentation, labelnames)
+        self.single_writer = single_writer
+
+    def _new_series(self):
+        return _SingleWriterValue() if self.single_writer else _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+class Gauge(_Metric):
+    """
+    Valeur instantanée (images attendues, tâches en cours...).
+    """
+
+    kind = 'gauge'
+
+    def _new_series(self):
+        return _Value()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+class _HistogramValue:
+    """
+    Comptes par classe (non cumulés), somme et nombre d'observations.
+    """
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+class Histogram(_Metric):
+    """
+    Distribution de durées (décodage d'un lot, étape du pipeline...).
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+class MetricsRegistry:
+    """
+    Registre en mémoire des métriques du processus.
+
+    Les métriques sont créées à la première demande et retrouvées par nom
+    ensuite, si bien que chaque module peut les déclarer à l'import.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà déclarée comme {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=(), single_writer=False):
+        return self._get_or_create(Counter, name, documentation, labelnames, single_writer=single_writer)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """
+        Exporte toutes les métriques au format texte Prometheus (version 0.0.4).
+        """
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, series in sorted(metric.series().items()):
+                if metric.kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(list(metric.buckets) + ['+Inf'], series.counts):
+                        cumulative += count
+                        labels = _format_labels(metric.labelnames, key, [('le', bound)])
+                        lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(metric.labelnames, key)
+                    lines.append(f"{metric.name}_sum{labels} {series.sum}")
+                    lines.append(f"{metric.name}_count{labels} {series.count}")
+                else:
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, key)} {series.value}")
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+# Métriques partagées par les étapes d'analyse, de décodage et de rapport
+IMAGES_PROCESSED = REGISTRY.counter('cxr_images_processed_total', "Images traitées", ('stage', 'worker'),
+                                    single_writer=True)
+IMAGES_EXPECTED = REGISTRY.gauge('cxr_images_expected', "Images prévues par étape", ('stage',))
+IMAGE_ERRORS = REGISTRY.counter('cxr_image_errors_total', "Images illisibles", ('stage',))
+BATCH_SECONDS = REGISTRY.histogram('cxr_batch_seconds', "Durée de décodage d'un lot", ('stage',))
+STAGE_SECONDS = REGISTRY.histogram('cxr_pipeline_stage_seconds', "Durée des étapes du pipeline", ('stage',),
+                                   buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0))
+STAGES_COMPLETED = REGISTRY.counter('cxr_pipeline_stages_total', "Étapes terminées", ('status',))
+STAGES_EXPECTED = REGISTRY.gauge('cxr_pipeline_stages', "Étapes du pipeline en cours")
+
+def progress_counter(stage):
+    """
+    Série de IMAGES_PROCESSED pour l'étape et le thread courant.
+
+    À obtenir une fois avant la boucle et à n'incrémenter que depuis ce thread.
+    """
+    return IMAGES_PROCESSED.labels(stage, threading.current_thread().name)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=METRICS_HTTP_PORT, host=METRICS_HTTP_HOST, registry=REGISTRY):
+    """
+    Expose le registre sur http://host:port/metrics dans un thread démon.
+
+    Returns:
+        ThreadingHTTPServer | None: Serveur (None si le port est indisponible)
+    """
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        logging.warning(f"Point de terminaison des métriques indisponible sur {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logging.info(f"Métriques Prometheus: http://{host}:{server.server_port}/metrics")
+    return server
+
+class ProgressReporter:
+    """
+    Affiche périodiquement une ligne de progression: pour chaque étape
+    active, images traitées / prévues, débit sur l'intervalle et temps
+    restant estimé, puis les étapes du pipeline terminées.
+    """
+
+    def __init__(self, interval=METRICS_PROGRESS_INTERVAL, stream=None, registry=REGISTRY):
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous = {}
+        self._previous_time = time.perf_counter()
+
+    def snapshot(self):
+        processed = {}
+        for (stage, _), series in self.registry.get('cxr_images_processed_total').series().items():
+            processed[stage] = processed.get(stage, 0) + series.value
+        expected = {key[0]: series.value for key, series in
+                    self.registry.get('cxr_images_expected').series().items()}
+        return processed, expected
+
+    def format_line(self):
+        now = time.perf_counter()
+        elapsed = max(now - self._previous_time, 1e-9)
+        processed, expected = self.snapshot()
+        parts = []
+        for stage, done in processed.items():
+            rate = (done - self._previous.get(stage, 0)) / elapsed
+            total = expected.get(stage, 0)
+            if not rate and done >= total:
+                continue  # Étape terminée ou inactive
+            if total:
+                eta = f", reste {(total - done) / rate:.0f} s" if rate > 0 and done < total else ''
+                parts.append(f"{stage}: {done:,.0f}/{total:,.0f} ({rate:,.1f}/s{eta})")
+            else:
+                parts.append(f"{stage}: {done:,.0f} ({rate:,.1f}/s)")
+        stages_total = sum(series.value for series in self.registry.get('cxr_pipeline_stages').series().values())
+        if stages_total:
+            stages_done = sum(series.value for series in
+                              self.registry.get('cxr_pipeline_stages_total').series().values())
+            parts.append(f"étapes: {stages_done:.0f}/{stages_total:.0f}")
+        self._previous, self._previous_time = processed, now
+        return ' | '.join(parts)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            line = self.format_line()
+            if line:
+                print(f"⏳ {line}", file=self.stream, flush=True)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='progress', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+def measure_overhead(dataset_path, sample_size=100, repeats=1_000_000):
+    """
+    Mesure le coût de l'instrumentation par rapport au débit de l'analyse.
+
+    Le coût unitaire des mises à jour est mesuré directement (l'écart
+    attendu, bien inférieur à 1%, se perdrait dans le bruit de deux
+    analyses chronométrées), puis rapporté au temps par image de
+    analyze_image_properties. Chaque image coûte un incrément de
+    progression; l'histogramme n'est alimenté qu'une fois par lot.
+
+    Returns:
+        dict: Temps par image, coût des métriques par image et fraction du temps
+    """
+    from utils import analyze_image_properties
+
+    # Registre à part pour ne pas fausser les métriques exposées
+    probe = MetricsRegistry()
+    series = probe.counter('probe_total', "Sonde", ('stage', 'worker'), single_writer=True).labels('probe', 'main')
+    start = time.perf_counter()
+    for _ in range(repeats):
+        series.inc()
+    counter_cost = (time.perf_counter() - start) / repeats
+
+    histogram = probe.histogram('probe_seconds', "Sonde", ('stage',)).labels('probe')
+    start = time.perf_counter()
+    for _ in range(repeats):
+        histogram.observe(0.003)
+    histogram_cost = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    properties = analyze_image_properties(dataset_path, sample_size)
+    image_seconds = (time.perf_counter() - start) / max(len(properties['dimensions']), 1)
+
+    per_image = counter_cost + histogram_cost / BASELINE_BATCH_SIZE
+    return {
+        'image_seconds': image_seconds,
+        'counter_seconds': counter_cost,
+        'histogram_seconds': histogram_cost,
+        'overhead_fraction': per_image / image_seconds
+    }
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+    from zip_dataset import open_dataset
+
+    parser = argparse.ArgumentParser(description="Coût de l'instrumentation des métriques")
+    parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                        help="Dossier du dataset, archive .zip ou URL s3://")
+    parser.add_argument('--sample-size', type=int, default=100)
+    args = parser.parse_args()
+
+    print_project_header()
+    setup_logging()
+
+    result = measure_overhead(open_dataset(args.dataset), args.sample_size)
+    print(f"\n📏 COÛT DES MÉTRIQUES")
+    print(f"  Analyse: {result['image_seconds'] * 1e3:.3f} ms/image")
+    print(f"  Compteur: {result['counter_seconds'] * 1e9:.0f} ns, histogramme: {result['histogram_seconds'] * 1e9:.0f} ns")
+    print(f"  Surcoût: {result['overhead_fraction']:.4%} du temps d'analyse (objectif < 1%)")
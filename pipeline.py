@@ -0,0 +1,227 @@
+# Exécuteur d'étapes avec dépendances et cache - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import json
+import pickle
+import time
+import types
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import *
+from monitoring import STAGE_SECONDS, STAGES_COMPLETED, STAGES_EXPECTED
+
+PIPELINE_CACHE_DIR = CACHE_PATH / "pipeline"
+
+def _is_project_code(code):
+    return Path(code.co_filename).resolve().is_relative_to(PROJECT_ROOT.resolve())
+
+def code_fingerprint(func):
+    """
+    Empreinte du code d'une fonction et du code du projet qu'elle appelle.
+
+    Couvre le bytecode, les constantes et les noms de la fonction, de ses
+    fonctions imbriquées, et, récursivement, des fonctions et classes du
+    projet qu'elle référence (globales ou variables de fermeture). Les
+    bibliothèques externes ne sont pas parcourues.
+
+    Args:
+        func (callable): Fonction (ou functools.partial)
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    seen = set()
+
+    def visit_code(code, scope):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                visit_code(const, scope)
+            elif isinstance(const, frozenset):  # Ordre dépendant de PYTHONHASHSEED
+                digest.update(repr(sorted(const, key=repr)).encode())
+            else:
+                digest.update(repr(const).encode())
+        for name in code.co_names:
+            visit(scope.get(name))
+
+    def visit(obj):
+        if isinstance(obj, types.MethodType):
+            obj = obj.__func__
+        if id(obj) in seen:
+            return
+        if isinstance(obj, types.FunctionType) and _is_project_code(obj.__code__):
+            seen.add(id(obj))
+            visit_code(obj.__code__, obj.__globals__)
+            for cell in obj.__closure__ or ():
+                try:
+                    visit(cell.cell_contents)
+                except ValueError:  # Cellule vide
+                    pass
+        elif isinstance(obj, type):
+            seen.add(id(obj))
+            for member in vars(obj).values():
+                visit(getattr(member, '__func__', member))
+
+    while hasattr(func, 'func'):  # functools.partial
+        func = func.func
+    visit(func)
+    return digest.hexdigest()
+
+class Stage:
+    """
+    Étape du pipeline d'analyse.
+
+    La fonction reçoit les résultats des étapes listées dans `inputs` et les
+    `params` comme arguments nommés. Le résultat est mis en cache sous une
+    empreinte de (nom, version, code, params, empreintes des entrées): une
+    modification de la fonction ou du code du projet qu'elle appelle
+    invalide le cache (voir code_fingerprint). `version` permet de
+    l'invalider pour un changement que le code ne reflète pas (ex.: une
+    bibliothèque externe). Une étape non mise en cache (cache=False) est
+    toujours exécutée et son empreinte est celle de son résultat.
+
+    Args:
+        name (str): Nom unique de l'étape
+        func (callable): Fonction à exécuter
+        inputs (list): Noms des étapes dont les résultats sont requis
+        params (dict): Valeurs de configuration (sérialisables en JSON)
+        outputs (list): Fichiers produits (l'étape est rejouée s'ils manquent)
+        cache (bool): Mettre le résultat en cache
+        main_thread (bool): Exécuter dans le thread principal (ex.: matplotlib)
+        version (str, optional): Version de l'étape, à changer pour invalider son cache
+    """
+
+    def __init__(self, name, func, inputs=(), params=None, outputs=(), cache=True, main_thread=False,
+                 version=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.outputs = [Path(p) for p in outputs]
+        self.cache = cache
+        self.main_thread = main_thread
+        self.version = version
+
+class PipelineExecutor:
+    """
+    Exécute un DAG d'étapes: les étapes dont l'empreinte est déjà en cache
+    sont sautées, les étapes indépendantes s'exécutent en parallèle.
+    """
+
+    def __init__(self, stages, cache_dir=PIPELINE_CACHE_DIR, max_workers=None, logger=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.logger = logger or logging.getLogger(__name__)
+        self.results = {}
+        self.keys = {}
+        self.status = {}
+
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"Étape '{stage.name}': entrées inconnues {missing}")
+
+    def _stage_key(self, stage):
+        payload = json.dumps({
+            'stage': stage.name,
+            'version': PROJECT_INFO['version'],
+            'stage_version': stage.version,
+            'code': code_fingerprint(stage.func),
+            'params': stage.params,
+            'inputs': {name: self.keys[name] for name in stage.inputs}
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_file(self, stage, key):
+        return self.cache_dir / f"{stage.name}-{key[:32]}.pkl"
+
+    def _prepare(self, stage):
+        """
+        Retourne True si l'étape doit être exécutée; sinon charge son résultat du cache.
+        """
+        if not stage.cache:
+            return True
+        key = self._stage_key(stage)
+        self.keys[stage.name] = key
+        cache_file = self._cache_file(stage, key)
+        if cache_file.exists() and all(p.exists() for p in stage.outputs):
+            with open(cache_file, 'rb') as f:
+                self.results[stage.name] = pickle.load(f)
+            self.status[stage.name] = 'cached'
+            STAGES_COMPLETED.labels('cached').inc()
+            return False
+        return True
+
+    def _execute(self, stage):
+        kwargs = {name: self.results[name] for name in stage.inputs}
+        kwargs.update(stage.params)
+        start = time.perf_counter()
+        result = stage.func(**kwargs)
+        STAGE_SECONDS.labels(stage.name).observe(time.perf_counter() - start)
+        return result
+
+    def _complete(self, stage, result):
+        self.results[stage.name] = result
+        self.status[stage.name] = 'executed'
+        STAGES_COMPLETED.labels('executed').inc()
+        if stage.cache:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self._cache_file(stage, self.keys[stage.name])
+            tmp_file = cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(result, f)
+            os.replace(tmp_file, cache_file)
+        else:
+            self.keys[stage.name] = hashlib.sha256(pickle.dumps(result)).hexdigest()
+
+    def run(self):
+        """
+        Exécute le pipeline.
+
+        Returns:
+            dict: Résultats par nom d'étape (self.status indique 'cached' ou 'executed')
+        """
+        pending = dict(self.stages)
+        running = {}
+        STAGES_EXPECTED.inc(len(pending))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = [stage for stage in pending.values()
+                         if all(name in self.results for name in stage.inputs)]
+                if not ready and not running:
+                    raise ValueError(f"Dépendances cycliques entre les étapes: {sorted(pending)}")
+
+                progressed = False
+                main_thread_stages = []
+                for stage in ready:
+                    del pending[stage.name]
+                    if not self._prepare(stage):
+                        progressed = True
+                    elif stage.main_thread:
+                        main_thread_stages.append(stage)
+                    else:
+                        running[executor.submit(self._execute, stage)] = stage
+
+                # Les étapes du thread principal s'exécutent pendant que le pool travaille
+                for stage in main_thread_stages:
+                    self._complete(stage, self._execute(stage))
+                    progressed = True
+
+                if running and not progressed:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._complete(running.pop(future), future.result())
+
+        executed = [name for name, status in self.status.items() if status == 'executed']
+        self.logger.info(f"Pipeline: {len(executed)} étape(s) exécutée(s), "
+                         f"{len(self.status) - len(executed)} depuis le cache")
+        return self.results
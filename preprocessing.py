@@ -0,0 +1,306 @@
+# Prétraitement fusionné des radiographies (redimensionnement + CLAHE + normalisation)
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import tracemalloc
+import cv2
+import numpy as np
+from pathlib import Path
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from data_loader import list_image_samples
+from utils import compute_file_fingerprint
+
+PREPROCESS_CACHE_DIR = CACHE_PATH / "preprocessed"
+
+# Facteurs de réduction supportés nativement par le décodeur JPEG d'OpenCV
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    (1, cv2.IMREAD_GRAYSCALE),
+]
+
+def decode_grayscale(img_file, image_size=IMAGE_SIZE):
+    """
+    Décode une image en niveaux de gris à la plus petite échelle JPEG
+    (1, 1/2, 1/4, 1/8) qui reste au moins aussi grande que la cible.
+
+    Args:
+        img_file (Path): Chemin vers l'image
+        image_size (tuple): Taille cible (largeur, hauteur)
+
+    Returns:
+        np.ndarray: Image uint8 (hauteur, largeur)
+    """
+    data = np.frombuffer(img_file.read_bytes(), dtype=np.uint8)
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+    ratio = min(width / image_size[0], height / image_size[1])
+    flag = next(flag for factor, flag in REDUCED_DECODE_FLAGS if factor <= ratio or factor == 1)
+
+    # imdecode sur les octets lus gère les chemins non ASCII (cv2.imread ne le fait pas
+    # sous Windows) et les membres d'une archive ZIP (zip_dataset.ZipPath)
+    image = cv2.imdecode(data, flag)
+    if image is None:
+        raise ValueError(f"Image illisible: {img_file}")
+    return image
+
+class FusedPreprocessor:
+    """
+    Applique redimensionnement, égalisation CLAHE et normalisation en une
+    passe par étape sur des tampons uint8 préalloués.
+
+    La normalisation opère sur une image uint8: elle se réduit à une table de
+    256 valeurs float32 appliquée directement dans le tableau de sortie, sans
+    copie flottante intermédiaire. Une instance n'est pas thread-safe
+    (tampons et objet CLAHE partagés).
+    """
+
+    def __init__(self, image_size=IMAGE_SIZE, clip_limit=CLAHE_CLIP_LIMIT, tile_grid=CLAHE_TILE_GRID,
+                 normalization=NORMALIZATION):
+        if normalization not in ('zscore', 'scale'):
+            raise ValueError(f"Normalisation inconnue: {normalization}")
+        self.image_size = tuple(image_size)
+        self.normalization = normalization
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tuple(tile_grid))
+        width, height = self.image_size
+        self._resized = np.empty((height, width), dtype=np.uint8)
+        self._equalized = np.empty((height, width), dtype=np.uint8)
+        self._levels = np.arange(256, dtype=np.float32)
+        self._lut = np.empty(256, dtype=np.float32)
+
+    def __call__(self, img_file, out=None):
+        """
+        Prétraite une image.
+
+        Args:
+            img_file (Path): Chemin vers l'image
+            out (np.ndarray, optional): Tableau float32 (hauteur, largeur) à remplir
+
+        Returns:
+            np.ndarray: Image prétraitée float32
+        """
+        return self.transform(decode_grayscale(img_file, self.image_size), out)
+
+    def transform(self, image, out=None):
+        """
+        Prétraite une image déjà décodée (uint8, niveaux de gris, toute taille).
+
+        Args:
+            image (np.ndarray): Image uint8 (hauteur, largeur)
+            out (np.ndarray, optional): Tableau float32 (hauteur, largeur) à remplir
+
+        Returns:
+            np.ndarray: Image prétraitée float32
+        """
+        width, height = self.image_size
+        if out is None:
+            out = np.empty((height, width), dtype=np.float32)
+
+        cv2.resize(image, self.image_size, dst=self._resized, interpolation=cv2.INTER_AREA)
+        self.clahe.apply(self._resized, dst=self._equalized)
+
+        if self.normalization == 'zscore':
+            mean, std = cv2.meanStdDev(self._equalized)
+            np.subtract(self._levels, mean[0, 0], out=self._lut)
+            self._lut *= 1.0 / max(std[0, 0], 1e-6)
+        else:
+            np.multiply(self._levels, 1.0 / 255.0, out=self._lut)
+        np.take(self._lut, self._equalized, out=out)
+        return out
+
+def decode_full(img_file):
+    """
+    Décode une image en niveaux de gris à pleine résolution (PIL).
+    """
+    with img_file.open('rb') as f, Image.open(f) as img:
+        return np.asarray(img.convert('L'))
+
+def preprocess_naive(img_file, image_size=IMAGE_SIZE, clip_limit=CLAHE_CLIP_LIMIT, tile_grid=CLAHE_TILE_GRID,
+                     normalization=NORMALIZATION):
+    """
+    Version enchaînée de référence (décodage complet, une copie par étape).
+    """
+    return preprocess_naive_array(decode_full(img_file), image_size, clip_limit, tile_grid, normalization)
+
+def preprocess_naive_array(image, image_size=IMAGE_SIZE, clip_limit=CLAHE_CLIP_LIMIT, tile_grid=CLAHE_TILE_GRID,
+                           normalization=NORMALIZATION):
+    """
+    Étapes enchaînées de preprocess_naive sur une image déjà décodée.
+    """
+    image = image.astype(np.float32)
+    image = cv2.resize(image, tuple(image_size), interpolation=cv2.INTER_AREA)
+    image = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tuple(tile_grid)).apply(
+        np.clip(image, 0, 255).astype(np.uint8)).astype(np.float32)
+    if normalization == 'zscore':
+        return (image - image.mean()) / max(image.std(), 1e-6)
+    return image / 255.0
+
+def _cache_key(entries, image_size, normalization):
+    digest = hashlib.sha256(json.dumps({
+        'entries': entries,
+        'image_size': list(image_size),
+        'clahe': [CLAHE_CLIP_LIMIT, list(CLAHE_TILE_GRID)],
+        'normalization': normalization
+    }).encode())
+    return digest.hexdigest()[:32]
+
+def preprocess_dataset(samples, image_size=IMAGE_SIZE, normalization=NORMALIZATION, workers=None,
+                       batch_size=BATCH_SIZE, cache_dir=PREPROCESS_CACHE_DIR, logger=None):
+    """
+    Prétraite une liste d'échantillons par lots dans un pool de threads
+    (OpenCV libère le GIL) et écrit le résultat dans un tableau float32.
+
+    Avec cache_dir, le tableau est un memmap .npy nommé d'après l'empreinte
+    des fichiers (chemin, taille, date) et des paramètres: une seconde
+    exécution identique le relit sans rien décoder.
+
+    Args:
+        samples (list): Tuples (chemin, subset, label) de list_image_samples
+        image_size (tuple): Taille de sortie (largeur, hauteur)
+        normalization (str): 'zscore' ou 'scale'
+        workers (int, optional): Nombre de threads (défaut: nombre de CPU)
+        batch_size (int): Nombre d'images par tâche
+        cache_dir (Path, optional): Dossier du cache (None: tableau en mémoire)
+        logger: Logger pour les messages
+
+    Returns:
+        np.ndarray: Tableau (n, hauteur, largeur) float32 (NaN pour les images illisibles)
+    """
+    logger = logger or logging.getLogger(__name__)
+    width, height = image_size
+    shape = (len(samples), height, width)
+
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir)
+        entries = [[str(img_file), *compute_file_fingerprint(img_file)] for img_file, _, _ in samples]
+        cache_file = cache_dir / f"preprocessed_{_cache_key(entries, image_size, normalization)}.npy"
+        if cache_file.exists():
+            logger.info(f"Images prétraitées reprises du cache: {cache_file}")
+            return np.load(cache_file, mmap_mode='r')
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.npy.tmp')
+        output = np.lib.format.open_memmap(tmp_file, mode='w+', dtype=np.float32, shape=shape)
+    else:
+        output = np.empty(shape, dtype=np.float32)
+
+    local = threading.local()
+
+    def process_batch(start):
+        if not hasattr(local, 'preprocessor'):
+            local.preprocessor = FusedPreprocessor(image_size, normalization=normalization)
+        for i in range(start, min(start + batch_size, len(samples))):
+            try:
+                local.preprocessor(samples[i][0], out=output[i])
+            except Exception as e:
+                logging.warning(f"Erreur lors du prétraitement de {samples[i][0]}: {e}")
+                output[i] = np.nan
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        list(executor.map(process_batch, range(0, len(samples), batch_size)))
+
+    if cache_dir is not None:
+        output.flush()
+        del output
+        os.replace(tmp_file, cache_file)
+        logger.info(f"Images prétraitées mises en cache: {cache_file}")
+        return np.load(cache_file, mmap_mode='r')
+    return output
+
+def _throughput(func, inputs):
+    func(inputs[0])  # Préchauffage
+    start = time.perf_counter()
+    for item in inputs:
+        func(item)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(inputs[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'images_per_sec': len(inputs) / elapsed, 'peak_alloc_mb_per_image': peak / (1024 * 1024)}
+
+def benchmark_preprocessing(files, image_size=IMAGE_SIZE, normalization=NORMALIZATION):
+    """
+    Mesure séparément le décodage et le prétraitement (un thread).
+
+    Le décodage complet (PIL) et le décodage réduit (decode_grayscale) sont
+    chronométrés seuls. Les étapes enchaînées et fusionnées (resize, CLAHE,
+    normalisation) sont ensuite comparées sur les mêmes images décodées à
+    pleine résolution, si bien que leur écart ne mesure que la fusion.
+    Le bout-en-bout de chaque version (son décodeur + ses étapes) est
+    aussi reporté.
+
+    Returns:
+        dict: {nom: {'images_per_sec', 'peak_alloc_mb_per_image'}} pour
+            'decode_full', 'decode_reduced', 'transform_naive',
+            'transform_fused', 'naive' et 'fused'
+    """
+    fused = FusedPreprocessor(image_size, normalization=normalization)
+    out = np.empty((image_size[1], image_size[0]), dtype=np.float32)
+    images = [decode_full(img_file) for img_file in files]
+
+    return {
+        'decode_full': _throughput(decode_full, files),
+        'decode_reduced': _throughput(lambda f: decode_grayscale(f, image_size), files),
+        'transform_naive': _throughput(lambda image: preprocess_naive_array(image, image_size,
+                                                                            normalization=normalization), images),
+        'transform_fused': _throughput(lambda image: fused.transform(image, out=out), images),
+        'naive': _throughput(lambda f: preprocess_naive(f, image_size, normalization=normalization), files),
+        'fused': _throughput(lambda f: fused(f, out=out), files),
+    }
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+    from zip_dataset import open_dataset
+
+    parser = argparse.ArgumentParser(description="Prétraitement fusionné (resize + CLAHE + normalisation)")
+    parser.add_argument('--dataset', default=DATASET_ARCHIVE or DATASET_PATH,
+                        help="Dossier du dataset, archive .zip ou URL s3://")
+    parser.add_argument('--subsets', nargs='+', default=SUBSETS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--benchmark', type=int, metavar='N', default=0,
+                        help="Comparer aux étapes enchaînées sur N images au lieu de prétraiter")
+    args = parser.parse_args()
+
+    print_project_header()
+    logger = setup_logging()
+    samples = list_image_samples(open_dataset(args.dataset), args.subsets)
+
+    if args.benchmark:
+        files = [img_file for img_file, _, _ in samples[:args.benchmark]]
+        results = benchmark_preprocessing(files)
+        print(f"\n⏱️ BENCHMARK ({len(files)} images, {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}, {NORMALIZATION})")
+        for name, result in results.items():
+            print(f"  {name}: {result['images_per_sec']:.1f} images/s, "
+                  f"pic d'allocation {result['peak_alloc_mb_per_image']:.1f} MB/image")
+
+        def speedup(fast, slow):
+            return results[fast]['images_per_sec'] / results[slow]['images_per_sec']
+
+        print(f"  Accélération du décodage réduit: x{speedup('decode_reduced', 'decode_full'):.2f}")
+        print(f"  Accélération de la fusion (mêmes images décodées): x{speedup('transform_fused', 'transform_naive'):.2f}")
+        print(f"  Accélération bout-en-bout: x{speedup('fused', 'naive'):.2f}")
+    else:
+        start = time.perf_counter()
+        images = preprocess_dataset(samples, workers=args.workers,
+                                    cache_dir=None if args.no_cache else PREPROCESS_CACHE_DIR, logger=logger)
+        elapsed = time.perf_counter() - start
+        print(f"\n✅ {images.shape[0]:,} images prétraitées en {elapsed:.1f} s "
+              f"({images.shape[0] / elapsed:.1f} images/s)")
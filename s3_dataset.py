@@ -0,0 +1,240 @@
+# Lecture du dataset depuis un stockage objet compatible S3 - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import *
+from zip_dataset import ZipMemberStat, ZipPath, find_dataset_prefix
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+except ImportError:  # Dépendance optionnelle (pip install boto3)
+    boto3 = None
+
+_datasets = {}
+_received_datasets = {}
+_datasets_lock = threading.Lock()
+
+def parse_s3_url(url):
+    """
+    Découpe une URL s3://bucket/préfixe en (bucket, préfixe terminé par '/').
+    """
+    if not url.startswith('s3://'):
+        raise ValueError(f"URL S3 invalide: {url}")
+    bucket, _, prefix = url[len('s3://'):].partition('/')
+    prefix = prefix.strip('/')
+    return bucket, f"{prefix}/" if prefix else ''
+
+def create_s3_client(endpoint_url=S3_ENDPOINT_URL, max_connections=S3_MAX_POOL_CONNECTIONS):
+    """
+    Client S3 partagé entre threads, avec un pool de connexions HTTP borné.
+
+    Args:
+        endpoint_url (str, optional): Service compatible (MinIO...); None pour AWS
+        max_connections (int): Taille maximale du pool de connexions
+
+    Returns:
+        botocore.client.S3: Client S3
+    """
+    if boto3 is None:
+        raise ImportError("boto3 est requis pour lire un dataset S3 (pip install boto3)")
+    config = BotoConfig(max_pool_connections=max_connections, retries={'max_attempts': 5, 'mode': 'adaptive'})
+    return boto3.session.Session().client('s3', endpoint_url=endpoint_url, config=config)
+
+class S3Dataset:
+    """
+    Dataset stocké sous un préfixe S3, indexé par un listage parallèle.
+
+    Le listage utilise le délimiteur '/': chaque sous-dossier découvert est
+    listé dans sa propre tâche, si bien que train/, test/, val/ et leurs
+    classes sont parcourus simultanément. L'index (taille, date, ETag de
+    chaque objet) suffit aux statistiques et empreintes sans autre requête.
+    Les lectures passent par des GET par plage sur le pool de connexions.
+
+    Avec `members`, l'index est fourni et aucun listage n'est fait.
+    """
+
+    def __init__(self, url, client=None, list_workers=S3_LIST_WORKERS, members=None):
+        self.url = url.rstrip('/')
+        self.bucket, self.prefix = parse_s3_url(url)
+        self.client = client or create_s3_client()
+        self.requests = 0
+        self.bytes_read = 0
+        self._stats_lock = threading.Lock()
+        self.members = self._list_objects(list_workers) if members is None else dict(members)
+        self.children = self._build_tree()
+
+    def _list_prefix(self, prefix):
+        objects, prefixes = [], []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            objects.extend(page.get('Contents', []))
+            prefixes.extend(entry['Prefix'] for entry in page.get('CommonPrefixes', []))
+        return objects, prefixes
+
+    def _list_objects(self, list_workers):
+        members = {}
+        with ThreadPoolExecutor(max_workers=list_workers) as executor:
+            running = {executor.submit(self._list_prefix, self.prefix)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    objects, prefixes = future.result()
+                    running.update(executor.submit(self._list_prefix, prefix) for prefix in prefixes)
+                    for obj in objects:
+                        name = obj['Key'][len(self.prefix):]
+                        if not name or name.endswith('/') or any(part.startswith('._') for part in name.split('/')):
+                            continue
+                        members[name] = (obj['Size'], int(obj['LastModified'].timestamp() * 1e9),
+                                         obj.get('ETag', '').strip('"'))
+        return members
+
+    def _build_tree(self):
+        children = {'': set()}
+        for name in self.members:
+            parts = name.split('/')
+            for depth in range(len(parts)):
+                children.setdefault('/'.join(parts[:depth]), set()).add(parts[depth])
+        return {parent: sorted(names) for parent, names in children.items()}
+
+    def _get(self, name, byte_range=None):
+        kwargs = {'Bucket': self.bucket, 'Key': self.prefix + name}
+        if byte_range is not None:
+            kwargs['Range'] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        data = self.client.get_object(**kwargs)['Body'].read()
+        with self._stats_lock:
+            self.requests += 1
+            self.bytes_read += len(data)
+        return data
+
+    def read_member(self, name):
+        """
+        Lit un objet entier en une requête.
+        """
+        return self._get(name)
+
+    def read_range(self, name, start, end):
+        """
+        Lit les octets [start, end] (inclus) d'un objet.
+        """
+        return self._get(name, (start, end))
+
+    def find_dataset_root(self):
+        """
+        Retourne le dossier contenant les ensembles (train/, test/, val/).
+        """
+        return S3Path(self, find_dataset_prefix(self.children, self.url))
+
+def open_s3_dataset(url, client=None):
+    """
+    Liste (une seule fois par processus) un dataset S3.
+    """
+    url = url.rstrip('/')
+    with _datasets_lock:
+        if url not in _datasets:
+            _datasets[url] = S3Dataset(url, client)
+        return _datasets[url]
+
+class S3ObjectReader(io.RawIOBase):
+    """
+    Fichier en lecture seule sur un objet S3, alimenté par des GET par plage.
+
+    La première requête ne lit que S3_RANGE_SIZE octets (l'en-tête JPEG
+    suffit à PIL pour les dimensions, le format et le mode); chaque
+    requête suivante double la taille lue, jusqu'à S3_MAX_RANGE_SIZE, pour
+    qu'un décodage complet reste en quelques requêtes. Une lecture qui
+    déborde du tampon courant enchaîne les plages jusqu'à être complète
+    (ou jusqu'à la fin de l'objet): PIL considère toute lecture courte
+    comme un fichier tronqué.
+    """
+
+    def __init__(self, dataset, name, size):
+        self.dataset = dataset
+        self.name = name
+        self.size = size
+        self._position = 0
+        self._buffer = b''
+        self._buffer_start = 0
+        self._fetch_size = S3_RANGE_SIZE
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, b):
+        view = memoryview(b).cast('B')
+        total = 0
+        while total < len(view) and self._position < self.size:
+            offset = self._position - self._buffer_start
+            if not 0 <= offset < len(self._buffer):
+                length = min(max(len(view) - total, self._fetch_size), self.size - self._position)
+                self._buffer = self.dataset.read_range(self.name, self._position, self._position + length - 1)
+                self._buffer_start, offset = self._position, 0
+                self._fetch_size = min(self._fetch_size * 2, S3_MAX_RANGE_SIZE)
+                if not self._buffer:
+                    break
+            n = min(len(view) - total, len(self._buffer) - offset)
+            view[total:total + n] = self._buffer[offset:offset + n]
+            self._position += n
+            total += n
+        return total
+
+class S3Path(ZipPath):
+    """
+    Chemin dans un dataset S3, avec la même interface que ZipPath.
+
+    stat() répond depuis l'index du listage; open('rb') renvoie un
+    S3ObjectReader (lecture par plages) et read_bytes() un GET complet.
+
+    Une instance sérialisée (pickle) emporte l'entrée d'index de son objet:
+    un processus du pool qui n'a pas listé le dataset n'envoie aucune
+    requête LIST, son index ne contenant que les objets reçus.
+    """
+
+    def __reduce__(self):
+        return (_s3_path, (self.archive.url, self.member, self.archive.members.get(self.member)))
+
+    def __str__(self):
+        return f"{self.archive.url}/{self.member}"
+
+    def __hash__(self):
+        return hash((self.archive.url, self.member))
+
+    def stat(self):
+        if not self.is_file():
+            return ZipMemberStat(0, 0)
+        size, mtime_ns, _ = self.archive.members[self.member]
+        return ZipMemberStat(size, mtime_ns)
+
+    def open(self, mode='rb'):
+        if mode != 'rb':
+            raise ValueError("Les objets S3 sont en lecture seule ('rb')")
+        return S3ObjectReader(self.archive, self.member, self.archive.members[self.member][0])
+
+def _s3_path(url, member, entry):
+    with _datasets_lock:
+        dataset = _datasets.get(url)
+        if dataset is None:
+            if url not in _received_datasets:
+                _received_datasets[url] = S3Dataset(url, members={})
+            dataset = _received_datasets[url]
+            if entry is not None:
+                dataset.members.setdefault(member, entry)
+    return S3Path(dataset, member)
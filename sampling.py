@@ -0,0 +1,213 @@
+# Échantillonnage aléatoire adaptatif des images - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import os
+import math
+import random
+import logging
+from statistics import NormalDist
+from config import *
+
+class RunningEstimate:
+    """
+    Moyenne et variance courantes (algorithme de Welford) avec intervalle de
+    confiance normal et correction pour population finie.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (value - self.mean)
+
+    def half_width(self, confidence, population=None):
+        if self.n < 2:
+            return math.inf
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        half_width = z * math.sqrt(self._m2 / (self.n - 1) / self.n)
+        if population and population > 1:
+            half_width *= math.sqrt(max(population - self.n, 0) / (population - 1))
+        return half_width
+
+    def summary(self, confidence, population=None):
+        half_width = self.half_width(confidence, population)
+        return {
+            'mean': self.mean,
+            'half_width': half_width,
+            'ci_low': self.mean - half_width,
+            'ci_high': self.mean + half_width,
+            'n': self.n
+        }
+
+def reservoir_sample(iterable, k, rng):
+    """
+    Tire k éléments uniformément d'un flux de taille inconnue (algorithme R).
+
+    Returns:
+        tuple: (échantillon, nombre total d'éléments vus)
+    """
+    reservoir = []
+    seen = 0
+    for item in iterable:
+        seen += 1
+        if len(reservoir) < k:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(seen)
+            if j < k:
+                reservoir[j] = item
+    return reservoir, seen
+
+def _iter_images(class_path):
+    # iterdir plutôt que os.scandir: class_path peut être un zip_dataset.ZipPath
+    for img_file in class_path.iterdir():
+        if img_file.suffix.lower() in IMAGE_EXTENSIONS and img_file.is_file():
+            yield img_file
+
+def random_draw_order(dataset_path, max_samples, strategy='stratified', seed=RANDOM_SEED):
+    """
+    Construit un ordre de tirage aléatoire d'au plus max_samples images.
+
+    'random': tirage uniforme sur tout le dataset (un réservoir unique).
+    'stratified': un réservoir par (ensemble, classe), entrelacés de sorte
+    que tout préfixe de l'ordre respecte l'allocation proportionnelle.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        max_samples (int): Nombre maximal d'images
+        strategy (str): 'random' ou 'stratified'
+        seed (int): Graine aléatoire
+
+    Returns:
+        tuple: (liste de (chemin, subset, classe), taille de la population)
+    """
+    rng = random.Random(seed)
+    strata = [(subset, class_name, dataset_path / subset / class_name)
+              for subset in SUBSETS for class_name in CLASSES
+              if (dataset_path / subset / class_name).exists()]
+
+    if strategy == 'random':
+        stream = ((img_file, subset, class_name)
+                  for subset, class_name, class_path in strata
+                  for img_file in _iter_images(class_path))
+        sample, population = reservoir_sample(stream, max_samples, rng)
+        rng.shuffle(sample)
+        return sample, population
+
+    if strategy != 'stratified':
+        raise ValueError(f"Stratégie d'échantillonnage inconnue: {strategy}")
+
+    keyed = []
+    population = 0
+    for subset, class_name, class_path in strata:
+        sample, size = reservoir_sample(_iter_images(class_path), max_samples, rng)
+        rng.shuffle(sample)
+        population += size
+        # Le j-ième tirage de la strate reçoit la clé (j + u) / N_s: trier sur
+        # cette clé entrelace les strates proportionnellement à leur taille
+        keyed.extend(((j + rng.random()) / size, (img_file, subset, class_name))
+                     for j, img_file in enumerate(sample))
+    keyed.sort(key=lambda item: item[0])
+    return [item for _, item in keyed[:max_samples]], population
+
+def adaptive_sample_properties(dataset_path, max_samples, strategy='stratified', tolerance=None,
+                               confidence=0.95, seed=RANDOM_SEED, min_samples=30, check_every=16):
+    """
+    Analyse les propriétés d'un échantillon aléatoire en arrêtant le tirage
+    dès que chaque estimation suivie est connue à la tolérance demandée.
+
+    Statistiques suivies: largeur, hauteur, ratio L/H et taille moyens
+    (tolérance relative à la moyenne) et proportion d'images RGB (tolérance
+    absolue).
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        max_samples (int): Budget maximal d'images
+        strategy (str): 'random' ou 'stratified'
+        tolerance (float, optional): Demi-largeur visée (None: pas d'arrêt anticipé)
+        confidence (float): Niveau de confiance des intervalles
+        seed (int): Graine aléatoire
+        min_samples (int): Nombre minimal d'images avant tout arrêt
+        check_every (int): Fréquence de vérification du critère d'arrêt
+
+    Returns:
+        dict: Propriétés (format de analyze_image_properties) avec les clés
+            supplémentaires 'estimates' et 'sampling'
+    """
+    from utils import extract_image_properties
+    from monitoring import IMAGES_EXPECTED, IMAGE_ERRORS, progress_counter
+
+    draws, population = random_draw_order(dataset_path, max_samples, strategy, seed)
+    IMAGES_EXPECTED.labels('scan').inc(len(draws))
+    progress = progress_counter('scan')
+    drawn_before = progress.value
+
+    properties = {'dimensions': [], 'file_sizes': [], 'formats': [], 'color_modes': [],
+                  'subsets': [], 'classes': []}
+    estimates = {name: RunningEstimate() for name in
+                 ['width', 'height', 'aspect_ratio', 'file_size_mb', 'rgb_fraction']}
+    relative = {'width', 'height', 'aspect_ratio', 'file_size_mb'}
+    converged = False
+
+    def wide_estimates():
+        # Estimations dont l'intervalle dépasse encore la tolérance
+        return [name for name, estimate in estimates.items()
+                if estimate.half_width(confidence, population) > (tolerance * abs(estimate.mean)
+                                                                  if name in relative else tolerance)]
+
+    for img_file, subset, class_name in draws:
+        progress.inc()
+        try:
+            image_properties = extract_image_properties(img_file)
+        except Exception as e:
+            IMAGE_ERRORS.labels('scan').inc()
+            logging.warning(f"Erreur lors de l'analyse de {img_file}: {e}")
+            continue
+
+        width, height = image_properties['dimensions']
+        properties['dimensions'].append(image_properties['dimensions'])
+        properties['file_sizes'].append(image_properties['file_size'])
+        properties['formats'].append(image_properties['format'])
+        properties['color_modes'].append(image_properties['color_mode'])
+        properties['subsets'].append(subset)
+        properties['classes'].append(class_name)
+
+        estimates['width'].update(width)
+        estimates['height'].update(height)
+        estimates['aspect_ratio'].update(width / height)
+        estimates['file_size_mb'].update(image_properties['file_size'] / (1024 * 1024))
+        estimates['rgb_fraction'].update(1.0 if image_properties['color_mode'] == 'RGB' else 0.0)
+
+        n = len(properties['dimensions'])
+        if tolerance is not None and n >= min_samples and n % check_every == 0 and not wide_estimates():
+            converged = True
+            break
+
+    # Tirages non effectués après l'arrêt anticipé
+    IMAGES_EXPECTED.labels('scan').dec(len(draws) - int(progress.value - drawn_before))
+
+    properties['estimates'] = {name: estimate.summary(confidence, population)
+                               for name, estimate in estimates.items()}
+    if tolerance is not None and not converged:
+        wide = wide_estimates()
+        converged = not wide
+        if wide:
+            logging.warning(f"Tolérance {tolerance:g} non atteinte avec le budget de {len(draws)} images "
+                            f"(IC trop larges: {', '.join(wide)}); augmenter sample_size ou la tolérance")
+    properties['sampling'] = {
+        'strategy': strategy,
+        'population': population,
+        'sampled': len(properties['dimensions']),
+        'fraction': len(properties['dimensions']) / population if population else 0.0,
+        'tolerance': tolerance,
+        'confidence': confidence,
+        'converged': converged
+    }
+    return properties
@@ -0,0 +1,75 @@
+# Tests de la lecture par plages S3 - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+
+from config import S3_RANGE_SIZE
+from s3_dataset import S3Dataset, S3Path
+
+def _padded_jpeg(padding):
+    # Segment COM de `padding` octets juste après l'en-tête: il chevauche la première plage
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (96, 128), dtype=np.uint8), 'L')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', comment=b'x' * padding)
+    return buffer.getvalue(), np.asarray(image)
+
+@pytest.fixture
+def dataset():
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='cxr')
+        images = {}
+        for padding in (S3_RANGE_SIZE - 100, S3_RANGE_SIZE + 3000, 3 * S3_RANGE_SIZE):
+            data, _ = _padded_jpeg(padding)
+            name = f"chest_xray/train/NORMAL/padded_{padding}.jpeg"
+            client.put_object(Bucket='cxr', Key=f"prefix/{name}", Body=data)
+            images[name] = data
+        yield S3Dataset('s3://cxr/prefix', client=client), images
+
+def test_segment_crossing_first_range(dataset):
+    s3, images = dataset
+    for name, data in images.items():
+        path = S3Path(s3, name)
+        with path.open('rb') as f, Image.open(f) as img:
+            decoded = np.asarray(img)
+        with Image.open(io.BytesIO(data)) as img:
+            expected = np.asarray(img)
+        assert np.array_equal(decoded, expected)
+
+def test_read_spanning_ranges_is_complete(dataset):
+    s3, images = dataset
+    for name, data in images.items():
+        reader = S3Path(s3, name).open('rb')
+        assert reader.read(S3_RANGE_SIZE // 2) == data[:S3_RANGE_SIZE // 2]
+        assert reader.read(S3_RANGE_SIZE) == data[S3_RANGE_SIZE // 2:S3_RANGE_SIZE // 2 + S3_RANGE_SIZE]
+        assert reader.read() == data[S3_RANGE_SIZE // 2 + S3_RANGE_SIZE:]
+
+def test_unpickled_path_does_not_list(dataset, monkeypatch):
+    import pickle
+    import s3_dataset
+
+    s3, images = dataset
+    name = next(iter(images))
+    payload = pickle.dumps(S3Path(s3, name))
+
+    # Simule un processus du pool: aucun dataset listé, client créé localement
+    monkeypatch.setattr(s3_dataset, '_datasets', {})
+    monkeypatch.setattr(s3_dataset, '_received_datasets', {})
+    monkeypatch.setattr(s3_dataset, 'create_s3_client', lambda: s3.client)
+    monkeypatch.setattr(S3Dataset, '_list_objects', lambda self, workers: pytest.fail("listage inattendu"))
+    path = pickle.loads(payload)
+    assert path.stat().st_size == len(images[name])
+    assert path.read_bytes() == images[name]
@@ -0,0 +1,337 @@
+# Modèle de référence CPU entraîné en flux (partial_fit) - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import sys
+import copy
+import json
+import time
+import logging
+import argparse
+import joblib
+import numpy as np
+from pathlib import Path
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import (balanced_accuracy_score, f1_score, recall_score,
+                             roc_auc_score)
+from sklearn.exceptions import NotFittedError
+from sklearn.model_selection import StratifiedGroupKFold
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(str(Path(__file__).parent))
+
+from config import *
+from data_loader import list_image_samples, iter_image_batches
+
+class ClusterVoteClassifier:
+    """
+    Classifieur par vote de clusters construit sur MiniBatchKMeans.
+
+    Les centroïdes sont appris en flux; chaque cluster accumule les poids des
+    classes qu'il reçoit et prédit la distribution observée.
+    """
+
+    def __init__(self, n_clusters=32, random_state=RANDOM_SEED):
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+        self.classes_ = None
+        self.cluster_counts_ = None
+
+    def partial_fit(self, X, y, classes=None, sample_weight=None):
+        if self.classes_ is None:
+            self.classes_ = np.asarray(classes if classes is not None else np.unique(y))
+            self.cluster_counts_ = np.zeros((self.kmeans.n_clusters, len(self.classes_)))
+
+        # MiniBatchKMeans exige au moins n_clusters échantillons au premier appel
+        if not hasattr(self.kmeans, 'cluster_centers_') and len(X) < self.kmeans.n_clusters:
+            return self
+
+        self.kmeans.partial_fit(X, sample_weight=sample_weight)
+        clusters = self.kmeans.predict(X)
+        weights = np.ones(len(y)) if sample_weight is None else sample_weight
+        class_index = np.searchsorted(self.classes_, y)
+        np.add.at(self.cluster_counts_, (clusters, class_index), weights)
+        return self
+
+    def predict_proba(self, X):
+        if not hasattr(self.kmeans, 'cluster_centers_'):
+            raise NotFittedError(f"ClusterVoteClassifier non entraîné: aucun lot n'a atteint "
+                                 f"{self.kmeans.n_clusters} images (n_clusters); augmenter la taille des lots")
+        counts = self.cluster_counts_ + 1.0  # Lissage de Laplace
+        proba = counts / counts.sum(axis=1, keepdims=True)
+        return proba[self.kmeans.predict(X)]
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+BASELINE_MODELS = {
+    'sgd': lambda: SGDClassifier(loss='log_loss', alpha=1e-4, learning_rate='optimal',
+                                 random_state=RANDOM_SEED),
+    'sgd_hinge': lambda: SGDClassifier(loss='hinge', alpha=1e-4, random_state=RANDOM_SEED),
+    'kmeans': lambda: ClusterVoteClassifier(),
+}
+
+def split_monitor_samples(train_samples, validation_split=VALIDATION_SPLIT, seed=RANDOM_SEED):
+    """
+    Sépare une fraction de l'entraînement pour l'early stopping, par patient.
+
+    Les images d'un même patient restent du même côté (sinon le score de
+    validation est optimiste); la séparation est stratifiée par classe.
+
+    Args:
+        train_samples (list): Tuples (chemin, subset, label)
+        validation_split (float): Fraction approximative réservée
+        seed (int): Graine du tirage
+
+    Returns:
+        tuple: (échantillons d'entraînement, échantillons de validation)
+    """
+    from cross_validation import extract_patient_id
+    labels = np.array([label for _, _, label in train_samples])
+    groups = [f"{CLASSES[label]}/{extract_patient_id(img_file.name)}" for img_file, _, label in train_samples]
+    splitter = StratifiedGroupKFold(n_splits=max(2, round(1 / validation_split)), shuffle=True, random_state=seed)
+    fit_index, monitor_index = next(splitter.split(np.zeros(len(labels)), labels, groups))
+    return [train_samples[i] for i in fit_index], [train_samples[i] for i in monitor_index]
+
+def images_to_features(X):
+    """
+    Convertit un lot d'images uint8 en vecteurs float32 centrés.
+
+    Args:
+        X (np.ndarray): Lot de forme (n, hauteur, largeur)
+
+    Returns:
+        np.ndarray: Matrice (n, hauteur * largeur)
+    """
+    features = X.reshape(len(X), -1).astype(np.float32)
+    features *= 1.0 / 255.0
+    features -= 0.5
+    return features
+
+def peak_memory_mb():
+    """
+    Retourne la mémoire résidente maximale du processus (MB), ou None si indisponible.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en KB sous Linux et en octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def model_scores(model, features):
+    """
+    Retourne un score continu pour la classe PNEUMONIA.
+    """
+    if hasattr(model, 'predict_proba') and getattr(model, 'loss', 'log_loss') == 'log_loss':
+        return model.predict_proba(features)[:, 1]
+    return model.decision_function(features)
+
+def evaluate_model(model, samples, batch_size=BASELINE_BATCH_SIZE, image_size=BASELINE_IMAGE_SIZE,
+                   bootstrap_resamples=0, cache=IMAGE_CACHE_ENABLED, workers=LOADER_WORKERS):
+    """
+    Évalue un modèle en flux sur une liste d'échantillons.
+
+    Args:
+        model: Modèle entraîné
+        samples (list): Tuples (chemin, subset, label)
+        batch_size (int): Taille des lots
+        image_size (tuple): Taille des images
+        bootstrap_resamples (int): Rééchantillonnages du bootstrap par patient
+            (0: pas d'intervalles de confiance)
+        cache (bool): Passer par le cache d'images décodées (échantillons relus)
+        workers (int): Threads de décodage
+
+    Returns:
+        dict: Métriques (recall, specificity, f1, balanced_accuracy, auc) et,
+            avec bootstrap_resamples, leurs intervalles de confiance
+    """
+    y_true, y_pred, y_score, files = [], [], [], []
+    for X, y, batch_files in iter_image_batches(samples, batch_size, image_size, workers=workers, cache=cache):
+        features = images_to_features(X)
+        y_true.append(y)
+        y_pred.append(model.predict(features))
+        y_score.append(model_scores(model, features))
+        files.extend(batch_files)
+
+    if not y_true:
+        return {}
+
+    y_true = np.concatenate(y_true)
+    y_pred = np.concatenate(y_pred)
+    y_score = np.concatenate(y_score)
+
+    metrics = {
+        'n_images': int(len(y_true)),
+        'recall': float(recall_score(y_true, y_pred, pos_label=1, zero_division=0)),
+        'specificity': float(recall_score(y_true, y_pred, pos_label=0, zero_division=0)),
+        'f1_score': float(f1_score(y_true, y_pred, zero_division=0)),
+        'balanced_accuracy': float(balanced_accuracy_score(y_true, y_pred)),
+    }
+    metrics['auc'] = float(roc_auc_score(y_true, y_score)) if len(np.unique(y_true)) == 2 else None
+
+    if bootstrap_resamples:
+        from bootstrap import bootstrap_metrics
+        from cross_validation import extract_patient_id
+        patients = [f"{CLASSES[label]}/{extract_patient_id(img_file.name)}"
+                    for img_file, label in zip(files, y_true)]
+        metrics['confidence_intervals'] = bootstrap_metrics(y_true, y_score, y_pred, groups=patients,
+                                                            n_resamples=bootstrap_resamples)
+    return metrics
+
+def train_baseline(dataset_path=DATASET_PATH, model_name='sgd', epochs=EPOCHS, patience=PATIENCE,
+                   batch_size=BASELINE_BATCH_SIZE, image_size=BASELINE_IMAGE_SIZE,
+                   train_samples=None, eval_samples=None, checkpoint_dir=MODELS_PATH,
+                   bootstrap_resamples=BOOTSTRAP_RESAMPLES, loader_workers=LOADER_WORKERS, cache=True,
+                   logger=None):
+    """
+    Entraîne un modèle de référence par partial_fit sur des lots lus depuis le disque.
+
+    Une fraction VALIDATION_SPLIT de l'ensemble d'entraînement (stratifiée,
+    groupée par patient) sert à l'early stopping; l'ensemble 'test' est
+    évalué avec le meilleur modèle. Les poids CLASS_WEIGHTS sont appliqués
+    comme poids d'échantillons. Avec cache, les images d'entraînement et de
+    validation, relues à chaque époque, passent par le cache d'images
+    décodées.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+        model_name (str): Clé de BASELINE_MODELS
+        epochs (int): Nombre maximal d'époques (au moins 1)
+        patience (int): Époques sans amélioration avant l'arrêt
+        batch_size (int): Taille des lots
+        image_size (tuple): Taille des images réduites
+        train_samples (list, optional): Échantillons d'entraînement imposés
+        eval_samples (list, optional): Échantillons d'évaluation finale imposés
+        checkpoint_dir (Path, optional): Dossier des checkpoints (None: aucun)
+        bootstrap_resamples (int): Rééchantillonnages des IC bootstrap par patient
+            des métriques finales (0: aucun)
+        loader_workers (int): Threads de décodage des lots
+        cache (bool): Garder les images relues dans le cache d'images décodées
+            (jusqu'à IMAGE_CACHE_MAX_BYTES par processus)
+        logger: Logger pour les messages
+
+    Returns:
+        dict: Historique, métriques finales, débit et mémoire maximale
+    """
+    logger = logger or logging.getLogger(__name__)
+    if epochs < 1:
+        raise ValueError(f"epochs doit être au moins 1 (reçu: {epochs})")
+
+    if train_samples is None:
+        train_samples = list_image_samples(dataset_path, ['train'])
+    if eval_samples is None:
+        eval_samples = list_image_samples(dataset_path, ['test'])
+
+    fit_samples, monitor_samples = split_monitor_samples(train_samples)
+
+    model = BASELINE_MODELS[model_name]()
+    classes = np.arange(len(CLASSES))
+    class_weights = np.array([CLASS_WEIGHTS[i] for i in classes], dtype=np.float64)
+
+    if checkpoint_dir is not None:
+        checkpoint_dir = Path(checkpoint_dir)
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        best_path = checkpoint_dir / f"baseline_{model_name}_best.joblib"
+        last_path = checkpoint_dir / f"baseline_{model_name}_last.joblib"
+
+    history = []
+    best_score, best_epoch, best_model = -np.inf, 0, None
+    total_images, total_seconds = 0, 0.0
+
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        n_images = 0
+        for X, y, _ in iter_image_batches(fit_samples, batch_size, image_size,
+                                          shuffle=True, seed=RANDOM_SEED + epoch, workers=loader_workers,
+                                          cache=cache):
+            model.partial_fit(images_to_features(X), y, classes=classes,
+                              sample_weight=class_weights[y])
+            n_images += len(y)
+        elapsed = time.perf_counter() - start
+        total_images += n_images
+        total_seconds += elapsed
+
+        metrics = evaluate_model(model, monitor_samples, batch_size, image_size, cache=cache,
+                                 workers=loader_workers)
+        # Une AUC de 0.0 reste un score valide; seule son absence (une classe) bascule
+        score = metrics['auc'] if metrics.get('auc') is not None else metrics.get('balanced_accuracy', 0.0)
+        history.append({
+            'epoch': epoch,
+            'images_per_sec': n_images / elapsed if elapsed > 0 else 0.0,
+            'peak_memory_mb': peak_memory_mb(),
+            **metrics
+        })
+        logger.info(f"Époque {epoch}/{epochs} - score validation: {score:.4f} - "
+                    f"{history[-1]['images_per_sec']:.1f} images/s")
+
+        if checkpoint_dir is not None:
+            joblib.dump(model, last_path)
+
+        if score > best_score:
+            best_score, best_epoch = score, epoch
+            best_model = copy.deepcopy(model)
+            if checkpoint_dir is not None:
+                joblib.dump(model, best_path)
+        elif epoch - best_epoch >= patience:
+            logger.info(f"Early stopping à l'époque {epoch} (meilleure: {best_epoch})")
+            break
+
+    test_metrics = evaluate_model(best_model, eval_samples, batch_size, image_size, bootstrap_resamples,
+                                  workers=loader_workers)
+
+    results = {
+        'model': model_name,
+        'image_size': list(image_size),
+        'best_epoch': best_epoch,
+        'best_validation_score': float(best_score),
+        'history': history,
+        'test_metrics': test_metrics,
+        'throughput_images_per_sec': total_images / total_seconds if total_seconds > 0 else 0.0,
+        'peak_memory_mb': peak_memory_mb(),
+    }
+
+    if checkpoint_dir is not None:
+        with open(checkpoint_dir / f"baseline_{model_name}_history.json", 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        logger.info(f"Checkpoints sauvegardés dans: {checkpoint_dir}")
+
+    return results
+
+if __name__ == "__main__":
+    from utils import print_project_header, setup_logging
+
+    parser = argparse.ArgumentParser(description="Entraînement du modèle de référence en flux")
+    parser.add_argument('--model', choices=sorted(BASELINE_MODELS), default='sgd')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--patience', type=int, default=PATIENCE)
+    parser.add_argument('--batch-size', type=int, default=BASELINE_BATCH_SIZE)
+    parser.add_argument('--dataset', type=Path, default=DATASET_PATH)
+    args = parser.parse_args()
+
+    print_project_header()
+    logger = setup_logging()
+
+    results = train_baseline(args.dataset, args.model, args.epochs, args.patience,
+                             args.batch_size, logger=logger)
+
+    print(f"\n🏁 Meilleure époque: {results['best_epoch']} "
+          f"(score validation: {results['best_validation_score']:.4f})")
+    intervals = results['test_metrics'].get('confidence_intervals')
+    for metric, value in results['test_metrics'].items():
+        if isinstance(value, float):
+            ci = intervals['metrics'].get(metric) if intervals else None
+            if ci and ci['ci_low'] is not None:
+                print(f"  {metric}: {value:.4f} [{ci['ci_low']:.4f}, {ci['ci_high']:.4f}]")
+            else:
+                print(f"  {metric}: {value:.4f}")
+    if intervals:
+        print(f"  (IC {intervals['confidence']:.0%}, bootstrap de {intervals['n_clusters']} patients, "
+              f"{intervals['n_resamples']:,} rééchantillonnages)")
+    print(f"⚡ Débit: {results['throughput_images_per_sec']:.1f} images/s")
+    if results['peak_memory_mb'] is not None:
+        print(f"💾 Mémoire maximale: {results['peak_memory_mb']:.0f} MB")
@@ -13,27 +13,28 @@ from PIL import Image
 from sklearn.metrics import classification_report, confusion_matrix, roc_curve, auc
 from sklearn.utils.class_weight import compute_class_weight
 import json
+import hashlib
 from datetime import datetime
 from config import *
+from logging_pipeline import start_logging
+from monitoring import IMAGES_EXPECTED, IMAGE_ERRORS, progress_counter
 
 def setup_logging(log_file=None):
     """
     Configure le système de logging pour le projet.
     
+    Les enregistrements (y compris ceux des processus du pool initialisés
+    avec logging_pipeline.configure_worker_logging) passent par une file et
+    sont écrits en JSON-lines par un unique thread d'écriture, avec rotation
+    par taille et limitation des avertissements répétés.
+    
     Args:
         log_file (str, optional): Nom du fichier de log
     """
     if log_file is None:
-        log_file = LOGS_PATH / f"chest_xray_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL),
-        format=LOG_FORMAT,
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
+        log_file = LOGS_PATH / f"chest_xray_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    
+    start_logging(log_file)
     
     logger = logging.getLogger(__name__)
     logger.info(f"Logging configuré - Fichier: {log_file}")
@@ -52,9 +53,8 @@ def count_images_in_directory(directory_path):
     if not directory_path.exists():
         return 0
     
-    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
     return len([f for f in directory_path.iterdir() 
-               if f.suffix.lower() in image_extensions])
+               if f.suffix.lower() in IMAGE_EXTENSIONS])
 
 def get_dataset_statistics(dataset_path):
     """
@@ -87,6 +87,43 @@ def get_dataset_statistics(dataset_path):
     stats['total_dataset'] = total_images
     return stats
 
+def compute_file_fingerprint(file_path):
+    """
+    Calcule l'empreinte d'un fichier à partir de sa taille et de sa date de modification.
+
+    Args:
+        file_path (Path): Chemin vers le fichier
+
+    Returns:
+        tuple: (taille en octets, date de modification en ns)
+    """
+    stat = file_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+def compute_dataset_fingerprint(dataset_path):
+    """
+    Calcule une empreinte globale du dataset sans lire le contenu des images.
+
+    Toute image ajoutée, supprimée ou modifiée change l'empreinte.
+
+    Args:
+        dataset_path (Path): Chemin vers le dataset
+
+    Returns:
+        str: Empreinte hexadécimale (SHA-256)
+    """
+    digest = hashlib.sha256()
+    for subset in SUBSETS:
+        for class_name in CLASSES:
+            class_path = dataset_path / subset / class_name
+            if not class_path.exists():
+                continue
+            for img_file in sorted(class_path.iterdir()):
+                if img_file.suffix.lower() in IMAGE_EXTENSIONS:
+                    size, mtime_ns = compute_file_fingerprint(img_file)
+                    digest.update(f"{subset}/{class_name}/{img_file.name}:{size}:{mtime_ns}\n".encode())
+    return digest.hexdigest()
+
 def calculate_class_weights(stats):
     """
     Calcule les poids des classes pour gérer le déséquilibre.
@@ -119,23 +156,87 @@ def calculate_class_weights(stats):
     
     return weights
 
-def analyze_image_properties(dataset_path, sample_size=50):
+def extract_image_properties(img_file, with_intensity=False, cache=IMAGE_CACHE_ENABLED):
+    """
+    Extrait les propriétés d'une image à partir de son en-tête.
+    
+    Seul l'en-tête est lu, sauf si les statistiques d'intensité sont
+    demandées: l'image est alors décodée à échelle réduite (mode draft).
+    Avec cache, cette image réduite est servie par le cache d'images
+    décodées (image_cache.get_image_cache): une analyse relancée, par
+    exemple depuis une cellule de notebook, ne la redécode pas.
+    
+    Args:
+        img_file (Path): Chemin vers l'image
+        with_intensity (bool): Calculer la moyenne et l'écart-type d'intensité
+        cache (bool): Passer par le cache d'images décodées
+        
+    Returns:
+        dict: Propriétés (dimensions, file_size, format, color_mode[, intensity_mean, intensity_std])
+    """
+    with img_file.open('rb') as f, Image.open(f) as img:
+        image_properties = {
+            'dimensions': img.size,
+            'file_size': img_file.stat().st_size,
+            'format': img.format,
+            'color_mode': img.mode
+        }
+        if with_intensity:
+            draft_size = (max(1, img.width // 8), max(1, img.height // 8))
+            
+            def decode():
+                img.draft('L', draft_size)
+                return np.asarray(img.convert('L'), dtype=np.uint8)
+            
+            if cache:
+                from image_cache import get_image_cache
+                pixels = get_image_cache().get_or_decode(img_file, draft_size, 'intensity_draft', decode)
+            else:
+                pixels = decode()
+            image_properties['intensity_mean'] = float(pixels.mean(dtype=np.float64))
+            image_properties['intensity_std'] = float(pixels.std(dtype=np.float64))
+    return image_properties
+
+def analyze_image_properties(dataset_path, sample_size=50, strategy='first', tolerance=None,
+                             confidence=0.95, seed=RANDOM_SEED):
     """
     Analyse les propriétés des images (dimensions, format, etc.).
     
+    Avec strategy='first', les sample_size premiers fichiers de chaque
+    classe/subset sont analysés. Avec 'random' (uniforme) ou 'stratified'
+    (par subset/classe), un échantillon aléatoire d'au plus sample_size
+    images par classe/subset est tiré, des intervalles de confiance sont
+    maintenus, et le tirage s'arrête dès que toutes les estimations sont
+    à la tolérance demandée (voir sampling.adaptive_sample_properties).
+    
     Args:
         dataset_path (Path): Chemin vers le dataset
         sample_size (int): Nombre d'images à analyser par classe/subset
+        strategy (str): 'first', 'random' ou 'stratified'
+        tolerance (float, optional): Précision visée pour l'arrêt anticipé
+        confidence (float): Niveau de confiance des intervalles
+        seed (int): Graine du tirage aléatoire
         
     Returns:
-        dict: Propriétés analysées
+        dict: Propriétés analysées (listes parallèles, avec 'subsets' et
+            'classes' pour l'origine de chaque image; 'estimates' et
+            'sampling' en mode aléatoire)
     """
+    if strategy != 'first':
+        from sampling import adaptive_sample_properties
+        return adaptive_sample_properties(dataset_path, sample_size * len(SUBSETS) * len(CLASSES),
+                                          strategy, tolerance, confidence, seed)
+    
     properties = {
         'dimensions': [],
         'file_sizes': [],
         'formats': [],
-        'color_modes': []
+        'color_modes': [],
+        'subsets': [],
+        'classes': []
     }
+    progress = progress_counter('scan')
+    errors = IMAGE_ERRORS.labels('scan')
     
     for subset in SUBSETS:
         subset_path = dataset_path / subset
@@ -150,20 +251,26 @@ def analyze_image_properties(dataset_path, sample_size=50):
             # Obtenir un échantillon d'images
             image_files = list(class_path.glob('*.jpg')) + list(class_path.glob('*.jpeg'))
             sample_files = image_files[:min(sample_size, len(image_files))]
+            IMAGES_EXPECTED.labels('scan').inc(len(sample_files))
             
             for img_file in sample_files:
+                progress.inc()
                 try:
-                    with Image.open(img_file) as img:
-                        properties['dimensions'].append(img.size)
-                        properties['file_sizes'].append(img_file.stat().st_size)
-                        properties['formats'].append(img.format)
-                        properties['color_modes'].append(img.mode)
+                    image_properties = extract_image_properties(img_file)
                 except Exception as e:
+                    errors.inc()
                     logging.warning(f"Erreur lors de l'analyse de {img_file}: {e}")
+                    continue
+                properties['dimensions'].append(image_properties['dimensions'])
+                properties['file_sizes'].append(image_properties['file_size'])
+                properties['formats'].append(image_properties['format'])
+                properties['color_modes'].append(image_properties['color_mode'])
+                properties['subsets'].append(subset)
+                properties['classes'].append(class_name)
     
     return properties
 
-def create_advanced_visualizations(stats, properties, output_path):
+def create_advanced_visualizations(stats, properties, output_path, features=None):
     """
     Crée des visualisations avancées pour l'analyse du dataset.
     
@@ -171,6 +278,8 @@ def create_advanced_visualizations(stats, properties, output_path):
         stats (dict): Statistiques du dataset
         properties (dict): Propriétés des images
         output_path (Path): Chemin de sortie pour les graphiques
+        features (pd.DataFrame, optional): Descripteurs en cache (features.py)
+            utilisés pour le panneau de corrélation à la place des dimensions
     """
     # Configuration du style
     plt.style.use('seaborn-v0_8')
@@ -221,10 +330,25 @@ def create_advanced_visualizations(stats, properties, output_path):
         widths = [dim[0] for dim in properties['dimensions']]
         heights = [dim[1] for dim in properties['dimensions']]
         
-        ax3.scatter(widths, heights, alpha=0.6)
+        # Groupes de ratio L/H (bucketing.py): couleur par groupe, bornes en pointillés
+        from bucketing import assign_buckets, bucketing_savings, compute_aspect_buckets
+        buckets = compute_aspect_buckets(properties['dimensions'])
+        savings = bucketing_savings(properties['dimensions'], buckets)
+        assignments = assign_buckets(properties['dimensions'], buckets)
+        widths, heights, assignments = np.asarray(widths), np.asarray(heights), np.asarray(assignments)
+        for bucket, (shape, count) in enumerate(zip(buckets['shapes'], buckets['counts'])):
+            mask = assignments == bucket
+            ax3.scatter(widths[mask], heights[mask], alpha=0.6, label=f"{shape[0]}x{shape[1]} ({count})")
+        for edge in buckets['edges'][1:-1]:
+            ax3.axline((0, 0), slope=1 / edge, color='gray', linestyle='--', linewidth=1)
+        ax3.set_xlim(0, widths.max() * 1.05)
+        ax3.set_ylim(0, heights.max() * 1.05)
+        ax3.legend(title='Groupes de ratio', fontsize=8)
         ax3.set_xlabel('Largeur (pixels)')
         ax3.set_ylabel('Hauteur (pixels)')
-        ax3.set_title('Distribution des Dimensions')
+        ax3.set_title('Distribution des Dimensions\n'
+                      f"remplissage évité {savings['letterbox_padding_fraction']:.0%}, "
+                      f"déformation {savings['square_distortion']:.0%} -> {savings['bucket_distortion']:.0%}")
         ax3.grid(True, alpha=0.3)
     
     # 4. Distribution des tailles de fichiers
@@ -239,7 +363,12 @@ def create_advanced_visualizations(stats, properties, output_path):
     
     # 5. Heatmap de corrélation des métriques
     ax5 = plt.subplot(2, 3, 5)
-    if properties['dimensions']:
+    if features is not None and len(features):
+        from features import FEATURE_SUMMARY_COLUMNS
+        correlation_matrix = features[FEATURE_SUMMARY_COLUMNS].corr()
+        sns.heatmap(correlation_matrix, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax5)
+        ax5.set_title('Corrélation des Descripteurs d\'Images')
+    elif properties['dimensions']:
         metrics_data = {
             'Width': [dim[0] for dim in properties['dimensions']],
             'Height': [dim[1] for dim in properties['dimensions']],
@@ -303,6 +432,87 @@ def create_advanced_visualizations(stats, properties, output_path):
     plt.savefig(output_path / 'analyse_avancee_dataset.png', dpi=300, bbox_inches='tight')
     plt.show()
 
+def create_embedding_density_plot(embedding, index, output_path, bins=EMBEDDING_DENSITY_BINS, chunk_size=65536):
+    """
+    Carte de densité par cases de la projection ACP du dataset (embedding.py).
+
+    À gauche, la densité de toutes les images (échelle logarithmique); à
+    droite, chaque case prend la couleur moyenne des groupes ensemble/classe
+    qui la peuplent, pondérée par leurs effectifs, avec une opacité qui
+    croît avec la densité: amas, images isolées et décalages entre
+    ensembles ressortent directement. La projection est lue par blocs de
+    chunk_size lignes, la mémoire ne dépend que de bins.
+
+    Args:
+        embedding (np.ndarray): Projection (n, composantes), memmap accepté
+        index (dict): Index de la projection ('entries' avec 'subset' et 'label')
+        output_path (Path): Dossier de sortie
+        bins (int): Nombre de cases par axe
+        chunk_size (int): Lignes lues par bloc
+
+    Returns:
+        Path: Fichier PNG écrit
+    """
+    from matplotlib.patches import Patch
+
+    groups = [(subset, class_name) for subset in SUBSETS for class_name in CLASSES]
+    group_of = np.array([groups.index((e['subset'], CLASSES[e['label']])) for e in index['entries']],
+                        dtype=np.int64)
+
+    # Étendue des deux premières composantes, puis comptes par (groupe, case x, case y)
+    low, high = np.full(2, np.inf), np.full(2, -np.inf)
+    for start in range(0, len(embedding), chunk_size):
+        xy = np.asarray(embedding[start:start + chunk_size, :2], dtype=np.float64)
+        xy = xy[np.isfinite(xy).all(axis=1)]
+        if len(xy):
+            low, high = np.minimum(low, xy.min(axis=0)), np.maximum(high, xy.max(axis=0))
+    if not np.isfinite(low).all():
+        raise ValueError("Projection vide: aucune image lisible")
+    span = np.where(high > low, high - low, 1.0)
+
+    counts = np.zeros(len(groups) * bins * bins, dtype=np.int64)
+    for start in range(0, len(embedding), chunk_size):
+        xy = np.asarray(embedding[start:start + chunk_size, :2], dtype=np.float64)
+        valid = np.isfinite(xy).all(axis=1)
+        cells = np.clip(((xy[valid] - low) / span * bins).astype(np.int64), 0, bins - 1)
+        flat = (group_of[start:start + chunk_size][valid] * bins + cells[:, 0]) * bins + cells[:, 1]
+        counts += np.bincount(flat, minlength=len(counts))
+    counts = counts.reshape(len(groups), bins, bins)
+    total = counts.sum(axis=0)
+
+    # Palette par paires: une teinte par ensemble, claire (NORMAL) / foncée (PNEUMONIA)
+    palette = np.asarray(sns.color_palette('Paired', len(groups)))
+    rgb = np.tensordot(counts, palette, axes=(0, 0)) / np.maximum(total, 1)[..., None]
+    # Opacité minimale de 0.3 pour que les images isolées restent visibles
+    alpha = np.where(total > 0, 0.3 + 0.7 * np.log1p(total) / np.log1p(total.max()), 0.0)
+    rgba = np.concatenate([rgb, alpha[..., None]], axis=-1)
+
+    ratios = index['explained_variance_ratio']
+    extent = [low[0], low[0] + span[0], low[1], low[1] + span[1]]
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
+
+    image = ax1.imshow(np.log1p(total).T, origin='lower', extent=extent, aspect='auto', cmap='magma')
+    fig.colorbar(image, ax=ax1, label='log(1 + images par case)')
+    ax1.set_title(f"Densité de la Projection ACP ({int(total.sum()):,} images)")
+
+    ax2.set_facecolor('white')
+    ax2.imshow(rgba.transpose(1, 0, 2), origin='lower', extent=extent, aspect='auto')
+    group_counts = counts.sum(axis=(1, 2))
+    ax2.legend(handles=[Patch(color=palette[g], label=f"{subset}/{class_name} ({group_counts[g]:,})")
+                        for g, (subset, class_name) in enumerate(groups) if group_counts[g]],
+               title='Ensemble/Classe', fontsize=8)
+    ax2.set_title('Composition par Ensemble et Classe')
+
+    for ax in (ax1, ax2):
+        ax.set_xlabel(f"PC1 ({ratios[0]:.1%} de la variance)")
+        ax.set_ylabel(f"PC2 ({ratios[1]:.1%} de la variance)")
+
+    plt.tight_layout()
+    plot_file = output_path / 'carte_acp_dataset.png'
+    plt.savefig(plot_file, dpi=200, bbox_inches='tight')
+    plt.show()
+    return plot_file
+
 def save_analysis_report(stats, properties, output_path):
     """
     Sauvegarde un rapport d'analyse en format JSON.
@@ -337,6 +547,20 @@ def save_analysis_report(stats, properties, output_path):
         }
     }
     
+    if properties['dimensions']:
+        from bucketing import bucketing_savings, compute_aspect_buckets
+        buckets = compute_aspect_buckets(properties['dimensions'])
+        report['image_properties']['aspect_buckets'] = {
+            'shapes': buckets['shapes'],
+            'counts': buckets['counts'],
+            'ratio_edges': buckets['edges'][1:-1],
+            'savings_vs_square': bucketing_savings(properties['dimensions'], buckets)
+        }
+    
+    if 'sampling' in properties:
+        report['image_properties']['sampling'] = properties['sampling']
+        report['image_properties']['estimates'] = properties['estimates']
+    
     report_file = output_path / 'dataset_analysis_report.json'
     with open(report_file, 'w', encoding='utf-8') as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,280 @@
+# Lecture du dataset directement depuis l'archive ZIP - Chest X-Ray Pneumonia Detection
+# Auteur: Dady Akrou Cyrille
+# Email: cyrilledady0501@gmail.com
+# Localisation: Trois-Rivières, Canada
+
+import io
+import os
+import json
+import zlib
+import struct
+import hashlib
+import logging
+import zipfile
+import threading
+from fnmatch import fnmatch
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from config import *
+
+ZIP_INDEX_DIR = CACHE_PATH / "zip_index"
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+def _is_junk(member_name):
+    """
+    Fichiers AppleDouble (._*) ajoutés par macOS, y compris sous __MACOSX/.
+
+    Le dossier __MACOSX/ lui-même n'est pas écarté: l'archive Kaggle y place
+    une copie complète du dataset (voir DATASET_PATH).
+    """
+    return any(part.startswith('._') for part in member_name.split('/'))
+
+def find_dataset_prefix(children, source):
+    """
+    Dossier (arborescence {dossier: noms}) contenant les ensembles train/, test/, val/.
+
+    La copie hors __MACOSX/ est préférée, puis le dossier le moins profond.
+    """
+    candidates = [parent for parent, names in children.items()
+                  if any(subset in names for subset in SUBSETS)
+                  and any(f"{parent}/{subset}".lstrip('/') in children for subset in SUBSETS)]
+    if not candidates:
+        raise FileNotFoundError(f"Aucun dossier {SUBSETS} dans {source}")
+    return min(candidates, key=lambda parent: ('__MACOSX' in parent.split('/'), len(parent)))
+
+class ZipMemberStat:
+    """
+    Équivalent minimal de os.stat_result pour un membre de l'archive.
+    """
+
+    def __init__(self, size, mtime_ns):
+        self.st_size = size
+        self.st_mtime_ns = mtime_ns
+        self.st_mtime = mtime_ns / 1e9
+
+class ZipDataset:
+    """
+    Archive ZIP indexée: nom du membre -> (offset des données, tailles,
+    méthode de compression, date).
+
+    L'index est construit une fois à partir du répertoire central puis
+    persisté dans CACHE_PATH; il est invalidé si la taille ou la date de
+    l'archive change. Les lectures utilisent os.pread sur un descripteur
+    unique partagé par tous les threads (sans seek, donc sans verrou).
+    """
+
+    def __init__(self, archive_file, index_dir=ZIP_INDEX_DIR):
+        self.archive_file = Path(archive_file).resolve()
+        self.index_dir = Path(index_dir)
+        self.members = self._load_or_build_index()
+        self.children = self._build_tree()
+        self._fd = os.open(self.archive_file, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        self._lock = threading.Lock()  # Utilisé uniquement sans os.pread (Windows)
+
+    def _index_file(self):
+        key = hashlib.sha256(str(self.archive_file).encode()).hexdigest()[:16]
+        return self.index_dir / f"{self.archive_file.stem}-{key}.json"
+
+    def _load_or_build_index(self):
+        stat = self.archive_file.stat()
+        index_file = self._index_file()
+        if index_file.exists():
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index['archive_size'] == stat.st_size and index['archive_mtime_ns'] == stat.st_mtime_ns:
+                return index['members']
+
+        members = {}
+        with zipfile.ZipFile(self.archive_file) as archive, open(self.archive_file, 'rb') as raw:
+            for info in archive.infolist():
+                if info.is_dir() or _is_junk(info.filename):
+                    continue
+                raw.seek(info.header_offset)
+                header = raw.read(LOCAL_HEADER_SIZE)
+                if header[:4] != LOCAL_HEADER_SIGNATURE:
+                    raise zipfile.BadZipFile(f"En-tête local invalide: {info.filename}")
+                name_length, extra_length = struct.unpack('<HH', header[26:30])
+                data_offset = info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+                mtime_ns = int(datetime(*info.date_time).timestamp() * 1e9)
+                members[info.filename] = [data_offset, info.compress_size, info.file_size,
+                                          info.compress_type, mtime_ns]
+
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(index_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'archive': str(self.archive_file),
+                'archive_size': stat.st_size,
+                'archive_mtime_ns': stat.st_mtime_ns,
+                'members': members
+            }, f)
+        logging.info(f"Index ZIP construit: {len(members)} membres -> {index_file}")
+        return members
+
+    def _build_tree(self):
+        children = {'': set()}
+        for name in self.members:
+            parts = name.split('/')
+            for depth in range(len(parts)):
+                parent = '/'.join(parts[:depth])
+                children.setdefault(parent, set()).add(parts[depth])
+        return {parent: sorted(names) for parent, names in children.items()}
+
+    def _pread(self, size, offset):
+        if hasattr(os, 'pread'):
+            return os.pread(self._fd, size, offset)
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, size)
+
+    def read_member(self, name):
+        """
+        Lit et décompresse un membre de l'archive.
+        """
+        data_offset, compress_size, file_size, compress_type, _ = self.members[name]
+        data = self._pread(compress_size, data_offset)
+        if compress_type == zipfile.ZIP_STORED:
+            return data
+        if compress_type == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(data, -15, file_size)
+        with zipfile.ZipFile(self.archive_file) as archive:
+            return archive.read(name)
+
+    def find_dataset_root(self):
+        """
+        Retourne le dossier de l'archive contenant les ensembles (train/, test/, val/).
+        """
+        return ZipPath(self, find_dataset_prefix(self.children, self.archive_file))
+
+    def close(self):
+        os.close(self._fd)
+
+def open_zip_dataset(archive_file):
+    """
+    Ouvre (une seule fois par processus) une archive ZIP indexée.
+    """
+    archive_file = Path(archive_file).resolve()
+    with _archives_lock:
+        if archive_file not in _archives:
+            _archives[archive_file] = ZipDataset(archive_file)
+        return _archives[archive_file]
+
+class ZipPath:
+    """
+    Chemin dans une archive ZIP offrant le sous-ensemble de l'interface
+    pathlib.Path utilisé par les fonctions de utils (/, exists, iterdir,
+    glob, stat, open, suffix, name, relative_to...).
+
+    Les instances sont sérialisables (pickle) pour les pools de processus:
+    chaque processus rouvre l'archive via son index persistant.
+    """
+
+    def __init__(self, archive, member):
+        self.archive = archive
+        self.member = member.strip('/')
+
+    def __reduce__(self):
+        return (_zip_path, (str(self.archive.archive_file), self.member))
+
+    def __truediv__(self, other):
+        return type(self)(self.archive, f"{self.member}/{other}" if self.member else str(other))
+
+    def __str__(self):
+        return f"{self.archive.archive_file}/{self.member}"
+
+    def __repr__(self):
+        return f"{type(self).__name__}('{self}')"
+
+    def __eq__(self, other):
+        return type(other) is type(self) and (self.archive, self.member) == (other.archive, other.member)
+
+    def __hash__(self):
+        return hash((self.archive.archive_file, self.member))
+
+    def __lt__(self, other):
+        return self.member < other.member
+
+    @property
+    def name(self):
+        return PurePosixPath(self.member).name
+
+    @property
+    def suffix(self):
+        return PurePosixPath(self.member).suffix
+
+    @property
+    def stem(self):
+        return PurePosixPath(self.member).stem
+
+    @property
+    def parent(self):
+        return type(self)(self.archive, self.member.rpartition('/')[0])
+
+    def is_file(self):
+        return self.member in self.archive.members
+
+    def is_dir(self):
+        return self.member in self.archive.children and not self.is_file()
+
+    def exists(self):
+        return self.is_file() or self.is_dir()
+
+    def iterdir(self):
+        if not self.is_dir():
+            raise NotADirectoryError(str(self))
+        return iter([self / name for name in self.archive.children[self.member]])
+
+    def glob(self, pattern):
+        if '/' in pattern or '**' in pattern:
+            raise NotImplementedError("Seuls les motifs sans sous-dossier sont supportés")
+        return iter([child for child in self.iterdir() if fnmatch(child.name, pattern)])
+
+    def stat(self):
+        if not self.is_file():
+            return ZipMemberStat(0, 0)
+        _, _, file_size, _, mtime_ns = self.archive.members[self.member]
+        return ZipMemberStat(file_size, mtime_ns)
+
+    def read_bytes(self):
+        return self.archive.read_member(self.member)
+
+    def open(self, mode='rb'):
+        if mode != 'rb':
+            raise ValueError("Les membres d'archive sont en lecture seule ('rb')")
+        return io.BytesIO(self.read_bytes())
+
+    def relative_to(self, other):
+        return PurePosixPath(self.member).relative_to(other.member) if other.member \
+            else PurePosixPath(self.member)
+
+    def as_posix(self):
+        return str(self)
+
+def _zip_path(archive_file, member):
+    return ZipPath(open_zip_dataset(archive_file), member)
+
+def open_dataset(location=None):
+    """
+    Retourne la racine du dataset: un Path pour un dossier extrait, un
+    ZipPath pour une archive .zip (lue sans extraction) ou un S3Path pour
+    une URL s3://bucket/préfixe (s3_dataset.py).
+
+    Args:
+        location (Path | str, optional): Dossier, archive ou URL (défaut:
+            DATASET_ARCHIVE s'il est défini, sinon DATASET_PATH)
+
+    Returns:
+        Path | ZipPath | S3Path: Racine contenant train/, test/ et val/
+    """
+    if location is None:
+        location = DATASET_ARCHIVE or DATASET_PATH
+    if str(location).startswith('s3://'):
+        from s3_dataset import open_s3_dataset
+        return open_s3_dataset(str(location)).find_dataset_root()
+    location = Path(location)
+    if location.suffix.lower() == '.zip':
+        return open_zip_dataset(location).find_dataset_root()
+    return location